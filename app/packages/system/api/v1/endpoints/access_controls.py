@@ -10,16 +10,21 @@ from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 
 from app.packages.system.api.v1.schemas.access_control import (
+    AccessControlBatchCreateRequest,
+    AccessControlBatchCreateResponse,
     AccessControlCreateRequest,
     AccessControlDeletionResponse,
     AccessControlDetailResponse,
     AccessControlMutationResponse,
+    AccessControlReorderRequest,
+    AccessControlReorderResponse,
     AccessControlTreeResponse,
     AccessControlUpdateRequest,
     RouterListResponse,
 )
 from app.packages.system.core.dependencies import get_current_active_user, get_db
 from app.packages.system.core.logger import logger
+from app.packages.system.core.responses import FastJSONResponse
 from app.packages.system.core.timezone import now as tz_now
 from app.packages.system.models.user import User
 from app.packages.system.services.access_control_service import access_control_service
@@ -28,7 +33,7 @@ from app.packages.system.services.log_service import log_service
 router = APIRouter(prefix="/access-controls", tags=["access_controls"])
 
 
-@router.get("", response_model=AccessControlTreeResponse)
+@router.get("", response_model=AccessControlTreeResponse, response_class=FastJSONResponse)
 def list_access_controls(
     name: Optional[str] = None,
     enabled_status: Optional[str] = None,
@@ -39,7 +44,7 @@ def list_access_controls(
     return access_control_service.list_tree(db, name=name, enabled_status=enabled_status)
 
 
-@router.get("/routers", response_model=RouterListResponse)
+@router.get("/routers", response_model=RouterListResponse, response_class=FastJSONResponse)
 def get_routers(
     request: Request,
     db: Session = Depends(get_db),
@@ -121,6 +126,80 @@ def create_access_control_item(
         )
 
 
+@router.post("/batch", response_model=AccessControlBatchCreateResponse)
+def batch_create_access_control_items(
+    payload: AccessControlBatchCreateRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> AccessControlBatchCreateResponse:
+    """批量创建访问控制节点（如初始化菜单），任一项校验失败则全部不写入。"""
+
+    started_at = tz_now()
+    status = "success"
+    error_message: Optional[str] = None
+    response_payload: Optional[dict[str, Any]] = None
+    items = [item.model_dump(exclude_none=True) for item in payload.items]
+
+    try:
+        response_payload = access_control_service.bulk_create(db, payloads=items)
+        return response_payload
+    except Exception as exc:
+        status = "failure"
+        error_message = str(exc)
+        raise
+    finally:
+        _record_operation_log(
+            db=db,
+            request=request,
+            current_user=current_user,
+            business_type="create",
+            class_method="app.packages.system.api.v1.endpoints.access_controls.batch_create_access_control_items",
+            request_body={"items": items},
+            response_body=response_payload,
+            status=status,
+            error_message=error_message,
+            started_at=started_at,
+        )
+
+
+@router.put("/reorder", response_model=AccessControlReorderResponse)
+def reorder_access_control_items(
+    payload: AccessControlReorderRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> AccessControlReorderResponse:
+    """批量调整访问控制节点的上级与排序（需注册在 `/{item_id}` 之前）。"""
+
+    started_at = tz_now()
+    status = "success"
+    error_message: Optional[str] = None
+    response_payload: Optional[dict[str, Any]] = None
+    items = [item.model_dump() for item in payload.items]
+
+    try:
+        response_payload = access_control_service.reorder(db, items=items)
+        return response_payload
+    except Exception as exc:
+        status = "failure"
+        error_message = str(exc)
+        raise
+    finally:
+        _record_operation_log(
+            db=db,
+            request=request,
+            current_user=current_user,
+            business_type="update",
+            class_method="app.packages.system.api.v1.endpoints.access_controls.reorder_access_control_items",
+            request_body={"items": items},
+            response_body=response_payload,
+            status=status,
+            error_message=error_message,
+            started_at=started_at,
+        )
+
+
 @router.put("/{item_id}", response_model=AccessControlMutationResponse)
 def update_access_control_item(
     item_id: int,
@@ -178,6 +178,8 @@ async def upload_files(
             materials.append((orig_name, content))
             meta.append((orig_name, size, mime))
         results = backend.upload(path=path or "/", files=materials)
+        # 同名覆盖后旧缩略图不再有效
+        thumbnail_service.invalidate(storage_id)
 
         # 记录到数据库（失败不影响上传）
         try:
@@ -514,6 +516,7 @@ def rename(
         # 调用后端执行真实重命名
         backend = file_service._get_backend(db, storage_id=storage_id)
         resp = backend.rename(old_path=payload.oldPath, new_path=payload.newPath)
+        thumbnail_service.invalidate(storage_id)
         # 同步数据库（独立函数，避免依赖实例私有方法/热重载差异）
         try:
             from app.packages.system.services.sync_service import sync_rename_records as _sync_rename
@@ -567,6 +570,7 @@ def move(
         except Exception:
             pass
         resp = backend.move(source_paths=payload.sourcePaths, destination_path=payload.destinationPath)
+        thumbnail_service.invalidate(storage_id)
         try:
             from app.packages.system.services.sync_service import sync_move_records as _sync_move
             summary = _sync_move(db, storage_id=storage_id, source_paths=payload.sourcePaths, destination_path=payload.destinationPath)
@@ -630,6 +634,7 @@ def copy(
         except Exception:
             pass
         resp = backend.copy(source_paths=payload.sourcePaths, destination_path=payload.destinationPath)
+        thumbnail_service.invalidate(storage_id)
         try:
             from app.packages.system.services.sync_service import sync_copy_records as _sync_copy
             summary = _sync_copy(db, storage_id=storage_id, source_paths=payload.sourcePaths, destination_path=payload.destinationPath)
@@ -731,6 +736,7 @@ async def delete_items(
         if not paths:
             return create_response("paths 不能为空", None, HTTP_STATUS_BAD_REQUEST)
         resp = backend.delete(paths=paths)
+        thumbnail_service.invalidate(storage_id)
         summary = None
         try:
             # 调用独立函数，规避实例方法在某些环境下缺失的问题
@@ -916,6 +922,7 @@ def paste(
                     pass
         else:  # cut -> move
             resp = backend.move(source_paths=paths, destination_path=destination_path)
+            thumbnail_service.invalidate(storage_id)
             try:
                 from app.packages.system.services.sync_service import sync_move_records as _sync_move
                 summary = _sync_move(db, storage_id=storage_id, source_paths=paths, destination_path=destination_path)
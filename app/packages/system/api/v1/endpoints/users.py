@@ -34,9 +34,12 @@ router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.get("/me", response_model=UserInfoResponse)
-def read_current_user(current_user: User = Depends(get_current_active_user)) -> UserInfoResponse:
+def read_current_user(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+) -> UserInfoResponse:
     """返回当前已认证且激活用户的概要信息。"""
-    return user_service.build_user_profile(current_user)
+    return user_service.build_user_profile(current_user, db)
 
 
 @router.get("", response_model=UserListResponse)
@@ -50,6 +50,38 @@ class AccessControlCreateRequest(BaseModel):
         return self
 
 
+class AccessControlBatchCreateRequest(BaseModel):
+    """批量新建访问控制项时的请求体。"""
+
+    items: list[AccessControlCreateRequest] = Field(..., min_length=1)
+
+
+class AccessControlBatchCreateResult(BaseModel):
+    """批量新建的结果统计。"""
+
+    created: int
+
+
+class AccessControlReorderItem(BaseModel):
+    """单个节点调整后的位置。"""
+
+    id: int
+    parent_id: Optional[int] = Field(default=None, ge=0)
+    sort_order: int = Field(..., ge=0)
+
+
+class AccessControlReorderRequest(BaseModel):
+    """批量调整节点上级与排序时的请求体。"""
+
+    items: list[AccessControlReorderItem] = Field(..., min_length=1)
+
+
+class AccessControlReorderResult(BaseModel):
+    """批量调整的结果统计。"""
+
+    updated: int
+
+
 class AccessControlUpdateRequest(BaseModel):
     """更新访问控制项时的请求体。"""
 
@@ -123,6 +155,8 @@ AccessControlTreeResponse = ResponseEnvelope[list[AccessControlTreeNode]]
 AccessControlDetailResponse = ResponseEnvelope[AccessControlDetail]
 AccessControlMutationResponse = ResponseEnvelope[AccessControlDetail]
 AccessControlDeletionResponse = ResponseEnvelope[Optional[None]]
+AccessControlBatchCreateResponse = ResponseEnvelope[AccessControlBatchCreateResult]
+AccessControlReorderResponse = ResponseEnvelope[AccessControlReorderResult]
 
 
 class RouterMeta(BaseModel):
@@ -76,6 +76,10 @@ class Settings(BaseSettings):
     database_password: str = Field(default="postgres", alias="DATABASE_PASSWORD")
     database_name: str = Field(default="asmrobotx", alias="DATABASE_NAME")
     database_echo: bool = Field(default=False, alias="DATABASE_ECHO")
+    # 连接池：长时间的同步扫描会连续发出大量短语句，需保持足够的常驻连接
+    database_pool_size: int = Field(default=20, alias="DATABASE_POOL_SIZE")
+    database_max_overflow: int = Field(default=40, alias="DATABASE_MAX_OVERFLOW")
+    database_pool_recycle: int = Field(default=1800, alias="DATABASE_POOL_RECYCLE")
 
     redis_host: str = Field(default="localhost", alias="REDIS_HOST")
     redis_port: int = Field(default=6379, alias="REDIS_PORT")
@@ -2,9 +2,17 @@
 
 from typing import Any
 
+from fastapi.responses import JSONResponse
+
 from app.packages.system.core.constants import HTTP_STATUS_OK
 from app.packages.system.core.security import consume_refreshed_token
 
+try:  # 可选依赖：orjson 为 C 实现的 JSON 编码器，大体量响应（如菜单树）序列化快数倍；未安装时退回标准库
+    import orjson  # type: ignore  # noqa: F401
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+except ImportError:  # pragma: no cover - 取决于运行环境
+    FastJSONResponse = JSONResponse  # type: ignore[misc,assignment]
+
 
 def create_response(msg: str, data: Any = None, code: int = HTTP_STATUS_OK) -> dict[str, Any]:
     """按照 ``msg``、``data``、``code`` 组合出统一响应体。"""
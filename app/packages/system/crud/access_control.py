@@ -1,9 +1,12 @@
 """访问控制项的数据库访问封装。"""
 
-from typing import Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session, raiseload
 
+from app.core.datascope import apply_data_scope
 from app.packages.system.crud.base import CRUDBase
 from app.packages.system.models.access_control import AccessControlItem
 from app.packages.system.models.base import role_access_controls
@@ -13,10 +16,52 @@ class CRUDAccessControl(CRUDBase[AccessControlItem]):
     """提供访问控制项的便捷查询方法。"""
 
     def list_all(self, db: Session) -> List[AccessControlItem]:
-        """返回所有未删除的访问控制项，按照排序值与主键排序。"""
-        query = self.query(db)
+        """返回所有未删除的访问控制项，按照排序值与主键排序。
+
+        一次 SELECT 取回树构建所需的全部列；树构建只读列值，关系一律 raiseload，
+        意外的懒加载（N+1）直接报错。
+        """
+        query = self.query(db).options(raiseload("*"))
         return query.order_by(self.model.sort_order, self.model.id).all()
 
+    def list_matching_with_ancestors(
+        self,
+        db: Session,
+        *,
+        name_filter: Optional[str] = None,
+        enabled_status: Optional[str] = None,
+    ) -> List[AccessControlItem]:
+        """返回命中过滤条件的访问控制项及其全部祖先（未删除、数据域内），按排序值与主键排序。
+
+        名称为不区分大小写的包含匹配；祖先通过递归 CTE 在数据库侧逐级向上收集，
+        UNION 去重保证遇到重复路径时收敛。
+        """
+        model = self.model
+
+        def scoped(stmt):
+            if self._is_deleted_col is not None:
+                stmt = stmt.filter(self._is_deleted_col.is_(False))
+            return apply_data_scope(stmt, model)
+
+        anchor = scoped(select(model.id, model.parent_id))
+        if name_filter:
+            escaped = name_filter.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            anchor = anchor.filter(func.lower(model.name).like(f"%{escaped}%", escape="\\"))
+        if enabled_status:
+            anchor = anchor.filter(model.enabled_status == enabled_status)
+
+        matched = anchor.cte("matched", recursive=True)
+        ancestors = scoped(select(model.id, model.parent_id).join(matched, model.id == matched.c.parent_id))
+        matched = matched.union(ancestors)
+
+        query = (
+            self.query(db)
+            .options(raiseload("*"))
+            .filter(model.id.in_(select(matched.c.id)))
+            .order_by(model.sort_order, model.id)
+        )
+        return query.all()
+
     def get_by_permission_code(
         self,
         db: Session,
@@ -30,6 +75,23 @@ class CRUDAccessControl(CRUDBase[AccessControlItem]):
             query = query.filter(self.model.id != exclude_id)
         return query.first()
 
+    def list_permission_codes(self, db: Session) -> set[str]:
+        """返回全部已占用的权限字符（判重口径与 `get_by_permission_code` 一致），供批量校验一次取回。"""
+        query = self.query(db).with_entities(self.model.permission_code).filter(self.model.permission_code.isnot(None))
+        return {row[0] for row in query}
+
+    def update_fields(self, db: Session, item_id: int, fields: Dict[str, Any], *, auto_commit: bool = True) -> Optional[Row]:
+        """以单条 UPDATE ... RETURNING 回写标量字段，返回更新后的整行。
+
+        返回的是列值行而非 ORM 实例：提交后不会因过期而再触发一次 refresh 查询。
+        """
+        columns = self.model.__table__.columns
+        stmt = update(self.model).where(self.model.id == item_id).values(**fields).returning(*columns)
+        row = db.execute(stmt).first()
+        if auto_commit:
+            db.commit()
+        return row
+
     def has_children(self, db: Session, item_id: int) -> bool:
         """判断指定访问控制项是否存在未删除的子级。"""
         query = self.query(db).with_entities(self.model.id).filter(self.model.parent_id == item_id)
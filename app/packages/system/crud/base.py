@@ -1,7 +1,9 @@
 """CRUD 基类：为各实体提供通用的数据访问方法。"""
 
+import io
 from typing import Any, Dict, Generic, List, Optional, Type, TypeVar
 
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
 from app.core.datascope import apply_data_scope, scope_defaults_for_create
 from app.packages.system.core.constants import DEFAULT_ORGANIZATION_NAME
@@ -15,8 +17,13 @@ ModelType = TypeVar("ModelType", bound=Base)
 class CRUDBase(Generic[ModelType]):
     """封装常见的查询、创建与保存逻辑，减少重复代码。"""
 
+    # PostgreSQL 下批量插入达到该行数时改用 COPY FROM STDIN（解析与权限检查只做一次）
+    COPY_THRESHOLD = 100
+
     def __init__(self, model: Type[ModelType]):
         self.model = model
+        # 模型是否支持软删除在构造时确定一次，避免每次查询都做 hasattr + 属性查找
+        self._is_deleted_col = getattr(model, "is_deleted", None)
 
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
         query = self.query(db).filter(self.model.id == id)
@@ -26,32 +33,38 @@ class CRUDBase(Generic[ModelType]):
         query = self.query(db)
         return query.offset(skip).limit(limit).all()
 
-    def create(self, db: Session, obj_in: Dict[str, Any], *, auto_commit: bool = True) -> ModelType:
-        # 自动附加数据域默认字段（若模型包含且调用方未显式赋值）
-        defaults = scope_defaults_for_create(self.model)
+    def _default_organization_id(self, db: Session) -> int:
+        org_id = None
+        try:
+            row = (
+                db.query(Organization.id)
+                .filter(Organization.name == DEFAULT_ORGANIZATION_NAME)
+                .first()
+            )
+            if row:
+                org_id = row[0] if not isinstance(row, Organization) else row.id
+        except Exception:
+            org_id = None
+        if org_id is None:
+            # 如果默认组织不存在，明确报错，避免写入不合法数据
+            raise ValueError(
+                "organization_id is required but missing; default organization not found"
+            )
+        return org_id
+
+    def _prepare_payload(self, db: Session, obj_in: Dict[str, Any], defaults: Dict[str, Any]) -> Dict[str, Any]:
         payload = {**defaults, **obj_in}
 
         # 强制补齐必填字段：若仍缺失，使用“admin(1)/默认组织(研发部)”作为兜底
         if hasattr(self.model, "created_by") and payload.get("created_by") is None:
             payload["created_by"] = 1
         if hasattr(self.model, "organization_id") and payload.get("organization_id") is None:
-            org_id = None
-            try:
-                row = (
-                    db.query(Organization.id)
-                    .filter(Organization.name == DEFAULT_ORGANIZATION_NAME)
-                    .first()
-                )
-                if row:
-                    org_id = row[0] if not isinstance(row, Organization) else row.id
-            except Exception:
-                org_id = None
-            if org_id is None:
-                # 如果默认组织不存在，明确报错，避免写入不合法数据
-                raise ValueError(
-                    "organization_id is required but missing; default organization not found"
-                )
-            payload["organization_id"] = org_id
+            payload["organization_id"] = self._default_organization_id(db)
+        return payload
+
+    def create(self, db: Session, obj_in: Dict[str, Any], *, auto_commit: bool = True) -> ModelType:
+        # 自动附加数据域默认字段（若模型包含且调用方未显式赋值）
+        payload = self._prepare_payload(db, obj_in, scope_defaults_for_create(self.model))
         db_obj = self.model(**payload)
         db.add(db_obj)
         if auto_commit:
@@ -62,6 +75,87 @@ class CRUDBase(Generic[ModelType]):
                 pass
         return db_obj
 
+    def bulk_create(self, db: Session, objs_in: List[Dict[str, Any]], *, auto_commit: bool = True) -> int:
+        """批量插入多行（单条 executemany INSERT），不返回 ORM 对象。
+
+        默认字段规则与 `create` 一致；默认组织只解析一次并复用。返回插入行数。
+        """
+        if not objs_in:
+            return 0
+        defaults = scope_defaults_for_create(self.model)
+        if hasattr(self.model, "organization_id") and defaults.get("organization_id") is None:
+            if any(obj.get("organization_id") is None for obj in objs_in):
+                defaults["organization_id"] = self._default_organization_id(db)
+        payloads = [self._prepare_payload(db, obj, defaults) for obj in objs_in]
+        if len(payloads) < self.COPY_THRESHOLD or not self._copy_rows(db, payloads):
+            db.execute(insert(self.model), payloads)
+        if auto_commit:
+            db.commit()
+        return len(payloads)
+
+    def bulk_update(self, db: Session, mappings: List[Dict[str, Any]], *, auto_commit: bool = True) -> int:
+        """按主键批量更新多行（单条 executemany UPDATE），每个映射须包含 `id`。返回更新行数。"""
+        if not mappings:
+            return 0
+        db.execute(update(self.model), mappings)
+        if auto_commit:
+            db.commit()
+        return len(mappings)
+
+    def _copy_rows(self, db: Session, payloads: List[Dict[str, Any]]) -> bool:
+        """PostgreSQL（psycopg2）下以 COPY FROM STDIN 写入多行；其他方言/驱动返回 False 由调用方改走 INSERT。"""
+        bind = db.get_bind()
+        if bind.dialect.name != "postgresql":
+            return False
+        raw = db.connection().connection
+        cursor = raw.cursor()
+        if not hasattr(cursor, "copy_expert"):
+            cursor.close()
+            return False
+
+        def _default(col):
+            d = col.default
+            return d.arg if d is not None and d.is_scalar else None
+
+        # COPY 不会应用 ORM 侧的 Python 默认值：带标量默认值的列即使调用方未提供也显式写出
+        table = self.model.__table__
+        keys = set().union(*payloads)
+        columns = [c for c in table.columns if c.key in keys or _default(c) is not None]
+
+        # 按列类型的绑定处理器转换取值（如 JSON 列序列化为 JSON 文本），与 INSERT 路径写出的内容一致
+        dialect = bind.dialect
+        processors = {c.key: c.type.dialect_impl(dialect).bind_processor(dialect) for c in columns}
+
+        def _fmt(col, value) -> str:
+            if value is not None and processors[col.key] is not None:
+                value = processors[col.key](value)
+            if value is None:
+                return "\\N"
+            if isinstance(value, bool):
+                return "t" if value else "f"
+            return (
+                str(value)
+                .replace("\\", "\\\\")
+                .replace("\t", "\\t")
+                .replace("\n", "\\n")
+                .replace("\r", "\\r")
+            )
+
+        buf = io.StringIO()
+        for payload in payloads:
+            buf.write("\t".join(_fmt(c, payload.get(c.key, _default(c))) for c in columns))
+            buf.write("\n")
+        buf.seek(0)
+        preparer = bind.dialect.identifier_preparer
+        sql = "COPY {} ({}) FROM STDIN".format(
+            preparer.format_table(table), ", ".join(preparer.quote(c.name) for c in columns)
+        )
+        try:
+            cursor.copy_expert(sql, buf)
+        finally:
+            cursor.close()
+        return True
+
     def save(self, db: Session, db_obj: ModelType, *, auto_commit: bool = True) -> ModelType:
         db.add(db_obj)
         if auto_commit:
@@ -105,8 +199,8 @@ class CRUDBase(Generic[ModelType]):
     # 统一构造带软删除与数据域过滤的查询
     def query(self, db: Session, *, include_deleted: bool = False):
         query = db.query(self.model)
-        if hasattr(self.model, "is_deleted") and not include_deleted:
-            query = query.filter(self.model.is_deleted.is_(False))
+        if self._is_deleted_col is not None and not include_deleted:
+            query = query.filter(self._is_deleted_col.is_(False))
         # 数据隔离：若模型具备 organization_id 字段，则按当前数据域过滤
         query = apply_data_scope(query, self.model)
         return query
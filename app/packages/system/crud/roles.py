@@ -5,6 +5,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Iterable, List, Optional, Tuple
 
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 
 from app.packages.system.crud.base import CRUDBase
@@ -73,5 +74,27 @@ class CRUDRole(CRUDBase[Role]):
         query = self.query(db).filter(self.model.id.in_(id_set))
         return query.all()
 
+    def list_by_tokens(self, db: Session, tokens: Iterable[str]) -> List[Role]:
+        """按 ID / 名称 / 权限字符（名称与权限字符不区分大小写）一次性查询匹配的角色。"""
+
+        ids: set[int] = set()
+        lowered: set[str] = set()
+        for token in tokens:
+            if not token:
+                continue
+            if token.isdigit():
+                ids.add(int(token))
+            lowered.add(token.lower())
+        if not ids and not lowered:
+            return []
+
+        conditions = []
+        if ids:
+            conditions.append(self.model.id.in_(ids))
+        if lowered:
+            conditions.append(func.lower(self.model.name).in_(lowered))
+            conditions.append(func.lower(self.model.role_key).in_(lowered))
+        return self.query(db).filter(or_(*conditions)).all()
+
 
 role_crud = CRUDRole(Role)
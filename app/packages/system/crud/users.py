@@ -1,13 +1,16 @@
 """用户 CRUD：集中管理用户相关的数据操作。"""
 
 from datetime import datetime
-from typing import Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import insert
+
+from sqlalchemy.orm import Session, joinedload, raiseload, selectinload
 
 from app.packages.system.core.enums import UserStatusEnum
 from app.packages.system.crud.base import CRUDBase
 from app.packages.system.models.role import Role
+from app.packages.system.models.base import user_roles
 from app.packages.system.models.user import User
 from app.core.datascope import get_scope
 from app.packages.system.core.constants import DEFAULT_ORGANIZATION_NAME
@@ -22,6 +25,20 @@ class CRUDUser(CRUDBase[User]):
         query = self.query(db).filter(User.username == username)
         return query.first()
 
+    def get_with_permissions(self, db: Session, user_id: int) -> Optional[User]:
+        """获取用户并一次性预加载组织、角色及角色的权限/访问控制项（共 4 条查询，而非 1+R+R）。"""
+        query = (
+            self.query(db)
+            .filter(User.id == user_id)
+            .options(
+                joinedload(self.model.organization),
+                selectinload(self.model.roles).selectinload(Role.permissions),
+                selectinload(self.model.roles).selectinload(Role.access_controls),
+            )
+            .execution_options(populate_existing=True)
+        )
+        return query.first()
+
     def list_with_filters(
         self,
         db: Session,
@@ -35,6 +52,58 @@ class CRUDUser(CRUDBase[User]):
     ) -> Tuple[list[User], int]:
         """按照多条件过滤用户并返回分页结果。"""
 
+        query = self._filtered_query(
+            db, username=username, statuses=statuses, start_time=start_time, end_time=end_time
+        )
+        total = query.count()
+        items = (
+            query.options(*self._summary_load_options())
+            .order_by(self.model.id.asc())
+            .offset(max(skip, 0))
+            .limit(max(limit, 1))
+            .all()
+        )
+        return items, total
+
+    def iter_with_filters(
+        self,
+        db: Session,
+        *,
+        username: Optional[str] = None,
+        statuses: Optional[Iterable[str]] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        limit: int = 10_000,
+        chunk_size: int = 500,
+    ) -> Iterator[User]:
+        """按与 `list_with_filters` 相同的条件分块流式读取用户（yield_per），用于导出等大批量场景。"""
+        query = self._filtered_query(
+            db, username=username, statuses=statuses, start_time=start_time, end_time=end_time
+        )
+        return iter(
+            query.options(*self._summary_load_options())
+            .order_by(self.model.id.asc())
+            .limit(max(limit, 1))
+            .yield_per(chunk_size)
+        )
+
+    def _summary_load_options(self) -> tuple:
+        """列表/导出序列化所需的关系一次性预加载；其余关系 raiseload，意外的懒加载（N+1）直接报错。"""
+        return (
+            selectinload(self.model.roles),
+            joinedload(self.model.organization),
+            raiseload("*"),
+        )
+
+    def _filtered_query(
+        self,
+        db: Session,
+        *,
+        username: Optional[str],
+        statuses: Optional[Iterable[str]],
+        start_time: Optional[datetime],
+        end_time: Optional[datetime],
+    ):
         query = self.query(db)
 
         if username:
@@ -49,26 +118,15 @@ class CRUDUser(CRUDBase[User]):
             query = query.filter(self.model.create_time >= start_time)
         elif end_time:
             query = query.filter(self.model.create_time <= end_time)
-
-        total = query.count()
-        items = (
-            query.options(
-                selectinload(self.model.roles),
-                selectinload(self.model.organization),
-            )
-            .order_by(self.model.id.asc())
-            .offset(max(skip, 0))
-            .limit(max(limit, 1))
-            .all()
-        )
-        return items, total
+        return query
 
     def list_by_usernames(self, db: Session, usernames: Iterable[str]) -> list[User]:
         """批量根据用户名获取用户，用于导入去重等场景。"""
         tokens = {item.strip() for item in usernames if item and item.strip()}
         if not tokens:
             return []
-        query = self.query(db).filter(self.model.username.in_(tokens))
+        # 仅用于用户名去重：禁止任何关系懒加载
+        query = self.query(db).filter(self.model.username.in_(tokens)).options(raiseload("*"))
         return query.all()
 
     def list_by_ids(self, db: Session, ids: Iterable[int]) -> list[User]:
@@ -97,15 +155,8 @@ class CRUDUser(CRUDBase[User]):
 
         effective_active = is_active if is_active is not None else resolved_status == UserStatusEnum.NORMAL.value
 
-        # 默认组织：优先使用显式传入；否则回落到当前数据域
         scope = get_scope()
-        effective_org_id = organization_id if organization_id is not None else scope.organization_id
-        if effective_org_id is None:
-            # 兜底使用默认组织
-            row = db.query(Organization.id).filter(Organization.name == DEFAULT_ORGANIZATION_NAME).first()
-            if row is None:
-                raise ValueError("organization_id is required when creating user")
-            effective_org_id = row[0] if not isinstance(row, Organization) else row.id
+        effective_org_id = self._resolve_organization_id(db, organization_id)
 
         user = User(
             username=username,
@@ -125,5 +176,85 @@ class CRUDUser(CRUDBase[User]):
         db.refresh(user)
         return user
 
+    def bulk_create_with_roles(self, db: Session, items: List[Dict[str, Any]]) -> set[str]:
+        """批量创建用户及其角色关联：一条多行 INSERT ... RETURNING 写用户，一条写关联，最后统一提交。
+
+        `items` 每项包含 username/hashed_password/roles，可选 nickname/status/remark/organization_id，
+        默认值规则与 `create_with_roles` 一致。用户名冲突的行由唯一约束跳过（ON CONFLICT DO NOTHING），
+        返回实际创建的用户名集合，调用方据此得出重复项。
+        """
+        if not items:
+            return set()
+        scope = get_scope()
+        created_by = scope.user_id if scope.user_id is not None else 1
+        default_org_id: Optional[int] = None
+        rows: list[dict] = []
+        for item in items:
+            org_id = item.get("organization_id")
+            if org_id is None:
+                if default_org_id is None:
+                    default_org_id = self._resolve_organization_id(db, None)
+                org_id = default_org_id
+            resolved_status = item.get("status") or UserStatusEnum.NORMAL.value
+            rows.append(
+                {
+                    "username": item["username"],
+                    "hashed_password": item["hashed_password"],
+                    "nickname": item.get("nickname"),
+                    "organization_id": org_id,
+                    "status": resolved_status,
+                    "remark": item.get("remark"),
+                    "is_active": resolved_status == UserStatusEnum.NORMAL.value,
+                    "created_by": created_by,
+                }
+            )
+
+        try:
+            dialect = db.get_bind().dialect.name
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            elif dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                dialect_insert = None
+
+            if dialect_insert is not None:
+                stmt = dialect_insert(User).on_conflict_do_nothing(index_elements=[User.username])
+            else:
+                # 其他方言没有通用的冲突跳过语法：先剔除已存在的用户名再插入
+                taken = {
+                    name
+                    for (name,) in db.query(User.username).filter(User.username.in_([row["username"] for row in rows]))
+                }
+                rows = [row for row in rows if row["username"] not in taken]
+                stmt = insert(User)
+
+            created = dict(db.execute(stmt.returning(User.username, User.id), rows).all()) if rows else {}
+            links = [
+                {"user_id": created[item["username"]], "role_id": role.id}
+                for item in items
+                if item["username"] in created
+                for role in (item.get("roles") or [])
+            ]
+            if links:
+                db.execute(insert(user_roles), links)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return set(created)
+
+    def _resolve_organization_id(self, db: Session, organization_id: Optional[int]) -> int:
+        # 默认组织：优先使用显式传入；否则回落到当前数据域
+        scope = get_scope()
+        effective_org_id = organization_id if organization_id is not None else scope.organization_id
+        if effective_org_id is None:
+            # 兜底使用默认组织
+            row = db.query(Organization.id).filter(Organization.name == DEFAULT_ORGANIZATION_NAME).first()
+            if row is None:
+                raise ValueError("organization_id is required when creating user")
+            effective_org_id = row[0] if not isinstance(row, Organization) else row.id
+        return effective_org_id
+
 
 user_crud = CRUDUser(User)
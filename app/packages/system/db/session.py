@@ -8,6 +8,15 @@ from app.packages.system.core.config import get_settings
 settings = get_settings()
 
 # ``pool_pre_ping`` keeps the connection pool healthy; ``echo`` mirrors SQL logs
-# when enabled in settings for easier debugging.
-engine = create_engine(settings.sql_database_url, pool_pre_ping=True, echo=settings.database_echo)
+# when enabled in settings for easier debugging. Pool sizing is tuned for long
+# file-sync scans that issue many short statements back to back, and
+# ``pool_recycle`` drops connections before server-side idle timeouts hit.
+engine = create_engine(
+    settings.sql_database_url,
+    pool_pre_ping=True,
+    pool_size=settings.database_pool_size,
+    max_overflow=settings.database_max_overflow,
+    pool_recycle=settings.database_pool_recycle,
+    echo=settings.database_echo,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 
-from collections import defaultdict
+from functools import lru_cache
 import re
-from typing import Any, Dict, Iterable, List, Optional
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
 
 from sqlalchemy.orm import Session
 
@@ -21,22 +23,199 @@ from app.packages.system.crud.access_control import access_control_crud
 from app.packages.system.models.access_control import AccessControlItem
 from app.core.datascope import get_scope
 
+# 访问控制树与动态路由结果的进程内缓存：键包含数据域与写入版本号，访问控制项增删改、
+# 角色授权变更时版本号自增并清空缓存；另设 TTL 兜底多进程部署下其他进程的写入
+_TREE_CACHE_TTL = 60.0
+_TREE_CACHE: dict[tuple, tuple[float, list]] = {}
+_TREE_CACHE_LOCK = threading.Lock()
+_tree_version = 0
+
+
+def _tree_cache_key(name_filter: Optional[str], normalized_status: Optional[str]) -> tuple:
+    scope = get_scope()
+    return (
+        _tree_version,
+        name_filter,
+        normalized_status,
+        scope.organization_id,
+        bool(scope.is_admin),
+        bool(scope.isolation_enabled),
+    )
+
+
+def _router_cache_key() -> tuple:
+    scope = get_scope()
+    is_admin = bool(scope.is_admin)
+    return (
+        "routers",
+        _tree_version,
+        # 管理员可见全部启用菜单，与所持角色无关，共享同一份缓存
+        () if is_admin else tuple(sorted(set(scope.role_ids or ()))),
+        scope.organization_id,
+        is_admin,
+        bool(scope.isolation_enabled),
+    )
+
+
+def _tree_cache_get(key: tuple) -> Optional[list]:
+    with _TREE_CACHE_LOCK:
+        hit = _TREE_CACHE.get(key)
+    if hit is None or hit[0] <= time.monotonic():
+        return None
+    return hit[1]
+
+
+def _tree_cache_put(key: tuple, tree: list) -> None:
+    with _TREE_CACHE_LOCK:
+        _TREE_CACHE[key] = (time.monotonic() + _TREE_CACHE_TTL, tree)
+
+
+def _invalidate_tree_cache() -> None:
+    global _tree_version
+    with _TREE_CACHE_LOCK:
+        _tree_version += 1
+        _TREE_CACHE.clear()
+
+
+# 枚举取值提前解析为模块常量，避免热路径上反复访问 `.value`
+_TYPE_MENU = AccessControlTypeEnum.MENU.value
+_TYPE_BUTTON = AccessControlTypeEnum.BUTTON.value
+_NODE_TYPES = frozenset({_TYPE_MENU, _TYPE_BUTTON})
+_TYPE_FALLBACK_MAP = {
+    "directory": _TYPE_MENU,
+}
+
+# 序列化时 route_params 为空的共享占位：树节点多数没有路由参数，避免逐节点新建空字典。
+# 仅用于只读的响应载荷，任何调用方都不得原地修改；不用 MappingProxyType 是因为
+# 操作日志以标准库 json 序列化响应体，无法处理该类型
+_EMPTY_ROUTE_PARAMS: Dict[str, Any] = {}
+
+# update 时按“出现即回写”处理的字段
+_UPDATE_FIELDS = (
+    "icon",
+    "is_external",
+    "route_path",
+    "display_status",
+    "enabled_status",
+    "sort_order",
+    "component_path",
+    "route_params",
+)
+
+_STATUS_VALUE_MAP = {
+    "启用": "enabled",
+    "停用": "disabled",
+}
+_DISPLAY_STATUS_VALUE_MAP = {
+    "显示": "show",
+    "隐藏": "hidden",
+}
+
+# 库中存量取值到“是否参与路由”的直接映射：常见取值一次字典查找即得结果，
+# 其余（大小写/空白变体、非法值）回落到完整的归一化流程
+_ENABLED_ROUTE_FLAGS = {
+    None: True,
+    "": True,
+    "enabled": True,
+    "disabled": False,
+    "启用": True,
+    "停用": False,
+}
+
+
+# 以下状态与类型解析函数的输入域很小（少量中英文取值），按原始字符串缓存解析结果；
+# None 由调用方在进入缓存前处理，异常不会被缓存
+@lru_cache(maxsize=32)
+def _parse_status_filter(enabled_status: str) -> Optional[str]:
+    normalized = enabled_status.strip()
+    if not normalized:
+        return None
+    mapped = _STATUS_VALUE_MAP.get(normalized)
+    value = (mapped or normalized).lower()
+    if value == "all":
+        return None
+    if value not in {"enabled", "disabled"}:
+        return None
+    return value
+
+
+@lru_cache(maxsize=32)
+def _parse_enabled_status(enabled_status: str) -> str:
+    normalized = enabled_status.strip()
+    if not normalized:
+        raise AppException("停用状态必填", HTTP_STATUS_BAD_REQUEST)
+    mapped = _STATUS_VALUE_MAP.get(normalized, normalized).lower()
+    if mapped not in {"enabled", "disabled"}:
+        raise AppException("停用状态取值无效", HTTP_STATUS_BAD_REQUEST)
+    return mapped
+
+
+@lru_cache(maxsize=32)
+def _parse_node_type(node_type: str) -> str:
+    normalized = node_type.strip().lower()
+    normalized = _TYPE_FALLBACK_MAP.get(normalized, normalized)
+    if normalized not in _NODE_TYPES:
+        raise AppException("访问控制项类型无效", HTTP_STATUS_BAD_REQUEST)
+    return normalized
+
+
+@lru_cache(maxsize=32)
+def _parse_display_status(display_status: str) -> str:
+    normalized = display_status.strip()
+    if not normalized:
+        raise AppException("显示状态必填", HTTP_STATUS_BAD_REQUEST)
+    mapped = _DISPLAY_STATUS_VALUE_MAP.get(normalized, normalized).lower()
+    if mapped not in {"show", "hidden"}:
+        raise AppException("显示状态取值无效", HTTP_STATUS_BAD_REQUEST)
+    return mapped
+
+
+class _RouterRow(NamedTuple):
+    """路由构建所需列的只读快照；热循环中按元组字段读取，避免 ORM 描述符开销。"""
+
+    id: int
+    parent_id: Optional[int]
+    name: Optional[str]
+    type: Optional[str]
+    icon: Optional[str]
+    is_external: bool
+    route_path: Optional[str]
+    display_status: Optional[str]
+    enabled_status: Optional[str]
+    component_path: Optional[str]
+    keep_alive: bool
+
+    @classmethod
+    def from_item(cls, item: AccessControlItem) -> _RouterRow:
+        return cls(
+            item.id,
+            item.parent_id,
+            item.name,
+            item.type,
+            item.icon,
+            bool(item.is_external),
+            item.route_path,
+            item.display_status,
+            item.enabled_status,
+            item.component_path,
+            bool(item.keep_alive),
+        )
+
+
+_SLUG_SPLIT_RE = re.compile(r"[^0-9A-Za-z]+")
+
+
+@lru_cache(maxsize=2048)
+def _slugify(value: str) -> str:
+    """将组件路径/路由/名称转为驼峰片段；同一菜单的取值在多次请求间重复，按字符串缓存。"""
+    if not value:
+        return ""
+    return "".join(segment.capitalize() for segment in _SLUG_SPLIT_RE.split(value) if segment)
+
 
 class AccessControlService:
     """聚合访问控制项的增删改查逻辑。"""
 
-    _STATUS_VALUE_MAP = {
-        "启用": "enabled",
-        "停用": "disabled",
-    }
-    _DISPLAY_STATUS_VALUE_MAP = {
-        "显示": "show",
-        "隐藏": "hidden",
-    }
-    _TYPE_FALLBACK_MAP = {
-        "directory": AccessControlTypeEnum.MENU.value,
-    }
-
     def list_tree(
         self,
         db: Session,
@@ -46,58 +225,38 @@ class AccessControlService:
     ) -> dict[str, Any]:
         """按照树形结构返回访问控制项集合。"""
 
-        items = access_control_crud.list_all(db)
-        if not items:
-            return create_response("获取访问控制列表成功", [], HTTP_STATUS_OK)
-
         normalized_status = self._normalize_status(enabled_status)
         name_filter = name.strip().lower() if name else None
 
-        children_map: Dict[Optional[int], List[AccessControlItem]] = defaultdict(list)
-        for item in items:
-            children_map[item.parent_id].append(item)
-
-        for siblings in children_map.values():
-            siblings.sort(key=lambda node: (node.sort_order, node.id))
+        cache_key = _tree_cache_key(name_filter, normalized_status)
+        cached = _tree_cache_get(cache_key)
+        if cached is not None:
+            return create_response("获取访问控制列表成功", cached, HTTP_STATUS_OK)
 
+        # 有过滤条件时由数据库递归 CTE 直接返回“命中节点 + 全部祖先”，Python 侧无需再做包含判定
         if name_filter or normalized_status:
-            include_map: Dict[int, bool] = {}
-            match_map: Dict[int, bool] = {}
-
-            for item in items:
-                name_match = True
-                status_match = True
-                if name_filter:
-                    name_match = name_filter in item.name.lower()
-                if normalized_status:
-                    status_match = item.enabled_status == normalized_status
-                match_map[item.id] = name_match and status_match
-
-            def should_include(node: AccessControlItem) -> bool:
-                if node.id in include_map:
-                    return include_map[node.id]
-                include_self = match_map.get(node.id, False)
-                include_children = any(should_include(child) for child in children_map.get(node.id, []))
-                include_map[node.id] = include_self or include_children
-                return include_map[node.id]
-
-            filtered_roots = [
-                node
-                for node in children_map.get(None, [])
-                if should_include(node)
-            ]
+            items = access_control_crud.list_matching_with_ancestors(
+                db, name_filter=name_filter, enabled_status=normalized_status
+            )
         else:
-            include_map = {item.id: True for item in items}
-            filtered_roots = children_map.get(None, [])
-
-        def build_node(
-            node: AccessControlItem,
-            parent_display: Optional[str],
-            parent_enabled: Optional[str],
-        ) -> Dict[str, Any]:
-            if not include_map.get(node.id, False):
-                raise AppException("节点过滤状态异常", HTTP_STATUS_BAD_REQUEST)
+            items = access_control_crud.list_all(db)
+        if not items:
+            return create_response("获取访问控制列表成功", [], HTTP_STATUS_OK)
 
+        buckets: Dict[Optional[int], List[AccessControlItem]] = {}
+        for item in items:
+            buckets.setdefault(item.parent_id, []).append(item)
+
+        # 查询已按 (sort_order, id) 排序，按序追加后各兄弟组天然有序，无需再排序；
+        # 构建完成后只读：冻结为元组
+        children_map: Dict[Optional[int], tuple[AccessControlItem, ...]] = {key: tuple(value) for key, value in buckets.items()}
+
+        # 迭代式自顶向下构建：父节点的有效状态随栈下传，子节点载荷在出栈时
+        # 追加到父节点的 children 中（逆序入栈保证兄弟顺序不变）
+        tree: List[Dict[str, Any]] = []
+        build_stack: List[tuple] = [(root, None, None, tree) for root in reversed(children_map.get(None, ()))]
+        while build_stack:
+            node, parent_display, parent_enabled, siblings_payload = build_stack.pop()
             display_status = node.display_status
             effective_display = display_status or parent_display
             if parent_display == "hidden":
@@ -108,39 +267,18 @@ class AccessControlService:
             if parent_enabled == "disabled":
                 effective_enabled = "disabled"
 
-            children_payload = [
-                build_node(child, effective_display, effective_enabled)
-                for child in children_map.get(node.id, [])
-                if include_map.get(child.id, False)
-            ]
-
-            normalized_type = self._normalize_type_value(node.type)
-
-            return {
-                "id": node.id,
-                "parent_id": node.parent_id,
-                "name": node.name,
-                "type": normalized_type,
-                "icon": node.icon,
-                "is_external": bool(node.is_external),
-                "permission_code": node.permission_code,
-                "route_path": node.route_path,
-                "display_status": display_status,
-                "enabled_status": enabled_status_value,
-                "effective_display_status": effective_display,
-                "effective_enabled_status": effective_enabled,
-                "sort_order": node.sort_order,
-                "component_path": node.component_path,
-                "route_params": node.route_params or {},
-                "keep_alive": bool(node.keep_alive),
-                "children": children_payload,
-            }
-
-        tree = [
-            build_node(root, None, None)
-            for root in filtered_roots
-            if include_map.get(root.id, False)
-        ]
+            children_payload: List[Dict[str, Any]] = []
+            node_payload = self._serialize_node_fields(node)
+            node_payload["effective_display_status"] = effective_display
+            node_payload["effective_enabled_status"] = effective_enabled
+            node_payload["children"] = children_payload
+            siblings_payload.append(node_payload)
+            build_stack.extend(
+                (child, effective_display, effective_enabled, children_payload)
+                for child in reversed(children_map.get(node.id, ()))
+            )
+
+        _tree_cache_put(cache_key, tree)
         return create_response("获取访问控制列表成功", tree, HTTP_STATUS_OK)
 
     def get_routers(self, db: Session) -> dict[str, Any]:
@@ -156,37 +294,49 @@ class AccessControlService:
         is_admin = scope.is_admin
         role_ids = scope.role_ids
 
+        cache_key = _router_cache_key()
+        cached = _tree_cache_get(cache_key)
+        if cached is not None:
+            return create_response("获取路由成功", cached, HTTP_STATUS_OK)
+
         # 全量加载一次，用于构建树与回溯父级（包含菜单与按钮）
-        all_items = access_control_crud.list_all(db)
+        # 一次性转为只读元组快照，后续构建只读列值
+        all_items = [_RouterRow.from_item(item) for item in access_control_crud.list_all(db)]
         if not all_items:
             return create_response("获取路由成功", [], HTTP_STATUS_OK)
 
-        # 计算允许的节点集合
-        by_all: Dict[int, AccessControlItem] = {item.id: item for item in all_items}
-
-        if is_admin:
-            # 管理员允许全部菜单
-            allowed_menu_ids: set[int] = {
-                item.id
-                for item in all_items
-                if self._normalize_type_value(item.type) == AccessControlTypeEnum.MENU.value
-                and self._is_enabled(item.enabled_status)
-            }
-        else:
-            # 非管理员：基于角色授权项，回溯父链，仅保留菜单节点
+        allowed_ids: set[int] = set()
+        if not is_admin:
             permitted = access_control_crud.list_permitted_by_roles(db, role_ids)
             allowed_ids = {item.id for item in permitted}
             if not allowed_ids:
                 return create_response("获取路由成功", [], HTTP_STATUS_OK)
 
-            allowed_menu_ids: set[int] = set()
+        # 类型与启用状态每个节点只归一化一次：参与路由的仅为启用的菜单节点
+        menus = [
+            item
+            for item in all_items
+            if self._normalize_type_value(item.type) == _TYPE_MENU and self._is_enabled(item.enabled_status)
+        ]
+        if not menus:
+            return create_response("获取路由成功", [], HTTP_STATUS_OK)
+        by_id: Dict[int, _RouterRow] = {item.id: item for item in menus}
+
+        # 计算允许的节点集合
+        if is_admin:
+            # 管理员允许全部菜单
+            allowed_menu_ids: set[int] = set(by_id)
+        else:
+            # 非管理员：基于角色授权项，回溯父链，仅保留菜单节点
+            by_all: Dict[int, _RouterRow] = {item.id: item for item in all_items}
+            allowed_menu_ids = set()
             for leaf_id in allowed_ids:
                 current = by_all.get(leaf_id)
                 # 可能授权的是按钮或菜单，向上回溯到根
                 visited: set[int] = set()
                 while current is not None and current.id not in visited:
                     visited.add(current.id)
-                    if self._normalize_type_value(current.type) == AccessControlTypeEnum.MENU.value and self._is_enabled(current.enabled_status):
+                    if current.id in by_id:
                         allowed_menu_ids.add(current.id)
                     parent_id = current.parent_id
                     current = by_all.get(parent_id) if parent_id is not None else None
@@ -195,57 +345,46 @@ class AccessControlService:
                 return create_response("获取路由成功", [], HTTP_STATUS_OK)
 
         # 构造 parent -> children map（仅菜单、且启用的节点参与）
-        def is_menu_enabled(node: AccessControlItem) -> bool:
-            return (
-                self._normalize_type_value(node.type) == AccessControlTypeEnum.MENU.value
-                and self._is_enabled(node.enabled_status)
-            )
-
-        menus = [item for item in all_items if is_menu_enabled(item)]
-        if not menus:
-            return create_response("获取路由成功", [], HTTP_STATUS_OK)
-
-        children_map: Dict[Optional[int], List[AccessControlItem]] = defaultdict(list)
-        by_id: Dict[int, AccessControlItem] = {item.id: item for item in menus}
+        buckets: Dict[Optional[int], List[_RouterRow]] = {}
         for item in menus:
             parent_key = item.parent_id or None
-            children_map[parent_key].append(item)
+            buckets.setdefault(parent_key, []).append(item)
 
-        for siblings in children_map.values():
-            siblings.sort(key=lambda node: (node.sort_order, node.id))
+        # 兄弟顺序沿用 list_all 的 (sort_order, id) 排序
+        children_map: Dict[Optional[int], tuple[_RouterRow, ...]] = {key: tuple(value) for key, value in buckets.items()}
 
         # 仅包含授权的菜单及其祖先（allowed_menu_ids 已包含祖先）
         include_set = allowed_menu_ids
-        roots = [node for node in children_map.get(None, []) if node.id in include_set]
+        roots = [node for node in children_map.get(None, ()) if node.id in include_set]
         if not roots:
             return create_response("获取路由成功", [], HTTP_STATUS_OK)
 
-        def serialize_with_filter(node: AccessControlItem, parent: Optional[AccessControlItem]) -> Optional[Dict[str, Any]]:
-            if node.id not in include_set:
-                return None
-            child_nodes = [child for child in children_map.get(node.id, []) if child.id in include_set]
+        # 迭代式先序构建：节点出栈时生成自身路由并追加到父级 children，
+        # 授权子节点逆序入栈以保持兄弟顺序
+        payload: List[Dict[str, Any]] = []
+        stack: List[tuple] = [(root, None, payload) for root in reversed(roots)]
+        while stack:
+            node, parent, siblings_out = stack.pop()
+            child_nodes = [child for child in children_map.get(node.id, ()) if child.id in include_set]
             route = self._serialize_router_node(node, children_map, parent)
             if child_nodes:
-                route_children = []
-                for child in child_nodes:
-                    payload_child = serialize_with_filter(child, node)
-                    if payload_child is not None:
-                        route_children.append(payload_child)
+                route_children: List[Dict[str, Any]] = []
                 route["children"] = route_children
-                if len(route_children) > 1:
+                if len(child_nodes) > 1:
                     route["alwaysShow"] = True
                 route["redirect"] = "noRedirect"
+                stack.extend((child, node, route_children) for child in reversed(child_nodes))
             else:
                 route["children"] = []
-            return route
+            siblings_out.append(route)
 
-        payload = []
-        for root in roots:
-            item = serialize_with_filter(root, None)
-            if item is not None:
-                payload.append(item)
+        _tree_cache_put(cache_key, payload)
         return create_response("获取路由成功", payload, HTTP_STATUS_OK)
 
+    def invalidate_cache(self) -> None:
+        """清空访问控制树与动态路由缓存；角色授权等外部变更后调用。"""
+        _invalidate_tree_cache()
+
     def get_detail(self, db: Session, *, item_id: int) -> dict[str, Any]:
         """返回指定访问控制项的详情。"""
 
@@ -259,6 +398,84 @@ class AccessControlService:
     def create(self, db: Session, *, payload: Dict[str, Any]) -> dict[str, Any]:
         """创建新的访问控制项。"""
 
+        values = self._build_create_values(db, payload)
+        db_obj = access_control_crud.create(db, values)
+
+        _invalidate_tree_cache()
+        data = self._serialize_item(db_obj)
+        return create_response("创建访问控制项成功", data, HTTP_STATUS_OK)
+
+    def bulk_create(self, db: Session, *, payloads: List[Dict[str, Any]]) -> dict[str, Any]:
+        """批量创建访问控制项（如初始化菜单），全部校验通过后一次写入。
+
+        已有权限字符与上级节点各一次查询预取，逐项校验只查内存集合；
+        上级必须是已存在的节点，不支持引用同批次内的新项。
+        """
+
+        known_codes = access_control_crud.list_permission_codes(db)
+        parent_ids = {payload.get("parent_id") for payload in payloads} - {None, 0, "0"}
+        parents = {item.id: item for item in access_control_crud.list_by_ids(db, parent_ids)}
+
+        rows = [
+            self._build_create_values(db, payload, known_codes=known_codes, parents=parents)
+            for payload in payloads
+        ]
+        created = access_control_crud.bulk_create(db, rows)
+
+        _invalidate_tree_cache()
+        return create_response("批量创建访问控制项成功", {"created": created}, HTTP_STATUS_OK)
+
+    def reorder(self, db: Session, *, items: List[Dict[str, Any]]) -> dict[str, Any]:
+        """批量调整节点的上级与排序（如前端拖拽），校验通过后一条 executemany UPDATE 写入。
+
+        全部节点一次查询取回，存在性、父子类型与成环校验均在内存中完成。
+        """
+
+        by_id = {item.id: item for item in access_control_crud.list_all(db)}
+        parent_of: Dict[int, Optional[int]] = {item_id: item.parent_id for item_id, item in by_id.items()}
+
+        positions: Dict[int, Dict[str, Any]] = {}
+        for entry in items:
+            item_id = entry["id"]
+            node = by_id.get(item_id)
+            if node is None:
+                raise AppException("访问控制项不存在", HTTP_STATUS_NOT_FOUND)
+            parent_id = entry.get("parent_id") or None
+            if parent_id is not None:
+                parent = by_id.get(parent_id)
+                if parent is None:
+                    raise AppException("上级访问控制项不存在", HTTP_STATUS_NOT_FOUND)
+                if self._normalize_type_value(parent.type) == _TYPE_BUTTON:
+                    raise AppException("按钮类型不允许继续添加子项", HTTP_STATUS_BAD_REQUEST)
+            elif self._normalize_type_value(node.type) != _TYPE_MENU:
+                raise AppException("根节点必须是菜单类型", HTTP_STATUS_BAD_REQUEST)
+            parent_of[item_id] = parent_id
+            positions[item_id] = {"id": item_id, "parent_id": parent_id, "sort_order": entry["sort_order"]}
+
+        # 按调整后的父子关系自下而上回溯，出现重复节点即说明移动到了自身或下级之下
+        for item_id in positions:
+            visited: set[int] = set()
+            current: Optional[int] = item_id
+            while current is not None:
+                if current in visited:
+                    raise AppException("不能将节点移动到自身或其下级节点之下", HTTP_STATUS_BAD_REQUEST)
+                visited.add(current)
+                current = parent_of.get(current)
+
+        updated = access_control_crud.bulk_update(db, list(positions.values()))
+        _invalidate_tree_cache()
+        return create_response("调整访问控制项顺序成功", {"updated": updated}, HTTP_STATUS_OK)
+
+    def _build_create_values(
+        self,
+        db: Session,
+        payload: Dict[str, Any],
+        *,
+        known_codes: Optional[set[str]] = None,
+        parents: Optional[Dict[int, AccessControlItem]] = None,
+    ) -> Dict[str, Any]:
+        """校验新建请求并返回待写入的列值；`known_codes`/`parents` 为批量场景的预取结果。"""
+
         parent = None
         parent_id = payload.get("parent_id")
         if parent_id in (0, "0"):
@@ -268,18 +485,18 @@ class AccessControlService:
         payload["type"] = node_type
 
         if parent_id is not None:
-            parent = access_control_crud.get(db, parent_id)
+            parent = parents.get(parent_id) if parents is not None else access_control_crud.get(db, parent_id)
             if parent is None:
                 raise AppException("上级访问控制项不存在", HTTP_STATUS_NOT_FOUND)
             parent_type = self._normalize_type_value(parent.type)
             if parent.type != parent_type:
                 parent.type = parent_type
-            if parent_type == AccessControlTypeEnum.BUTTON.value:
+            if parent_type == _TYPE_BUTTON:
                 raise AppException("按钮类型不允许继续添加子项", HTTP_STATUS_BAD_REQUEST)
         else:
             parent = None
 
-        if parent is None and node_type != AccessControlTypeEnum.MENU.value:
+        if parent is None and node_type != _TYPE_MENU:
             raise AppException("根节点必须是菜单类型", HTTP_STATUS_BAD_REQUEST)
 
         name_value = self._normalize_name(payload.get("name"))
@@ -288,44 +505,31 @@ class AccessControlService:
 
         permission_code = self._normalize_permission_code(payload.get("permission_code"))
 
-        if node_type == AccessControlTypeEnum.BUTTON.value and not permission_code:
+        if node_type == _TYPE_BUTTON and not permission_code:
             raise AppException("按钮必须提供权限字符", HTTP_STATUS_BAD_REQUEST)
 
         if permission_code:
-            self._ensure_unique_permission_code(db, permission_code)
+            self._ensure_unique_permission_code(db, permission_code, known_codes=known_codes)
         self._normalize_payload_by_type(node_type, payload)
 
-        if node_type == AccessControlTypeEnum.BUTTON.value:
+        if node_type == _TYPE_BUTTON:
             payload["is_external"] = False
 
-        enabled_status_value = payload.get("enabled_status")
-        display_status_value = payload.get("display_status")
-        route_path_value = payload.get("route_path")
-        component_path_value = payload.get("component_path")
-        route_params_value = payload.get("route_params")
-        keep_alive_value = bool(payload.get("keep_alive", False))
-
-        db_obj = access_control_crud.create(
-            db,
-            {
-                "parent_id": parent_id,
-                "name": name_value,
-                "type": node_type,
-                "icon": payload.get("icon"),
-                "is_external": bool(payload.get("is_external", False)),
-                "permission_code": permission_code,
-                "route_path": route_path_value,
-                "display_status": display_status_value,
-                "enabled_status": enabled_status_value,
-                "sort_order": payload.get("sort_order", 0),
-                "component_path": component_path_value,
-                "route_params": route_params_value,
-                "keep_alive": keep_alive_value,
-            },
-        )
-
-        data = self._serialize_item(db_obj)
-        return create_response("创建访问控制项成功", data, HTTP_STATUS_OK)
+        return {
+            "parent_id": parent_id,
+            "name": name_value,
+            "type": node_type,
+            "icon": payload.get("icon"),
+            "is_external": bool(payload.get("is_external", False)),
+            "permission_code": permission_code,
+            "route_path": payload.get("route_path"),
+            "display_status": payload.get("display_status"),
+            "enabled_status": payload.get("enabled_status"),
+            "sort_order": payload.get("sort_order", 0),
+            "component_path": payload.get("component_path"),
+            "route_params": payload.get("route_params"),
+            "keep_alive": bool(payload.get("keep_alive", False)),
+        }
 
     def update(self, db: Session, *, item_id: int, payload: Dict[str, Any]) -> dict[str, Any]:
         """更新现有访问控制项。"""
@@ -340,54 +544,39 @@ class AccessControlService:
 
 
         node_type = self._normalize_type_value(db_obj.type)
-        if db_obj.type != node_type:
-            db_obj.type = node_type
 
         permission_code_supplied = "permission_code" in payload
         if permission_code_supplied:
             permission_code = self._normalize_permission_code(payload.get("permission_code"))
-            if node_type == AccessControlTypeEnum.BUTTON.value and not permission_code:
+            if node_type == _TYPE_BUTTON and not permission_code:
                 raise AppException("按钮必须提供权限字符", HTTP_STATUS_BAD_REQUEST)
             if permission_code:
                 self._ensure_unique_permission_code(db, permission_code, exclude_id=db_obj.id)
         else:
             permission_code = self._normalize_permission_code(db_obj.permission_code)
-            if node_type == AccessControlTypeEnum.BUTTON.value and not permission_code:
+            if node_type == _TYPE_BUTTON and not permission_code:
                 raise AppException("按钮必须提供权限字符", HTTP_STATUS_BAD_REQUEST)
 
         self._normalize_payload_by_type(node_type, payload)
 
-        if node_type == AccessControlTypeEnum.BUTTON.value:
+        if node_type == _TYPE_BUTTON:
             payload["is_external"] = False
 
-        route_path_value = payload.get("route_path")
-        component_path_value = payload.get("component_path")
-        route_params_value = payload.get("route_params")
-        keep_alive_value = bool(payload.get("keep_alive", db_obj.keep_alive))
-
-        db_obj.name = name_value
-        if "icon" in payload:
-            db_obj.icon = payload["icon"]
-        if "is_external" in payload:
-            db_obj.is_external = bool(payload["is_external"])
+        # 仅回写请求中出现的字段；名称与 keep_alive 总是回写
+        updates = {key: payload[key] for key in _UPDATE_FIELDS if key in payload}
+        if "is_external" in updates:
+            updates["is_external"] = bool(updates["is_external"])
         if permission_code_supplied:
-            db_obj.permission_code = permission_code
-        if "route_path" in payload:
-            db_obj.route_path = route_path_value
-        if "display_status" in payload:
-            db_obj.display_status = payload["display_status"]
-        if "enabled_status" in payload:
-            db_obj.enabled_status = payload["enabled_status"]
-        if "sort_order" in payload:
-            db_obj.sort_order = payload["sort_order"]
-        if "component_path" in payload:
-            db_obj.component_path = component_path_value
-        if "route_params" in payload:
-            db_obj.route_params = route_params_value
-        db_obj.keep_alive = keep_alive_value
-
-        access_control_crud.save(db, db_obj)
-        data = self._serialize_item(db_obj)
+            updates["permission_code"] = permission_code
+        updates["name"] = name_value
+        updates["keep_alive"] = bool(payload.get("keep_alive", db_obj.keep_alive))
+        if db_obj.type != node_type:
+            updates["type"] = node_type
+
+        # 单条 UPDATE ... RETURNING 写回并取回最新列值，省去 save 后的 refresh 查询
+        row = access_control_crud.update_fields(db, db_obj.id, updates)
+        _invalidate_tree_cache()
+        data = self._serialize_item(row)
         return create_response("更新访问控制项成功", data, HTTP_STATUS_OK)
 
     def delete(self, db: Session, *, item_id: int) -> dict[str, Any]:
@@ -401,6 +590,7 @@ class AccessControlService:
             raise AppException("该项包含子项，无法删除", HTTP_STATUS_BAD_REQUEST)
 
         access_control_crud.soft_delete(db, db_obj)
+        _invalidate_tree_cache()
         return create_response("删除访问控制项成功", None, HTTP_STATUS_OK)
 
     def _ensure_unique_permission_code(
@@ -409,9 +599,16 @@ class AccessControlService:
         permission_code: Optional[str],
         *,
         exclude_id: Optional[int] = None,
+        known_codes: Optional[set[str]] = None,
     ) -> None:
         if permission_code is None:
             return
+        if known_codes is not None:
+            # 批量场景：对预取的已有权限字符集合做内存判重，并记录本批次已占用的取值
+            if permission_code in known_codes:
+                raise AppException("权限字符已存在", HTTP_STATUS_CONFLICT)
+            known_codes.add(permission_code)
+            return
         existing = access_control_crud.get_by_permission_code(
             db,
             permission_code,
@@ -421,7 +618,7 @@ class AccessControlService:
             raise AppException("权限字符已存在", HTTP_STATUS_CONFLICT)
 
     def _normalize_payload_by_type(self, node_type: str, payload: Dict[str, Any]) -> None:
-        if node_type == AccessControlTypeEnum.MENU.value:
+        if node_type == _TYPE_MENU:
             payload["display_status"] = self._normalize_display_status(payload.get("display_status"))
             payload["enabled_status"] = self._normalize_enabled_status_value(payload.get("enabled_status"))
             payload["route_path"] = self._normalize_route_path(payload.get("route_path"))
@@ -453,38 +650,23 @@ class AccessControlService:
 
     def _normalize_type_value(self, node_type: Optional[Any]) -> str:
         if isinstance(node_type, AccessControlTypeEnum):
-            value = node_type.value
-        elif node_type is None:
-            value = AccessControlTypeEnum.MENU.value
-        else:
-            value = str(node_type)
-
-        normalized = value.strip().lower()
-        normalized = self._TYPE_FALLBACK_MAP.get(normalized, normalized)
-        if normalized not in {
-            AccessControlTypeEnum.MENU.value,
-            AccessControlTypeEnum.BUTTON.value,
-        }:
-            raise AppException("访问控制项类型无效", HTTP_STATUS_BAD_REQUEST)
-        return normalized
+            return node_type.value
+        if node_type is None:
+            return _TYPE_MENU
+        return _parse_node_type(str(node_type))
 
     def _normalize_status(self, enabled_status: Optional[str]) -> Optional[str]:
         if enabled_status is None:
             return None
-        normalized = enabled_status.strip()
-        if not normalized:
-            return None
-        mapped = self._STATUS_VALUE_MAP.get(normalized)
-        value = (mapped or normalized).lower()
-        if value == "all":
-            return None
-        if value not in {"enabled", "disabled"}:
-            return None
-        return value
+        return _parse_status_filter(enabled_status)
 
     def _is_enabled(self, enabled_status: Optional[str]) -> bool:
         """Return True when the stored enabled flag should allow routing."""
 
+        flag = _ENABLED_ROUTE_FLAGS.get(enabled_status)
+        if flag is not None:
+            return flag
+
         normalized = self._normalize_status(enabled_status)
         if normalized is not None:
             return normalized == "enabled"
@@ -499,24 +681,12 @@ class AccessControlService:
     def _normalize_enabled_status_value(self, enabled_status: Optional[str]) -> str:
         if enabled_status is None:
             raise AppException("停用状态必填", HTTP_STATUS_BAD_REQUEST)
-        normalized = enabled_status.strip()
-        if not normalized:
-            raise AppException("停用状态必填", HTTP_STATUS_BAD_REQUEST)
-        mapped = self._STATUS_VALUE_MAP.get(normalized, normalized).lower()
-        if mapped not in {"enabled", "disabled"}:
-            raise AppException("停用状态取值无效", HTTP_STATUS_BAD_REQUEST)
-        return mapped
+        return _parse_enabled_status(enabled_status)
 
     def _normalize_display_status(self, display_status: Optional[str]) -> str:
         if display_status is None:
             raise AppException("显示状态必填", HTTP_STATUS_BAD_REQUEST)
-        normalized = display_status.strip()
-        if not normalized:
-            raise AppException("显示状态必填", HTTP_STATUS_BAD_REQUEST)
-        mapped = self._DISPLAY_STATUS_VALUE_MAP.get(normalized, normalized).lower()
-        if mapped not in {"show", "hidden"}:
-            raise AppException("显示状态取值无效", HTTP_STATUS_BAD_REQUEST)
-        return mapped
+        return _parse_display_status(display_status)
 
     def _normalize_name(self, name: Optional[str]) -> Optional[str]:
         if name is None:
@@ -536,116 +706,92 @@ class AccessControlService:
         return normalized or None
 
     def _serialize_item(self, item: AccessControlItem) -> Dict[str, Any]:
+        data = self._serialize_node_fields(item)
+        data["create_time"] = item.create_time
+        data["update_time"] = item.update_time
+        return data
+
+    def _serialize_node_fields(self, item: AccessControlItem) -> Dict[str, Any]:
+        """详情与树节点共用的基础字段。
+
+        is_external / keep_alive 映射为 `Mapped[bool]`（NOT NULL 的 Boolean 列），读出即为 bool，无需再转换。
+        """
         return {
             "id": item.id,
             "parent_id": item.parent_id,
             "name": item.name,
             "type": self._normalize_type_value(item.type),
             "icon": item.icon,
-            "is_external": bool(item.is_external),
+            "is_external": item.is_external,
             "permission_code": item.permission_code,
             "route_path": item.route_path,
             "display_status": item.display_status,
             "enabled_status": item.enabled_status,
             "sort_order": item.sort_order,
             "component_path": item.component_path,
-            "route_params": item.route_params or {},
-            "keep_alive": bool(item.keep_alive),
-            "create_time": item.create_time,
-            "update_time": item.update_time,
+            "route_params": item.route_params or _EMPTY_ROUTE_PARAMS,
+            "keep_alive": item.keep_alive,
         }
 
     def _serialize_router_node(
         self,
-        node: AccessControlItem,
-        children_map: Dict[Optional[int], List[AccessControlItem]],
-        parent: Optional[AccessControlItem],
+        node: _RouterRow,
+        children_map: Dict[Optional[int], tuple[_RouterRow, ...]],
+        parent: Optional[_RouterRow],
     ) -> Dict[str, Any]:
-        child_nodes = children_map.get(node.id, [])
+        """生成单个节点的路由（不递归）；children 由调用方按授权范围填充。
+
+        component / alwaysShow / redirect 按该节点在菜单树中的全部子节点判定。
+        """
+        # 名称、路径、组件、meta 等规则直接内联：每个路由节点只做一次方法调用
+        node_id = node.id
+        component_path = node.component_path
+        route_path = node.route_path
+        is_external = node.is_external
+        child_nodes = children_map.get(node_id, ())
+
+        # 路由名：依次取组件路径、路由地址、名称中第一个能生成驼峰片段的值，拼接主键保证唯一
+        slug = _slugify(component_path or "") or _slugify(route_path or "") or _slugify(node.name or "")
+
+        # 路由路径：外链原样返回；根节点补齐前导斜杠；子节点为相对路径；为空时以主键兜底
+        raw_path = (route_path or "").strip()
+        if is_external and raw_path:
+            path = raw_path
+        elif parent is None:
+            path = raw_path if raw_path.startswith("/") else f"/{raw_path or node_id}"
+        else:
+            path = raw_path.lstrip("/") if raw_path else str(node_id)
+
         route: Dict[str, Any] = {
-            "name": self._resolve_route_name(node),
-            "path": self._resolve_route_path(node, parent),
-            "hidden": self._is_hidden(node),
-            "component": self._resolve_component(node, parent, child_nodes),
-            "meta": self._build_meta(node),
+            "name": f"{slug}{node_id}" if slug else str(node_id),
+            "path": path,
+            "hidden": (node.display_status or "show").strip().lower() == "hidden",
         }
 
-        if child_nodes:
-            route["children"] = [
-                self._serialize_router_node(child, children_map, node) for child in child_nodes
-            ]
-            if len(route["children"]) > 1:
-                route["alwaysShow"] = True
-            route["redirect"] = "noRedirect"
-        else:
-            route["children"] = []
-
-        # 移除值为 None 的键，避免响应出现 null 字段
-        cleaned = {key: value for key, value in route.items() if value is not None}
-        return cleaned
-
-    def _resolve_route_name(self, node: AccessControlItem) -> str:
-        for candidate in self._candidate_name_fields(node):
-            slug = self._slugify(candidate)
-            if slug:
-                return f"{slug}{node.id}"
-        return str(node.id)
-
-    def _candidate_name_fields(self, node: AccessControlItem) -> Iterable[str]:
-        yield node.component_path or ""
-        yield node.route_path or ""
-        yield node.name or ""
-
-    def _slugify(self, value: str) -> str:
-        if not value:
-            return ""
-        tokens = [segment for segment in re.split(r"[^0-9A-Za-z]+", value) if segment]
-        return "".join(token.capitalize() for token in tokens)
-
-    def _resolve_route_path(self, node: AccessControlItem, parent: Optional[AccessControlItem]) -> str:
-        raw_path = (node.route_path or "").strip()
-        if node.is_external and raw_path:
-            return raw_path
-
-        if parent is None:
-            if not raw_path:
-                return f"/{node.id}"
-            if raw_path.startswith("/"):
-                return raw_path
-            return f"/{raw_path}"
-
-        if not raw_path:
-            return str(node.id)
-        return raw_path.lstrip("/")
-
-    def _resolve_component(
-        self,
-        node: AccessControlItem,
-        parent: Optional[AccessControlItem],
-        children: list[AccessControlItem],
-    ) -> Optional[str]:
-        component = (node.component_path or "").strip() or None
+        # 组件：显式配置优先；非外链的根节点用 Layout，带子节点的中间节点用 ParentView；
+        # 其余情况不写入该键，避免响应出现 null 字段
+        component = (component_path or "").strip()
+        if not component and not is_external:
+            if parent is None:
+                component = "Layout"
+            elif child_nodes:
+                component = "ParentView"
         if component:
-            return component
-        if node.is_external:
-            return None
-        if parent is None:
-            return "Layout"
-        if children:
-            return "ParentView"
-        return None
+            route["component"] = component
 
-    def _build_meta(self, node: AccessControlItem) -> Dict[str, Any]:
-        return {
+        route["meta"] = {
             "title": node.name,
             "icon": node.icon,
-            "noCache": not bool(node.keep_alive),
-            "link": node.route_path if node.is_external else None,
+            "noCache": not node.keep_alive,
+            "link": route_path if is_external else None,
         }
+        route["children"] = []
 
-    def _is_hidden(self, node: AccessControlItem) -> bool:
-        display = (node.display_status or "show").strip().lower()
-        return display == "hidden"
+        if child_nodes:
+            if len(child_nodes) > 1:
+                route["alwaysShow"] = True
+            route["redirect"] = "noRedirect"
+        return route
 
 
 access_control_service = AccessControlService()
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from collections import defaultdict
+from operator import attrgetter
 from typing import Any, Dict, List, Optional
 
 from sqlalchemy.orm import Session
@@ -12,6 +13,9 @@ from app.packages.system.core.responses import create_response
 from app.packages.system.crud.organizations import organization_crud
 from app.packages.system.models.organization import Organization
 
+# 同级排序键（C 实现，避免每个节点一次 lambda 调用）
+_SIBLING_SORT_KEY = attrgetter("sort_order", "id")
+
 
 class OrganizationService:
     """封装组织的树形查询。"""
@@ -30,7 +34,7 @@ class OrganizationService:
 
         # 同级排序：sort_order -> id
         for siblings in children_map.values():
-            siblings.sort(key=lambda n: (n.sort_order, n.id))
+            siblings.sort(key=_SIBLING_SORT_KEY)
 
         def build(node: Organization) -> Dict[str, Any]:
             return {
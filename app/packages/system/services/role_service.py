@@ -28,6 +28,7 @@ from app.packages.system.crud.users import user_crud
 from app.packages.system.crud.organizations import organization_crud
 from app.packages.system.crud.roles import role_crud
 from app.packages.system.models.role import Role
+from app.packages.system.services.access_control_service import access_control_service
 from app.core.datascope import get_scope
 from app.packages.system.core.constants import DEFAULT_ORGANIZATION_NAME
 from app.packages.system.models.organization import Organization
@@ -164,6 +165,8 @@ class RoleService:
         db.add(role)
         db.commit()
         db.refresh(role)
+        # 角色授权变化会影响动态路由结果
+        access_control_service.invalidate_cache()
 
         data = self._serialize_role_detail(role)
         return create_response("更新角色成功", data, HTTP_STATUS_OK)
@@ -54,6 +54,21 @@ class StorageBackend:
     ) -> dict:
         raise NotImplementedError
 
+    def list_flat(self, *, path: str) -> dict:
+        """以并行数组（SoA）返回目录内容：names/types/sizes/mimes，供同步等批量扫描使用。
+
+        默认基于 `list` 转换；后端可覆盖以跳过排序与时间格式化等展示用开销。
+        """
+        data = self.list(path=path)
+        items = data.get("items", []) or []
+        return {
+            "current_path": data.get("current_path"),
+            "names": [it.get("name") for it in items],
+            "types": [it.get("type") for it in items],
+            "sizes": [int(it.get("size") or 0) for it in items],
+            "mimes": [it.get("mime_type") for it in items],
+        }
+
     def upload(self, *, path: str, files: List[Tuple[str, bytes]]) -> list[dict]:
         raise NotImplementedError
 
@@ -178,6 +193,38 @@ class LocalBackend(StorageBackend):
             current_path += "/"
         return {"current_path": current_path, "items": items}
 
+    def list_flat(self, *, path: str) -> dict:
+        base = self._resolve(path or "")
+        if not base.exists():
+            raise AppException("路径不存在", HTTP_STATUS_NOT_FOUND)
+        if not base.is_dir():
+            raise AppException("目标不是文件夹", HTTP_STATUS_BAD_REQUEST)
+
+        names: list[str] = []
+        types: list[str] = []
+        sizes: list[int] = []
+        mimes: list[Optional[str]] = []
+        try:
+            # scandir 复用目录项缓存的类型信息；不排序、不格式化时间，仅保留同步所需字段
+            with os.scandir(base) as entries:
+                for entry in entries:
+                    names.append(entry.name)
+                    if entry.is_dir():
+                        types.append("directory")
+                        sizes.append(0)
+                        mimes.append(None)
+                    else:
+                        types.append("file")
+                        sizes.append(int(entry.stat().st_size))
+                        mimes.append(_norm_mime(entry.name))
+        except PermissionError as exc:
+            raise AppException("无法读取目录内容：权限不足", status.HTTP_500_INTERNAL_SERVER_ERROR) from exc
+
+        current_path = "/" + (str(base.relative_to(self.root)) if base != self.root else "")
+        if not current_path.endswith("/"):
+            current_path += "/"
+        return {"current_path": current_path, "names": names, "types": types, "sizes": sizes, "mimes": mimes}
+
     def upload(self, *, path: str, files: List[Tuple[str, bytes]]) -> list[dict]:
         target_dir = self._resolve(path or "")
         # 若目标目录不存在则自动创建（保持与 S3 前缀语义一致，提升易用性）
@@ -19,6 +19,7 @@ from app.packages.system.core.timezone import format_datetime
 from app.packages.system.crud.storage_config import storage_config_crud
 from app.packages.system.models.storage import StorageConfig
 from app.packages.system.services.storage_backends import build_backend
+from app.packages.system.services.thumbnail_service import thumbnail_service
 
 
 class StorageService:
@@ -65,6 +66,7 @@ class StorageService:
         for k, v in merged.items():
             setattr(config, k, v)
         saved = storage_config_crud.save(db, config)
+        thumbnail_service.invalidate(id)
         return create_response("更新存储源成功", self._serialize_config(saved, include_status=True), HTTP_STATUS_OK)
 
     def delete_config(self, db: Session, *, id: int) -> Dict[str, Any]:
@@ -72,6 +74,7 @@ class StorageService:
         if config is None:
             raise AppException("存储源不存在或已删除", HTTP_STATUS_NOT_FOUND)
         storage_config_crud.soft_delete(db, config)
+        thumbnail_service.invalidate(id)
         return create_response("删除存储源成功", None, HTTP_STATUS_OK)
 
     def get_config(self, db: Session, *, id: int) -> Dict[str, Any]:
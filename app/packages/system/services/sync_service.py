@@ -1,13 +1,26 @@
 """文件同步服务：扫描存储并将元数据写入数据库。
 
 独立函数形式，避免实例方法绑定导致的 AttributeError 问题。
+
+连接池要求：一次同步可能连续发出成百上千条短语句，`db` 绑定的引擎应使用常驻连接池
+（默认 pool_size=20、max_overflow=40、pool_pre_ping=True、pool_recycle=1800，
+见 `DATABASE_POOL_*` 配置）。若检测到 NullPool，每条语句都会重新建连，同步入口会告警。
+
+索引要求：子树操作以 `path LIKE '<dir>/%'` / `directory LIKE '<dir>/%'` 过滤，PostgreSQL 上依赖
+`idx_fs_nodes_storage_path_prefix` 与 `idx_file_records_storage_dir_prefix`（text_pattern_ops，
+见 scripts/db/init/v1/schema/001_schema.sql），否则在非 C 排序规则下会退化为全表扫描。
 """
 
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy import Column, MetaData, String, Table, case, delete, exists, func, insert, literal, or_, select, tuple_, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.pool import NullPool
 from contextlib import contextmanager, nullcontext
 
 from app.packages.system.core.constants import HTTP_STATUS_OK, HTTP_STATUS_NOT_FOUND, HTTP_STATUS_BAD_REQUEST
@@ -19,6 +32,114 @@ from app.packages.system.utils.path_utils import norm_abs_path, norm_dir_key
 from app.packages.system.core.logger import logger
 
 
+# NOT IN 绑定参数上限：超过后改走临时表，避免触及 SQLite(999)/PG(65535) 的参数数量限制
+_NOTIN_INLINE_LIMIT = 500
+_NOTIN_INSERT_CHUNK = 500
+_BULK_UPDATE_CHUNK = 1000
+_STREAM_CHUNK = 1000
+
+_tmp_metadata = MetaData()
+_tmp_visited = Table(
+    "tmp_sync_visited",
+    _tmp_metadata,
+    Column("kind", String(16), nullable=False),
+    Column("p", String(1024), nullable=False),
+    prefixes=["TEMPORARY"],
+)
+
+
+def _notin_source(db: Session, values: set[str], *, kind: str):
+    """返回 `NOT IN` 的右值：集合较小时直接内联，较大时写入临时表并返回子查询。
+
+    临时表按连接存在，`kind` 用于区分同一事务内的多组集合；调用方负责在用后执行
+    `_clear_visited_tmp` 清理数据。
+    """
+    if len(values) <= _NOTIN_INLINE_LIMIT:
+        return values
+    db.execute(CreateTable(_tmp_visited, if_not_exists=True))
+    db.execute(delete(_tmp_visited).where(_tmp_visited.c.kind == kind))
+    for chunk in _chunks(list(values), _NOTIN_INSERT_CHUNK):
+        db.execute(insert(_tmp_visited), [{"kind": kind, "p": v} for v in chunk])
+    return select(_tmp_visited.c.p).where(_tmp_visited.c.kind == kind)
+
+
+def _chunks(seq: list, size: int):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def _clear_visited_tmp(db: Session) -> None:
+    db.execute(delete(_tmp_visited))
+
+
+@lru_cache(maxsize=32)
+def _build_backend_cached(
+    type: str,
+    region: Optional[str],
+    bucket_name: Optional[str],
+    path_prefix: Optional[str],
+    local_root_path: Optional[str],
+    access_key_id: Optional[str],
+    secret_access_key: Optional[str],
+    endpoint_url: Optional[str],
+    custom_domain: Optional[str],
+    use_https: Optional[bool],
+    acl_type: Optional[str],
+):
+    return build_backend(
+        type=type,
+        region=region,
+        bucket_name=bucket_name,
+        path_prefix=path_prefix,
+        local_root_path=local_root_path,
+        access_key_id=access_key_id,
+        secret_access_key=secret_access_key,
+        endpoint_url=endpoint_url,
+        custom_domain=custom_domain,
+        use_https=use_https,
+        acl_type=acl_type,
+    )
+
+
+def _backend_for_config(cfg):
+    """按存储配置复用后端实例（S3 客户端/连接池）。
+
+    缓存键即全部连接参数：配置一旦修改，键随之变化并构建新实例，无需显式失效。
+    """
+    return _build_backend_cached(
+        cfg.type,
+        cfg.region,
+        cfg.bucket_name,
+        cfg.path_prefix,
+        cfg.local_root_path,
+        cfg.access_key_id,
+        cfg.secret_access_key,
+        getattr(cfg, "endpoint_url", None),
+        getattr(cfg, "custom_domain", None),
+        getattr(cfg, "use_https", True),
+        getattr(cfg, "acl_type", "private"),
+    )
+
+
+def _get_backend(db: Session, storage_id: int):
+    cfg = storage_config_crud.get(db, storage_id)
+    if cfg is None:
+        raise AppException("存储源不存在或已删除", HTTP_STATUS_NOT_FOUND)
+    return _backend_for_config(cfg)
+
+
+def _log_pool_status(db: Session) -> None:
+    """记录当前连接池状态，便于发现连接池配置回退（如误用 NullPool）。"""
+    try:
+        pool = db.get_bind().pool
+    except Exception:
+        return
+    if isinstance(pool, NullPool):
+        logger.warning("sync: engine uses NullPool; every statement opens a new connection, check DATABASE_POOL_* settings")
+        return
+    logger.debug("sync: pool status %s", pool.status())
+
+
 def sync_records(db: Session, *, storage_id: int, path: Optional[str] = "/"):
     """扫描指定存储与路径下的文件，并将元数据同步到表 `file_records` 与统一表 `fs_nodes`（目录与文件）。
 
@@ -28,23 +149,13 @@ def sync_records(db: Session, *, storage_id: int, path: Optional[str] = "/"):
     - 防御：跳过超长路径（>1024）与超长文件名（>255）的条目；对异常容错并继续。
     """
 
+    _log_pool_status(db)
+
     cfg = storage_config_crud.get(db, storage_id)
     if cfg is None:
         raise AppException("存储源不存在或已删除", HTTP_STATUS_NOT_FOUND)
 
-    backend = build_backend(
-        type=cfg.type,
-        region=cfg.region,
-        bucket_name=cfg.bucket_name,
-        path_prefix=cfg.path_prefix,
-        local_root_path=cfg.local_root_path,
-        access_key_id=cfg.access_key_id,
-        secret_access_key=cfg.secret_access_key,
-        endpoint_url=getattr(cfg, "endpoint_url", None),
-        custom_domain=getattr(cfg, "custom_domain", None),
-        use_https=getattr(cfg, "use_https", True),
-        acl_type=getattr(cfg, "acl_type", "private"),
-    )
+    backend = _backend_for_config(cfg)
 
     from app.packages.system.models.file_record import FileRecord
     from app.packages.system.crud.file_record import file_record_crud
@@ -65,23 +176,29 @@ def sync_records(db: Session, *, storage_id: int, path: Optional[str] = "/"):
     visited: set[str] = set()         # 防止递归重复
     visited_dirs: set[str] = set()    # 记录扫描到的目录 path（无尾部/）
     visited_files: set[str] = set()   # 记录扫描到的文件 full path（无尾部/）
+    file_updates: list[dict] = []     # 待批量更新的 file_records（id/size/mime）
+    node_updates: list[dict] = []     # 待批量更新的 fs_nodes（id/size/mime）
+
+    root_ok = False                   # 同步根目录是否成功列出
 
     def _walk(cur_path: str) -> None:
-        nonlocal scanned, inserted, updated, skipped
+        nonlocal scanned, inserted, updated, skipped, root_ok
         safe_cur = cur_path if cur_path.endswith("/") else (cur_path + "/")
         if safe_cur in visited:
             return
+        is_root = not visited
         visited.add(safe_cur)
 
         try:
-            data = backend.list(path=cur_path, file_type=None, search=None)
+            flat = backend.list_flat(path=cur_path)
         except Exception:
             return
-        cur_display = data.get("current_path") or (cur_path if cur_path.endswith("/") else (cur_path + "/"))
+        if is_root:
+            root_ok = True
+        cur_display = flat.get("current_path") or (cur_path if cur_path.endswith("/") else (cur_path + "/"))
         _, dir_key = _norm_dir(cur_display)
-        for it in data.get("items", []):
-            if it.get("type") == "directory":
-                name = it.get("name")
+        for name, typ, size, mime in zip(flat["names"], flat["types"], flat["sizes"], flat["mimes"]):
+            if typ == "directory":
                 if name in {".thumbnails", "thumbnails"}:
                     continue
                 dir_path = f"{cur_display}{name}".rstrip("/")
@@ -97,11 +214,8 @@ def sync_records(db: Session, *, storage_id: int, path: Optional[str] = "/"):
                     except Exception:
                         skipped += 1
                 _walk(f"{cur_display}{name}")
-            elif it.get("type") == "file":
+            elif typ == "file":
                 scanned += 1
-                name = it.get("name")
-                size = int(it.get("size") or 0)
-                mime = it.get("mime_type")
                 full_path = (f"{dir_key}/{name}" if dir_key else f"/{name}").rstrip("/")
                 visited_files.add(full_path)
                 if len(f"{dir_key}/{name}") > 1024 or len(name or "") > 255:
@@ -135,24 +249,17 @@ def sync_records(db: Session, *, storage_id: int, path: Optional[str] = "/"):
                         if fs_node_crud.get_by_path(db, storage_id=storage_id, path=full_path) is None:
                             fs_node_crud.create(db, {"storage_id": storage_id, "path": full_path, "name": name, "is_dir": False, "size_bytes": size, "mime_type": mime})
                     else:
-                        changed = False
-                        if int(existing.size_bytes or 0) != size:
-                            existing.size_bytes = size
-                            changed = True
-                        if (existing.mime_type or None) != (mime or None):
-                            existing.mime_type = mime
-                            changed = True
-                        if changed:
-                            file_record_crud.save(db, existing)
+                        # 仅记录变更，递归结束后按主键批量更新，避免逐行 save/commit
+                        if int(existing.size_bytes or 0) != size or (existing.mime_type or None) != (mime or None):
+                            file_updates.append({"id": existing.id, "size_bytes": size, "mime_type": mime})
                             updated += 1
                         # fs_nodes 更新（若存在）
                         try:
-                            full_path = (f"{dir_key}/{name}" if dir_key else f"/{name}").rstrip("/")
                             node = fs_node_crud.get_by_path(db, storage_id=storage_id, path=full_path)
-                            if node is not None:
-                                node.size_bytes = size
-                                node.mime_type = mime
-                                fs_node_crud.save(db, node)
+                            if node is not None and (
+                                int(node.size_bytes or 0) != size or (node.mime_type or None) != (mime or None)
+                            ):
+                                node_updates.append({"id": node.id, "size_bytes": size, "mime_type": mime})
                         except Exception:
                             pass
                 except Exception:
@@ -161,21 +268,35 @@ def sync_records(db: Session, *, storage_id: int, path: Optional[str] = "/"):
     cur_display, base_dir_key = _norm_dir(path or "/")
     _walk(cur_display)
 
+    if file_updates or node_updates:
+        from app.packages.system.models.fs_node import FsNode
+
+        # 每个分块各用一个保存点：失败只回滚该分块（PostgreSQL 上失败语句会中止整个事务，
+        # 不回滚到保存点后续分块与提交都会失败），统计只扣除实际失败的文件记录
+        for chunk in _chunks(file_updates, _BULK_UPDATE_CHUNK):
+            try:
+                with db.begin_nested():
+                    db.bulk_update_mappings(FileRecord, chunk)
+            except SQLAlchemyError as exc:
+                logger.warning("sync: bulk update of %s file_records failed: %s", len(chunk), exc)
+                skipped += len(chunk)
+                updated -= len(chunk)
+        for chunk in _chunks(node_updates, _BULK_UPDATE_CHUNK):
+            try:
+                with db.begin_nested():
+                    db.bulk_update_mappings(FsNode, chunk)
+            except SQLAlchemyError as exc:
+                logger.warning("sync: bulk update of %s fs_nodes failed: %s", len(chunk), exc)
+        db.commit()
+
     # 确保当前同步根目录不会在清理阶段被误判为“缺失”而软删。
     # 现有逻辑在递归中仅把“子目录”加入 visited_dirs，若对某个子目录执行同步，
     # 其自身（如 /foo）不会被加入 visited_dirs，导致清理阶段 (FsNode.path == '/foo') 命中而被软删，
-    # 从父级目录回看便会“消失”。这里在 list 成功时把根目录也加入 visited_dirs 以避免误删。
-    try:
-        # 若目录真实存在，后续清理应当保留它
-        base_prefix_for_dir = cur_display.rstrip("/")  # '/foo/' -> '/foo'
-        if base_prefix_for_dir:
-            # 仅在后端能列出该目录时，才认定其存在并加入 visited_dirs
-            # 注意：_walk 已经尝试过 list，这里再做一次轻量校验以避免边界情况下的误判
-            backend.list(path=cur_display)
-            visited_dirs.add(base_prefix_for_dir)
-    except Exception:
-        # 目录不存在/不可访问时，不加入，交由清理逻辑软删
-        pass
+    # 从父级目录回看便会“消失”。这里在根目录 list 成功时把它也加入 visited_dirs 以避免误删；
+    # 目录不存在/不可访问时不加入，交由清理逻辑软删。
+    base_prefix_for_dir = cur_display.rstrip("/")  # '/foo/' -> '/foo'
+    if base_prefix_for_dir and root_ok:
+        visited_dirs.add(base_prefix_for_dir)
 
     # 清理：将 DB 中“扫描范围内但未被发现”的节点软删（仅在 LOCAL 存储启用，避免 S3 分页不完整导致的误删）
     try:
@@ -188,32 +309,56 @@ def sync_records(db: Session, *, storage_id: int, path: Optional[str] = "/"):
         if should_prune:
             # 规范 prefix：用于匹配子树
             base_prefix = cur_display.rstrip("/")
-            # fs_nodes：目录与文件
+            # fs_nodes：目录与文件。直接以 Core UPDATE 软删，避免逐行构造 ORM 对象；
+            # 条件复用 crud.query 的 where 子句，以保留软删与数据域过滤。
             qn = fs_node_crud.query(db).filter(FsNode.storage_id == storage_id)
             if base_prefix:
                 qn = qn.filter((FsNode.path == base_prefix) | (FsNode.path.like(base_prefix + "/%")))
             else:
                 qn = qn.filter(FsNode.path.like("/%"))
-            for n in qn.all():
-                if n.is_dir:
-                    if n.path not in visited_dirs:
-                        fs_node_crud.soft_delete(db, n)
-                else:
-                    if n.path not in visited_files:
-                        fs_node_crud.soft_delete(db, n)
-
-            # file_records：仅文件
+            dirs_src = _notin_source(db, visited_dirs, kind="dirs")
+            files_src = _notin_source(db, visited_files, kind="files")
+            pruned_dirs = db.execute(
+                update(FsNode)
+                .where(qn.whereclause, FsNode.is_dir.is_(True), FsNode.path.notin_(dirs_src))
+                .values(is_deleted=True)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            pruned_nodes = db.execute(
+                update(FsNode)
+                .where(qn.whereclause, FsNode.is_dir.is_(False), FsNode.path.notin_(files_src))
+                .values(is_deleted=True)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+
+            # file_records：仅文件；完整路径在 SQL 侧拼接（根目录 directory 为 ''）
             qf = file_record_crud.query(db).filter(FileRecord.storage_id == storage_id)
             if base_dir_key != "":
                 qf = qf.filter((FileRecord.directory == base_dir_key) | (FileRecord.directory.like(base_dir_key + "/%")))
             # 否则 base_dir_key == '' -> 全部
-            for fr in qf.all():
-                full_path = (f"/{fr.alias_name}" if (fr.directory or "") == "" else f"{fr.directory}/{fr.alias_name}")
-                if full_path not in visited_files:
-                    file_record_crud.soft_delete(db, fr)
+            fr_full_path = case(
+                (func.coalesce(FileRecord.directory, "") == "", "/" + FileRecord.alias_name),
+                else_=FileRecord.directory + "/" + FileRecord.alias_name,
+            )
+            pruned_files = db.execute(
+                update(FileRecord)
+                .where(qf.whereclause, fr_full_path.notin_(files_src))
+                .values(is_deleted=True)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if len(visited_dirs) > _NOTIN_INLINE_LIMIT or len(visited_files) > _NOTIN_INLINE_LIMIT:
+                _clear_visited_tmp(db)
+            db.commit()
+            logger.debug(
+                "sync: pruned storage_id=%s dirs=%s nodes=%s files=%s",
+                storage_id, pruned_dirs, pruned_nodes, pruned_files,
+            )
     except Exception:
         # 防御：清理异常不阻断主流程
-        pass
+        try:
+            db.rollback()
+        except Exception:
+            pass
 
     return create_response(
         "同步完成",
@@ -228,11 +373,9 @@ def sync_delete_records(db: Session, *, storage_id: int, paths: list[str]) -> di
     说明：
     - 与 FileService._sync_delete_in_db 等效，但以顶层函数形式提供，避免实例方法差异导致的调用失败；
     - 使用硬删（失败兜底软删），确保列表立刻反映变更；
-    - 直接使用 db.query(...)，不受数据域过滤影响。
+    - 所有路径归并后以集合 DELETE 语句执行，不受数据域过滤影响。
     """
-    from app.packages.system.crud.file_record import file_record_crud
     from app.packages.system.models.file_record import FileRecord
-    from app.packages.system.crud.fs_node import fs_node_crud
     from app.packages.system.models.fs_node import FsNode
 
     try:
@@ -282,77 +425,53 @@ def sync_delete_records(db: Session, *, storage_id: int, paths: list[str]) -> di
             with db.begin():
                 yield
 
+    # 先把所有路径归并为集合，再以少量集合语句完成删除，避免每个路径 4 条查询
+    exact_file_keys: set[tuple[str, str]] = set()
+    node_paths: set[str] = set()
+    prefix_roots: set[str] = set()
+    for raw in (paths or []):
+        parent, name, p_norm = _split_path(_norm(raw))
+        exact_file_keys.add((_norm_dir_key(parent), name))
+        node_paths.add(p_norm)
+        if p_norm and p_norm != "/":
+            prefix_roots.add(p_norm)
+
+    def _file_conds():
+        for chunk in _chunks(sorted(exact_file_keys), _NOTIN_INSERT_CHUNK // 2):
+            yield tuple_(FileRecord.directory, FileRecord.alias_name).in_(chunk)
+        for chunk in _chunks(sorted(prefix_roots), _NOTIN_INSERT_CHUNK // 2):
+            yield or_(FileRecord.directory.in_(chunk), *[FileRecord.directory.like(r + "/%") for r in chunk])
+
+    def _node_conds():
+        for chunk in _chunks(sorted(node_paths), _NOTIN_INSERT_CHUNK):
+            yield FsNode.path.in_(chunk)
+        for chunk in _chunks(sorted(prefix_roots), _NOTIN_INSERT_CHUNK):
+            yield or_(*[FsNode.path.like(r + "/%") for r in chunk])
+
+    def _remove(model, cond) -> int:
+        """硬删命中行；DELETE 失败时回滚到保存点再兜底软删。
+
+        DELETE 放在保存点内：PostgreSQL 上语句失败会使整个事务进入中止状态，
+        只有回滚到保存点后，兜底的 UPDATE 才能继续执行。
+        """
+        where = (model.storage_id == storage_id, cond)
+        try:
+            with db.begin_nested():
+                return db.execute(
+                    delete(model).where(*where).execution_options(synchronize_session=False)
+                ).rowcount
+        except SQLAlchemyError as exc:
+            logger.warning("sync_delete: hard delete on %s failed, falling back to soft delete: %s", model.__tablename__, exc)
+        return db.execute(
+            update(model).where(*where).values(is_deleted=True).execution_options(synchronize_session=False)
+        ).rowcount
+
+    # 兜底软删同样失败时直接抛出：由 _tx 回滚整个事务，调用方记录异常
     with _tx(db):
-        for raw in (paths or []):
-            p = _norm(raw)
-            parent = p.rsplit("/", 1)[0]
-            name = p.rsplit("/", 1)[1] if "/" in p else p
-            dir_key = parent.rstrip("/")
-            if dir_key == "/":
-                dir_key = ""
-
-            # 文件记录：严格匹配 directory + alias_name
-            try:
-                q = (
-                    db.query(FileRecord)
-                    .filter(FileRecord.storage_id == storage_id)
-                    .filter(FileRecord.directory == dir_key)
-                    .filter(FileRecord.alias_name == name)
-                )
-                for row in q.all():
-                    try:
-                        file_record_crud.hard_delete(db, row, auto_commit=False)
-                        files_deleted += 1
-                    except Exception:
-                        file_record_crud.soft_delete(db, row, auto_commit=False)
-                        files_deleted += 1
-            except Exception:
-                pass
-
-            # 统一表：单文件节点
-            try:
-                node = db.query(FsNode).filter(FsNode.storage_id == storage_id, FsNode.path == p.rstrip("/")).first()
-                if node is not None:
-                    try:
-                        fs_node_crud.hard_delete(db, node, auto_commit=False)
-                        nodes_deleted += 1
-                    except Exception:
-                        fs_node_crud.soft_delete(db, node, auto_commit=False)
-                        nodes_deleted += 1
-            except Exception:
-                pass
-
-            # 目录前缀删
-            try:
-                p_norm = p.rstrip("/")
-                if p_norm and p_norm != "/":
-                    q_files = (
-                        db.query(FileRecord)
-                        .filter(FileRecord.storage_id == storage_id)
-                        .filter((FileRecord.directory == p_norm) | (FileRecord.directory.like(p_norm + "/%")))
-                    )
-                    for fr in q_files.all():
-                        try:
-                            file_record_crud.hard_delete(db, fr, auto_commit=False)
-                            files_deleted += 1
-                        except Exception:
-                            file_record_crud.soft_delete(db, fr, auto_commit=False)
-                            files_deleted += 1
-
-                    qn = (
-                        db.query(FsNode)
-                        .filter(FsNode.storage_id == storage_id)
-                        .filter((FsNode.path == p_norm) | (FsNode.path.like(p_norm + "/%")))
-                    )
-                    for n in qn.all():
-                        try:
-                            fs_node_crud.hard_delete(db, n, auto_commit=False)
-                            nodes_deleted += 1
-                        except Exception:
-                            fs_node_crud.soft_delete(db, n, auto_commit=False)
-                            nodes_deleted += 1
-            except Exception:
-                pass
+        for cond in _file_conds():
+            files_deleted += _remove(FileRecord, cond)
+        for cond in _node_conds():
+            nodes_deleted += _remove(FsNode, cond)
 
     result = {"filesDeleted": files_deleted, "nodesDeleted": nodes_deleted}
     try:
@@ -370,6 +489,27 @@ def _norm_dir_key(p: str) -> str:
     return norm_dir_key(p)
 
 
+def _prefetch_nodes(db: Session, storage_id: int, paths) -> dict:
+    """一次范围查询取回给定路径的 fs_nodes，返回 {path: FsNode}，供单次调用内代替逐个 get_by_path。"""
+    from app.packages.system.crud.fs_node import fs_node_crud
+    from app.packages.system.models.fs_node import FsNode
+
+    keys = sorted({p for p in paths if p and p != "/"})
+    nodes: dict = {}
+    for chunk in _chunks(keys, _NOTIN_INSERT_CHUNK):
+        for n in fs_node_crud.query(db).filter(FsNode.storage_id == storage_id, FsNode.path.in_(chunk)):
+            nodes[n.path] = n
+    return nodes
+
+
+@lru_cache(maxsize=8192)
+def _split_path(p: str) -> tuple[str, str, str]:
+    """拆分绝对路径为 (父目录, 基名, 去尾斜杠的完整路径)；父目录为根时返回 '/'。"""
+    n = p.rstrip("/")
+    i = n.rfind("/")
+    return (n[:i] or "/", n[i + 1:], n)
+
+
 def sync_rename_records(
     db: Session,
     *,
@@ -395,36 +535,37 @@ def sync_rename_records(
     old_abs = _norm_abs_path(old_path)
     new_abs = _norm_abs_path(new_path)
 
-    # 判定是否目录：优先依据 fs_nodes，其次尾斜杠语义
-    is_dir = False
+    # 本次调用涉及的节点（源、目标、目标父目录）一次查询取回，后续查找均走字典
+    src_parent, src_name, src_full = _split_path(old_abs)
+    dst_parent, dst_name, dst_full = _split_path(new_abs)
     try:
-        node = fs_node_crud.get_by_path(db, storage_id=storage_id, path=old_abs.rstrip("/"))
-        is_dir = bool(node and getattr(node, "is_dir", False))
+        nodes_by_path = _prefetch_nodes(db, storage_id, (src_full, dst_parent, dst_full))
     except Exception:
-        is_dir = False
+        nodes_by_path = {}
+
+    # 判定是否目录：优先依据 fs_nodes，其次尾斜杠语义
+    node = nodes_by_path.get(src_full)
+    is_dir = bool(node and getattr(node, "is_dir", False))
     if not is_dir:
         is_dir = old_abs.endswith("/") or new_abs.endswith("/")
 
     def ensure_dir_entry(dir_path: str) -> None:
         key = dir_path.rstrip("/")
-        if key == "/":
+        if not key or key in nodes_by_path:
             return
-        node = fs_node_crud.get_by_path(db, storage_id=storage_id, path=key)
-        if node is None:
-            base_name = key.rsplit("/", 1)[-1]
-            fs_node_crud.create(db, {"storage_id": storage_id, "path": key, "name": base_name, "is_dir": True}, auto_commit=False)
-            try:
-                db.flush()
-            except Exception:
-                pass
+        base_name = _split_path(key)[1]
+        nodes_by_path[key] = fs_node_crud.create(db, {"storage_id": storage_id, "path": key, "name": base_name, "is_dir": True}, auto_commit=False)
+        try:
+            db.flush()
+        except Exception:
+            pass
 
     if is_dir:
         # 目录：批量前缀替换
-        src_dir = old_abs.rstrip("/")
-        dst_dir = new_abs.rstrip("/")
+        src_dir = src_full
+        dst_dir = dst_full
         # 仅确保目标父目录存在，避免预创建 dst_dir 与后续“将 src 节点更新为 dst”产生唯一约束冲突
-        dst_parent = dst_dir.rsplit("/", 1)[0] if "/" in dst_dir else "/"
-        ensure_dir_entry(dst_parent or "/")
+        ensure_dir_entry(dst_parent)
         try:
             qf = (
                 db.query(FileRecord)
@@ -464,11 +605,6 @@ def sync_rename_records(
         dirs_renamed = 1
     else:
         # 文件：更新 single record + fs_node
-        src_parent = old_abs.rsplit("/", 1)[0]
-        src_name = old_abs.rsplit("/", 1)[1]
-        dst_parent = new_abs.rsplit("/", 1)[0]
-        dst_name = new_abs.rsplit("/", 1)[1]
-
         ensure_dir_entry(dst_parent)
         matched = False
         try:
@@ -488,15 +624,13 @@ def sync_rename_records(
 
         # 更新/补写 fs_node
         try:
-            src_full = old_abs.rstrip("/")
-            dst_full = f"{dst_parent}/{dst_name}".rstrip("/")
-            node = fs_node_crud.get_by_path(db, storage_id=storage_id, path=src_full)
+            node = nodes_by_path.get(src_full)
             if node is not None:
                 node.path = dst_full
                 node.name = dst_name
                 fs_node_crud.save(db, node, auto_commit=False)
             else:
-                if fs_node_crud.get_by_path(db, storage_id=storage_id, path=dst_full) is None:
+                if dst_full not in nodes_by_path:
                     fs_node_crud.create(db, {"storage_id": storage_id, "path": dst_full, "name": dst_name, "is_dir": False}, auto_commit=False)
         except Exception:
             pass
@@ -506,20 +640,7 @@ def sync_rename_records(
             size_v = 0
             mime_v = None
             try:
-                cfg = storage_config_crud.get(db, storage_id)
-                backend = build_backend(
-                    type=cfg.type,
-                    region=cfg.region,
-                    bucket_name=cfg.bucket_name,
-                    path_prefix=cfg.path_prefix,
-                    local_root_path=cfg.local_root_path,
-                    access_key_id=cfg.access_key_id,
-                    secret_access_key=cfg.secret_access_key,
-                    endpoint_url=getattr(cfg, "endpoint_url", None),
-                    custom_domain=getattr(cfg, "custom_domain", None),
-                    use_https=getattr(cfg, "use_https", True),
-                    acl_type=getattr(cfg, "acl_type", "private"),
-                )
+                backend = _get_backend(db, storage_id)
                 listing = backend.list(path=dst_parent)
                 for it in listing.get("items", []) or []:
                     if it.get("type") == "file" and (it.get("name") or "") == dst_name:
@@ -578,19 +699,45 @@ def sync_move_records(
 
     dst_base = _norm_abs_path(destination_path).rstrip("/")
 
+    # 本次调用涉及的节点（各源路径、目标目录及目标文件路径）一次查询取回，后续查找均走字典
+    sources = [_split_path(_norm_abs_path(p)) for p in (source_paths or [])]
+    try:
+        nodes_by_path = _prefetch_nodes(
+            db,
+            storage_id,
+            [dst_base, *(full for _, _, full in sources), *(f"{dst_base}/{name}" for _, name, _ in sources)],
+        )
+    except Exception:
+        nodes_by_path = {}
+
     def ensure_dir_entry(dir_path: str) -> None:
         key = dir_path.rstrip("/")
-        if key == "/":
+        if not key or key in nodes_by_path:
             return
-        node = _fs.get_by_path(db, storage_id=storage_id, path=key)
-        if node is None:
-            base_name = key.rsplit("/", 1)[-1]
-            # keep inside current transaction boundary; flush so later queries can see it
-            _fs.create(db, {"storage_id": storage_id, "path": key, "name": base_name, "is_dir": True}, auto_commit=False)
+        base_name = _split_path(key)[1]
+        # keep inside current transaction boundary; flush so later queries can see it
+        nodes_by_path[key] = _fs.create(db, {"storage_id": storage_id, "path": key, "name": base_name, "is_dir": True}, auto_commit=False)
+        try:
+            db.flush()
+        except Exception:
+            pass
+
+    # 目标父目录的文件元数据索引：每个父目录只 list 一次，供所有未命中 DB 的文件复用
+    parent_index: dict[str, dict[str, tuple[int, Optional[str]]]] = {}
+
+    def _parent_file_meta(parent: str) -> dict[str, tuple[int, Optional[str]]]:
+        index = parent_index.get(parent)
+        if index is None:
+            index = {}
             try:
-                db.flush()
+                listing = _get_backend(db, storage_id).list(path=parent)
+                for it in listing.get("items", []) or []:
+                    if it.get("type") == "file":
+                        index[it.get("name") or ""] = (int(it.get("size") or 0), it.get("mime_type"))
             except Exception:
                 pass
+            parent_index[parent] = index
+        return index
 
     # Tolerate an already-begun Session (implicit BEGIN from prior selects)
     @contextmanager
@@ -620,145 +767,222 @@ def sync_move_records(
     with _tx(db):
         for spath in (source_paths or []):
             src_abs = _norm_abs_path(spath)
-        base_name = src_abs.rstrip("/").rsplit("/", 1)[-1]
-        # 判定是否目录：优先 fs_nodes
-        try:
-            node = _fs.get_by_path(db, storage_id=storage_id, path=src_abs.rstrip("/"))
+            src_parent, base_name, src_full = _split_path(src_abs)
+            # 判定是否目录：优先 fs_nodes
+            node = nodes_by_path.get(src_full)
             is_dir = bool(node and getattr(node, "is_dir", False))
-        except Exception:
-            is_dir = False
-        if not is_dir and src_abs.endswith("/"):
-            is_dir = True
-
-        if is_dir:
-            src_dir = src_abs.rstrip("/")
-            dst_dir = f"{dst_base}/{base_name}"
-            # Moving a directory: do NOT pre-create the destination directory node,
-            # otherwise updating src node to the same path will hit unique constraint.
-            # We only ensure the destination parent exists for consistent tree.
-            ensure_dir_entry(dst_base)
-            # file_records 前缀替换
-            try:
-                qf = (
-                    db.query(FileRecord)
-                    .filter(FileRecord.storage_id == storage_id)
-                    .filter((FileRecord.directory == src_dir) | (FileRecord.directory.like(src_dir + "/%")))
-                )
-                for f in qf.all():
-                    if f.directory == src_dir:
-                        f.directory = dst_dir
-                    elif f.directory.startswith(src_dir + "/"):
-                        f.directory = dst_dir + f.directory[len(src_dir):]
-                    file_record_crud.save(db, f, auto_commit=False)
-            except Exception:
-                pass
-            # fs_nodes 前缀替换
-            try:
-                qn = (
-                    db.query(FsNode)
-                    .filter(FsNode.storage_id == storage_id)
-                    .filter((FsNode.path == src_dir) | (FsNode.path.like(src_dir + "/%")))
-                )
-                for n in qn.all():
-                    if n.path == src_dir:
-                        n.path = dst_dir
-                    elif n.path.startswith(src_dir + "/"):
-                        n.path = dst_dir + n.path[len(src_dir):]
-                    n.name = n.path.rsplit("/", 1)[-1]
-                    fs_node_crud.save(db, n, auto_commit=False)
-            except Exception:
-                pass
-            moved_dirs += 1
-        else:
-            # 单文件
-            src_parent = src_abs.rsplit("/", 1)[0]
-            name = src_abs.rsplit("/", 1)[1]
-            dst_parent = dst_base
-            ensure_dir_entry(dst_parent)
-
-            try:
-                q = (
-                    db.query(FileRecord)
-                    .filter(FileRecord.storage_id == storage_id)
-                    .filter(FileRecord.directory == _norm_dir_key(src_parent))
-                    .filter(FileRecord.alias_name == name)
-                )
-                matched = False
-                for row in q.all():
-                    row.directory = _norm_dir_key(dst_parent)
-                    file_record_crud.save(db, row, auto_commit=False)
-                    matched = True
-                # 同步 fs_nodes
+            if not is_dir and src_abs.endswith("/"):
+                is_dir = True
+
+            if is_dir:
+                src_dir = src_full
+                dst_dir = f"{dst_base}/{base_name}"
+                # Moving a directory: do NOT pre-create the destination directory node,
+                # otherwise updating src node to the same path will hit unique constraint.
+                # We only ensure the destination parent exists for consistent tree.
+                ensure_dir_entry(dst_base)
+                # file_records 前缀替换
                 try:
-                    src_full = src_abs.rstrip("/")
-                    dst_full = f"{dst_base}/{name}"
-                    node = _fs.get_by_path(db, storage_id=storage_id, path=src_full)
-                    if node is not None:
-                        node.path = dst_full
-                        node.name = name
-                        fs_node_crud.save(db, node, auto_commit=False)
+                    qf = (
+                        db.query(FileRecord)
+                        .filter(FileRecord.storage_id == storage_id)
+                        .filter((FileRecord.directory == src_dir) | (FileRecord.directory.like(src_dir + "/%")))
+                    )
+                    for f in qf.all():
+                        if f.directory == src_dir:
+                            f.directory = dst_dir
+                        elif f.directory.startswith(src_dir + "/"):
+                            f.directory = dst_dir + f.directory[len(src_dir):]
+                        file_record_crud.save(db, f, auto_commit=False)
                 except Exception:
                     pass
-                if not matched:
-                    # 目标父目录 list 一次补写记录（构造后端获取 size/mime）
-                    from app.packages.system.crud.storage_config import storage_config_crud
-                    cfg = storage_config_crud.get(db, storage_id)
-                    size_v = 0
-                    mime_v = None
+                # fs_nodes 前缀替换
+                try:
+                    qn = (
+                        db.query(FsNode)
+                        .filter(FsNode.storage_id == storage_id)
+                        .filter((FsNode.path == src_dir) | (FsNode.path.like(src_dir + "/%")))
+                    )
+                    for n in qn.all():
+                        if n.path == src_dir:
+                            n.path = dst_dir
+                        elif n.path.startswith(src_dir + "/"):
+                            n.path = dst_dir + n.path[len(src_dir):]
+                        n.name = n.path.rsplit("/", 1)[-1]
+                        fs_node_crud.save(db, n, auto_commit=False)
+                except Exception:
+                    pass
+                moved_node = nodes_by_path.pop(src_dir, None)
+                if moved_node is not None:
+                    nodes_by_path[dst_dir] = moved_node
+                moved_dirs += 1
+            else:
+                # 单文件
+                name = base_name
+                dst_parent = dst_base
+                ensure_dir_entry(dst_parent)
+
+                try:
+                    q = (
+                        db.query(FileRecord)
+                        .filter(FileRecord.storage_id == storage_id)
+                        .filter(FileRecord.directory == _norm_dir_key(src_parent))
+                        .filter(FileRecord.alias_name == name)
+                    )
+                    matched = False
+                    for row in q.all():
+                        row.directory = _norm_dir_key(dst_parent)
+                        file_record_crud.save(db, row, auto_commit=False)
+                        matched = True
+                    # 同步 fs_nodes
                     try:
-                        backend = build_backend(
-                            type=cfg.type,
-                            region=cfg.region,
-                            bucket_name=cfg.bucket_name,
-                            path_prefix=cfg.path_prefix,
-                            local_root_path=cfg.local_root_path,
-                            access_key_id=cfg.access_key_id,
-                            secret_access_key=cfg.secret_access_key,
-                            endpoint_url=getattr(cfg, "endpoint_url", None),
-                            custom_domain=getattr(cfg, "custom_domain", None),
-                            use_https=getattr(cfg, "use_https", True),
-                            acl_type=getattr(cfg, "acl_type", "private"),
-                        )
-                        listing = backend.list(path=dst_parent)
-                        for it in listing.get("items", []) or []:
-                            if it.get("type") == "file" and (it.get("name") or "") == name:
-                                size_v = int(it.get("size") or 0)
-                                mime_v = it.get("mime_type")
-                                break
+                        dst_full = f"{dst_base}/{name}"
+                        node = nodes_by_path.pop(src_full, None)
+                        if node is not None:
+                            node.path = dst_full
+                            node.name = name
+                            fs_node_crud.save(db, node, auto_commit=False)
+                            nodes_by_path[dst_full] = node
                     except Exception:
                         pass
-                    file_record_crud.create(
-                        db,
-                        {
-                            "storage_id": storage_id,
-                            "directory": _norm_dir_key(dst_parent),
-                            "original_name": name,
-                            "alias_name": name,
-                            "purpose": "general",
-                            "size_bytes": size_v,
-                            "mime_type": mime_v,
-                        },
-                        auto_commit=False,
-                    )
-                    # fs_node upsert
-                    try:
-                        full_path = f"{dst_parent}/{name}".rstrip("/")
-                        if _fs.get_by_path(db, storage_id=storage_id, path=full_path) is None:
-                            _fs.create(db, {
+                    if not matched:
+                        # 目标父目录 list 一次补写记录（构造后端获取 size/mime）
+                        size_v, mime_v = _parent_file_meta(dst_parent).get(name, (0, None))
+                        file_record_crud.create(
+                            db,
+                            {
                                 "storage_id": storage_id,
-                                "path": full_path,
-                                "name": name,
-                                "is_dir": False,
+                                "directory": _norm_dir_key(dst_parent),
+                                "original_name": name,
+                                "alias_name": name,
+                                "purpose": "general",
                                 "size_bytes": size_v,
                                 "mime_type": mime_v,
-                            }, auto_commit=False)
-                    except Exception:
-                        pass
+                            },
+                            auto_commit=False,
+                        )
+                        # fs_node upsert
+                        try:
+                            full_path = f"{dst_parent}/{name}".rstrip("/")
+                            if full_path not in nodes_by_path:
+                                nodes_by_path[full_path] = _fs.create(db, {
+                                    "storage_id": storage_id,
+                                    "path": full_path,
+                                    "name": name,
+                                    "is_dir": False,
+                                    "size_bytes": size_v,
+                                    "mime_type": mime_v,
+                                }, auto_commit=False)
+                        except Exception:
+                            pass
+                except Exception:
+                    pass
+                moved_files += 1
+
+    return {"filesMoved": moved_files, "dirsMoved": moved_dirs}
+
+
+@contextmanager
+def _tx_copy(db: Session):
+    """复制元数据的事务边界：兼容已隐式开启事务的 Session（此前的 select 会触发 BEGIN）。"""
+    if db.in_transaction():
+        try:
+            yield
+            db.commit()
+        except Exception:
+            try:
+                db.rollback()
             except Exception:
                 pass
-            moved_files += 1
+            raise
+    else:
+        with db.begin():
+            yield
 
-    return {"filesMoved": moved_files, "dirsMoved": moved_dirs}
+
+def _copy_subtree_sql(db: Session, *, storage_id: int, src_dir: str, dst_dir: str) -> tuple[int, int]:
+    """以 INSERT ... SELECT 在数据库内复制目录子树（fs_nodes 与 file_records），数据不经应用层往返。
+
+    新路径为 `dst_dir || substr(path, len(src_dir)+1)`；目标侧已存在的路径（含软删行）不再插入，
+    只有软删行的路径则按源行回填 name/is_dir/size_bytes/mime_type 后恢复。返回 (节点行数, 文件记录行数)。
+    """
+    from app.core.datascope import scope_defaults_for_create
+    from app.packages.system.crud.file_record import file_record_crud
+    from app.packages.system.crud.fs_node import fs_node_crud
+    from app.packages.system.models.file_record import FileRecord
+    from app.packages.system.models.fs_node import FsNode
+
+    cut = len(src_dir) + 1
+
+    src_n = aliased(FsNode)
+    dst_n = aliased(FsNode)
+    new_path = literal(dst_dir) + func.substr(src_n.path, cut)
+    defaults = fs_node_crud._prepare_payload(db, {}, scope_defaults_for_create(FsNode))
+    cols = ["storage_id", "path", "name", "is_dir", "size_bytes", "mime_type", *defaults]
+    sel_nodes = (
+        select(
+            literal(storage_id), new_path, src_n.name, src_n.is_dir, src_n.size_bytes, src_n.mime_type,
+            *(literal(v, type_=FsNode.__table__.c[k].type) for k, v in defaults.items()),
+        )
+        .where(src_n.storage_id == storage_id, src_n.is_deleted.is_(False))
+        .where(or_(src_n.path == src_dir, src_n.path.like(src_dir + "/%")))
+        .where(~exists().where(dst_n.storage_id == storage_id, dst_n.path == new_path))
+    )
+    nodes = db.execute(insert(FsNode).from_select(cols, sel_nodes)).rowcount or 0
+    # 软删的目标行按源行回填元数据后恢复（UPDATE ... FROM）：仅改 is_deleted 会留下旧的 is_dir/size 等。
+    # create_all 建出的表对 (storage_id, path) 是完整唯一约束，软删行会挡住上面的插入；
+    # PostgreSQL 脚本里则是仅覆盖未删除行的部分唯一索引，同一路径可能有多条软删行，故每个路径只恢复 id 最小的一条
+    dup_n = aliased(FsNode)
+    revived = db.execute(
+        update(FsNode)
+        .where(FsNode.storage_id == storage_id, FsNode.is_deleted.is_(True))
+        .where(or_(FsNode.path == dst_dir, FsNode.path.like(dst_dir + "/%")))
+        .where(
+            src_n.storage_id == storage_id,
+            src_n.is_deleted.is_(False),
+            src_n.path == literal(src_dir) + func.substr(FsNode.path, len(dst_dir) + 1),
+        )
+        .where(~exists().where(dst_n.storage_id == storage_id, dst_n.path == FsNode.path, dst_n.is_deleted.is_(False)))
+        .where(
+            FsNode.id
+            == select(func.min(dup_n.id))
+            .where(dup_n.storage_id == storage_id, dup_n.path == FsNode.path, dup_n.is_deleted.is_(True))
+            .scalar_subquery()
+        )
+        .values(
+            is_deleted=False,
+            name=src_n.name,
+            is_dir=src_n.is_dir,
+            size_bytes=src_n.size_bytes,
+            mime_type=src_n.mime_type,
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount or 0
+
+    src_f = aliased(FileRecord)
+    dst_f = aliased(FileRecord)
+    new_dir = literal(dst_dir) + func.substr(src_f.directory, cut)
+    defaults = file_record_crud._prepare_payload(db, {}, scope_defaults_for_create(FileRecord))
+    cols = ["storage_id", "directory", "original_name", "alias_name", "purpose", "size_bytes", "mime_type", *defaults]
+    sel_files = (
+        select(
+            literal(storage_id), new_dir, src_f.original_name, src_f.alias_name, src_f.purpose,
+            src_f.size_bytes, src_f.mime_type,
+            *(literal(v, type_=FileRecord.__table__.c[k].type) for k, v in defaults.items()),
+        )
+        .where(src_f.storage_id == storage_id, src_f.is_deleted.is_(False))
+        .where(or_(src_f.directory == src_dir, src_f.directory.like(src_dir + "/%")))
+        .where(
+            ~exists().where(
+                dst_f.storage_id == storage_id,
+                dst_f.is_deleted.is_(False),
+                dst_f.directory == new_dir,
+                dst_f.alias_name == src_f.alias_name,
+            )
+        )
+    )
+    files = db.execute(insert(FileRecord).from_select(cols, sel_files)).rowcount or 0
+    return nodes + revived, files
 
 
 def sync_copy_records(
@@ -786,138 +1010,164 @@ def sync_copy_records(
 
     dst_base = _norm_abs_path(destination_path).rstrip("/")
 
+    # 源路径、目标目录及目标文件路径的节点一次查询取回，代替逐个 get_by_path 探测
+    sources = [_split_path(_norm_abs_path(p)) for p in (source_paths or [])]
+    nodes_by_path = _prefetch_nodes(
+        db,
+        storage_id,
+        [dst_base, *(full for _, _, full in sources), *(f"{dst_base}/{name}" for _, name, _ in sources)],
+    )
+
     def ensure_dir_entry(dir_path: str) -> None:
         key = dir_path.rstrip("/")
-        if key == "/":
+        if not key or key in created_node_paths or key in nodes_by_path:
             return
-        if key in created_node_paths:
-            return
-        node = _fs.get_by_path(db, storage_id=storage_id, path=key)
-        if node is None:
-            base_name = key.rsplit("/", 1)[-1]
-            # keep inside current transaction boundary; flush so later queries can see it
-            _fs.create(db, {"storage_id": storage_id, "path": key, "name": base_name, "is_dir": True}, auto_commit=False)
-            try:
-                db.flush()
-            except Exception:
-                pass
-            created_node_paths.add(key)
-
-    # Tolerate an already-begun Session (implicit BEGIN from prior selects)
-    @contextmanager
-    def _tx_copy(db: Session):
-        has_tx = False
-        try:
-            has_tx = bool(getattr(db, "in_transaction", lambda: False)())
-        except Exception:
-            try:
-                has_tx = getattr(db, "get_transaction", lambda: lambda: None)() is not None
-            except Exception:
-                has_tx = False
-        if has_tx:
-            try:
-                yield
-                db.commit()
-            except Exception:
-                try:
-                    db.rollback()
-                except Exception:
-                    pass
-                raise
-        else:
-            with db.begin():
-                yield
-
-    with _tx_copy(db):
+        base_name = _split_path(key)[1]
+        # 仅加入会话，不单独 flush：created_node_paths 即“已排队”的权威记录。
+        # 循环处于 no_autoflush 内，查询不会带出这些行；需要数据库可见时（进入保存点、微同步前、
+        # 循环结束）由显式 flush 写入
+        _fs.create(db, {"storage_id": storage_id, "path": key, "name": base_name, "is_dir": True}, auto_commit=False)
+        created_node_paths.add(key)
+
+    # 关闭 autoflush：循环内的存在性判断以 created_node_paths/预取结果为准，避免每次查询前扫描 identity map
+    with _tx_copy(db), db.no_autoflush:
         for spath in (source_paths or []):
             src_abs = _norm_abs_path(spath)
-        base_name = src_abs.rstrip("/").rsplit("/", 1)[-1]
-        # 判定是否目录
-        try:
-            node = _fs.get_by_path(db, storage_id=storage_id, path=src_abs.rstrip("/"))
+            src_parent, base_name, src_full = _split_path(src_abs)
+            # 判定是否目录
+            node = nodes_by_path.get(src_full)
             is_dir = bool(node and getattr(node, "is_dir", False))
-        except Exception:
-            is_dir = False
-        if not is_dir and src_abs.endswith("/"):
-            is_dir = True
-
-        if is_dir:
-            src_dir = src_abs.rstrip("/")
-            dst_dir = f"{dst_base}/{base_name}"
-            # Copying a directory: do NOT pre-create dst_dir to avoid duplicate with subtree copy; ensure parent only.
-            ensure_dir_entry(dst_base)
-            # 复制 fs_nodes 子树
-            copied_any = False
-            try:
-                qn = (
-                    db.query(FsNode)
-                    .filter(FsNode.storage_id == storage_id)
-                    .filter((FsNode.path == src_dir) | (FsNode.path.like(src_dir + "/%")))
-                )
-                for n in qn.all():
-                    suffix = n.path[len(src_dir):]
-                    new_path = (dst_dir + suffix).rstrip("/")
-                    if new_path not in created_node_paths and _fs.get_by_path(db, storage_id=storage_id, path=new_path) is None:
-                        _fs.create(db, {"storage_id": storage_id, "path": new_path, "name": new_path.rsplit("/", 1)[-1], "is_dir": n.is_dir, "size_bytes": int(n.size_bytes or 0), "mime_type": n.mime_type}, auto_commit=False)
-                        copied_any = True
-                        created_node_paths.add(new_path)
-                # flush created fs_nodes so that later queries can see them and avoid dup inserts
+            if not is_dir and src_abs.endswith("/"):
+                is_dir = True
+
+            if is_dir:
+                src_dir = src_full
+                dst_dir = f"{dst_base}/{base_name}"
+                # Copying a directory: do NOT pre-create dst_dir to avoid duplicate with subtree copy; ensure parent only.
+                ensure_dir_entry(dst_base)
+                # 优先在数据库内以 INSERT ... SELECT 整体复制子树；未复制任何行时回退到逐行收集的路径。
+                # 放在保存点内，失败时不影响外层事务。
+                try:
+                    with db.begin_nested():
+                        node_count, file_count = _copy_subtree_sql(db, storage_id=storage_id, src_dir=src_dir, dst_dir=dst_dir)
+                except SQLAlchemyError as exc:
+                    logger.warning("sync_copy_records: INSERT ... SELECT of %s failed: %s", src_dir, exc)
+                    node_count = file_count = 0
+                copied_any = bool(node_count or file_count)
                 if copied_any:
-                    try:
-                        db.flush()
-                    except Exception:
-                        pass
-            except Exception:
-                pass
-            # 复制 file_records
-            try:
-                qf = (
-                    db.query(FileRecord)
-                    .filter(FileRecord.storage_id == storage_id)
-                    .filter((FileRecord.directory == src_dir) | (FileRecord.directory.like(src_dir + "/%")))
-                )
-                had = False
-                for f in qf.all():
-                    suffix = f.directory[len(src_dir):]
-                    new_dir = (dst_dir + suffix).rstrip("/")
-                    file_record_crud.create(
-                        db,
-                        {
-                            "storage_id": storage_id,
-                            "directory": new_dir,
-                            "original_name": f.original_name,
-                            "alias_name": f.alias_name,
-                            "purpose": f.purpose,
-                            "size_bytes": f.size_bytes,
-                            "mime_type": f.mime_type,
-                        }, auto_commit=False,
+                    copied_files += file_count
+                    if file_count:
+                        copied_dirs += 1
+                else:
+                    # 只读查询失败直接抛出（PostgreSQL 上事务已中止，继续执行只会让后续语句与提交全部失败），
+                    # 由 _tx_copy 回滚；写入各批次放在独立保存点内，失败只回滚该批次。
+                    # 目标子树已有的节点与文件记录：各一次范围查询取回，代替逐行存在性探测。
+                    # 节点集合包含已软删的行：create_all 的完整唯一约束会挡住重复插入，故只有软删行的路径
+                    # 改为按源行回填后恢复；PostgreSQL 的部分唯一索引下同一路径可能有多条软删行，只恢复 id 最小的一条
+                    existing_nodes: set[str] = set()
+                    active_nodes: set[str] = set()
+                    revive_ids: dict[str, int] = {}
+                    existing_files: set[tuple[str, str]] = set()
+                    for id_v, path_v, deleted_v in db.execute(
+                        select(FsNode.id, FsNode.path, FsNode.is_deleted)
+                        .where(FsNode.storage_id == storage_id)
+                        .where((FsNode.path == dst_dir) | (FsNode.path.like(dst_dir + "/%")))
+                    ):
+                        existing_nodes.add(path_v)
+                        if not deleted_v:
+                            active_nodes.add(path_v)
+                        elif path_v not in revive_ids or id_v < revive_ids[path_v]:
+                            revive_ids[path_v] = id_v
+                    for path_v in active_nodes:
+                        revive_ids.pop(path_v, None)
+                    existing_files = {
+                        (dir_v, alias_v)
+                        for dir_v, alias_v in db.execute(
+                            select(FileRecord.directory, FileRecord.alias_name)
+                            .where(FileRecord.storage_id == storage_id, FileRecord.is_deleted.is_(False))
+                            .where((FileRecord.directory == dst_dir) | (FileRecord.directory.like(dst_dir + "/%")))
+                        )
+                    }
+                    # 复制 fs_nodes 子树：先在内存中收集待插入行，最后每张表各一次批量 INSERT
+                    copied_any = False
+                    fs_rows: list[dict] = []
+                    fr_rows: list[dict] = []
+                    revive_rows: list[dict] = []
+                    # 流式读取源子树（yield_per），避免一次性把整个子树实例化到内存；
+                    # 与 _copy_subtree_sql 一致只复制未删除的行，软删的源记录不能以存活行出现在目标侧
+                    qn = (
+                        select(FsNode)
+                        .where(FsNode.storage_id == storage_id, FsNode.is_deleted.is_(False))
+                        .where((FsNode.path == src_dir) | (FsNode.path.like(src_dir + "/%")))
+                        .execution_options(yield_per=_STREAM_CHUNK)
                     )
-                    had = True
-                    copied_files += 1
-                    # upsert fs_node
-                    try:
+                    for n in db.execute(qn).scalars():
+                        suffix = n.path[len(src_dir):]
+                        new_path = (dst_dir + suffix).rstrip("/")
+                        if new_path in revive_ids:
+                            revive_rows.append({"id": revive_ids.pop(new_path), "is_deleted": False, "name": new_path.rsplit("/", 1)[-1], "is_dir": n.is_dir, "size_bytes": int(n.size_bytes or 0), "mime_type": n.mime_type})
+                            copied_any = True
+                        elif new_path not in created_node_paths and new_path not in existing_nodes:
+                            fs_rows.append({"storage_id": storage_id, "path": new_path, "name": new_path.rsplit("/", 1)[-1], "is_dir": n.is_dir, "size_bytes": int(n.size_bytes or 0), "mime_type": n.mime_type})
+                            copied_any = True
+                            created_node_paths.add(new_path)
+                    # 复制 file_records
+                    qf = (
+                        select(FileRecord)
+                        .where(FileRecord.storage_id == storage_id, FileRecord.is_deleted.is_(False))
+                        .where((FileRecord.directory == src_dir) | (FileRecord.directory.like(src_dir + "/%")))
+                        .execution_options(yield_per=_STREAM_CHUNK)
+                    )
+                    for f in db.execute(qf).scalars():
+                        suffix = f.directory[len(src_dir):]
+                        new_dir = (dst_dir + suffix).rstrip("/")
+                        if (new_dir, f.alias_name) in existing_files:
+                            continue
+                        existing_files.add((new_dir, f.alias_name))
+                        fr_rows.append(
+                            {
+                                "storage_id": storage_id,
+                                "directory": new_dir,
+                                "original_name": f.original_name,
+                                "alias_name": f.alias_name,
+                                "purpose": f.purpose,
+                                "size_bytes": f.size_bytes,
+                                "mime_type": f.mime_type,
+                            }
+                        )
+                        # upsert fs_node
                         full_path = (f"{new_dir}/{f.alias_name}" if new_dir else f"/{f.alias_name}").rstrip("/")
-                        if full_path not in created_node_paths and _fs.get_by_path(db, storage_id=storage_id, path=full_path) is None:
-                            _fs.create(db, {"storage_id": storage_id, "path": full_path, "name": f.alias_name, "is_dir": False, "size_bytes": int(f.size_bytes or 0), "mime_type": f.mime_type}, auto_commit=False)
+                        if full_path in revive_ids:
+                            revive_rows.append({"id": revive_ids.pop(full_path), "is_deleted": False, "name": f.alias_name, "is_dir": False, "size_bytes": int(f.size_bytes or 0), "mime_type": f.mime_type})
+                        elif full_path not in created_node_paths and full_path not in existing_nodes:
+                            fs_rows.append({"storage_id": storage_id, "path": full_path, "name": f.alias_name, "is_dir": False, "size_bytes": int(f.size_bytes or 0), "mime_type": f.mime_type})
                             created_node_paths.add(full_path)
-                    except Exception:
-                        pass
-                if had:
-                    copied_dirs += 1
-            except Exception:
-                pass
-            # 若源目录在 DB 中没有任何记录，微同步目标子树
-            if not copied_any:
-                try:
+                    try:
+                        with db.begin_nested():
+                            if revive_rows:
+                                db.bulk_update_mappings(FsNode, revive_rows)
+                            _fs.bulk_create(db, fs_rows, auto_commit=False)
+                    except SQLAlchemyError as exc:
+                        logger.warning("sync_copy_records: copying fs_nodes into %s failed: %s", dst_dir, exc)
+                        created_node_paths.difference_update(r["path"] for r in fs_rows)
+                        copied_any = False
+                    try:
+                        with db.begin_nested():
+                            copied_files += file_record_crud.bulk_create(db, fr_rows, auto_commit=False)
+                        if fr_rows:
+                            copied_dirs += 1
+                    except SQLAlchemyError as exc:
+                        logger.warning("sync_copy_records: copying file_records into %s failed: %s", dst_dir, exc)
+                # 若源目录在 DB 中没有任何记录，微同步目标子树
+                if not copied_any:
+                    # 微同步按数据库内容判断已有节点：先把排队中的目录项写入，避免重复插入
+                    db.flush()
                     sync_records(db, storage_id=storage_id, path=dst_dir + "/")
-                except Exception:
-                    pass
-        else:
-            # 文件复制
-            src_parent = src_abs.rsplit("/", 1)[0]
-            name = src_abs.rsplit("/", 1)[1]
-            ensure_dir_entry(dst_base)
-            try:
+            else:
+                # 文件复制
+                name = base_name
+                ensure_dir_entry(dst_base)
+                new_dir = _norm_dir_key(dst_base)
                 row = (
                     db.query(FileRecord)
                     .filter(FileRecord.storage_id == storage_id)
@@ -926,48 +1176,44 @@ def sync_copy_records(
                     .first()
                 )
                 if row is not None:
-                    file_record_crud.create(
-                        db,
-                        {
-                            "storage_id": storage_id,
-                            "directory": _norm_dir_key(dst_base),
-                            "original_name": row.original_name,
-                            "alias_name": row.alias_name,
-                            "purpose": row.purpose,
-                            "size_bytes": row.size_bytes,
-                            "mime_type": row.mime_type,
-                        }, auto_commit=False,
-                    )
-                    # upsert fs_node
-                    try:
-                        new_dir = _norm_dir_key(dst_base)
-                        full_path = (f"{new_dir}/{row.alias_name}" if new_dir else f"/{row.alias_name}").rstrip("/")
-                        if _fs.get_by_path(db, storage_id=storage_id, path=full_path) is None:
-                            _fs.create(db, {"storage_id": storage_id, "path": full_path, "name": row.alias_name, "is_dir": False, "size_bytes": int(row.size_bytes or 0), "mime_type": row.mime_type}, auto_commit=False)
-                    except Exception:
-                        pass
+                    record = {
+                        "storage_id": storage_id,
+                        "directory": new_dir,
+                        "original_name": row.original_name,
+                        "alias_name": row.alias_name,
+                        "purpose": row.purpose,
+                        "size_bytes": row.size_bytes,
+                        "mime_type": row.mime_type,
+                    }
+                    full_path = (f"{new_dir}/{row.alias_name}" if new_dir else f"/{row.alias_name}").rstrip("/")
+                    node_in = {"storage_id": storage_id, "path": full_path, "name": row.alias_name, "is_dir": False, "size_bytes": int(row.size_bytes or 0), "mime_type": row.mime_type}
                 else:
                     # 源文件不在 DB，也要尽量补齐目标侧记录
-                    file_record_crud.create(
-                        db,
-                        {
-                            "storage_id": storage_id,
-                            "directory": _norm_dir_key(dst_base),
-                            "original_name": name,
-                            "alias_name": name,
-                            "purpose": "general",
-                            "size_bytes": 0,
-                            "mime_type": None,
-                        }, auto_commit=False,
-                    )
-                    try:
-                        full_path = f"{dst_base}/{name}".rstrip("/")
-                        if _fs.get_by_path(db, storage_id=storage_id, path=full_path) is None:
-                            _fs.create(db, {"storage_id": storage_id, "path": full_path, "name": name, "is_dir": False, "size_bytes": 0, "mime_type": None}, auto_commit=False)
-                    except Exception:
-                        pass
+                    record = {
+                        "storage_id": storage_id,
+                        "directory": new_dir,
+                        "original_name": name,
+                        "alias_name": name,
+                        "purpose": "general",
+                        "size_bytes": 0,
+                        "mime_type": None,
+                    }
+                    full_path = f"{dst_base}/{name}".rstrip("/")
+                    node_in = {"storage_id": storage_id, "path": full_path, "name": name, "is_dir": False, "size_bytes": 0, "mime_type": None}
+                # 文件记录与节点放在同一保存点：提交保存点时 flush，失败只回滚这一个文件
+                new_node = full_path not in nodes_by_path and full_path not in created_node_paths
+                try:
+                    with db.begin_nested():
+                        file_record_crud.create(db, record, auto_commit=False)
+                        if new_node:
+                            _fs.create(db, node_in, auto_commit=False)
+                except SQLAlchemyError as exc:
+                    logger.warning("sync_copy_records: copying %s failed: %s", full_path, exc)
+                    continue
+                if new_node:
+                    created_node_paths.add(full_path)
                 copied_files += 1
-            except Exception:
-                pass
+        # 全部源处理完后统一 flush 一次，在提交前暴露约束错误
+        db.flush()
 
     return {"filesCopied": copied_files, "dirsCopied": copied_dirs}
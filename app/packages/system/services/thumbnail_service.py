@@ -4,16 +4,23 @@
   - 首次生成，之后复用；
   - 本地：文件放在 <root>/.thumbnails/<dir>/<name>__w{w}[x{h}].{fmt}
   - S3：对象放在 thumbnails/<dir>/<name>__w{w}[x{h}].{fmt}
+- 生成：若安装了 pyvips（libvips），优先用 `thumbnail_buffer` 按目标尺寸解码；否则使用 Pillow。
 """
 
 from __future__ import annotations
 
 import io
 import os
-from pathlib import Path
-from typing import Optional, Tuple
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from types import SimpleNamespace
+from typing import IO, Optional, Tuple, Union
 
-from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
 import sys
 import platform
 import traceback
@@ -22,13 +29,183 @@ from app.packages.system.core.exceptions import AppException
 from app.packages.system.core.constants import HTTP_STATUS_BAD_REQUEST, HTTP_STATUS_NOT_FOUND
 from sqlalchemy.orm import Session
 
+from app.core.datascope import get_scope
+
 from app.packages.system.crud.storage_config import storage_config_crud
 from app.packages.system.services.storage_backends import build_backend, LocalBackend, S3Backend
 
+# Pillow 与 webp 编码能力在导入时解析一次；导入失败时在生成阶段再给出详细诊断
+try:
+    from PIL import Image, features
+
+    _PIL_AVAILABLE = True
+    _HAS_WEBP = bool(getattr(features, "check", lambda *_: False)("webp"))
+except Exception:  # pragma: no cover - 取决于运行环境
+    Image = None  # type: ignore[assignment]
+    _PIL_AVAILABLE = False
+    _HAS_WEBP = False
+
+try:  # 可选依赖：libvips 绑定；未安装或缺少 libvips 动态库时使用 Pillow
+    import pyvips as _pyvips  # type: ignore
+except Exception:  # pragma: no cover - 取决于运行环境
+    _pyvips = None
+
+
+# 进程内缩略图字节缓存（LRU，按总字节数限额）：画廊页面反复请求同一缩略图时免去磁盘/S3 往返。
+# 本地存储的键带原图 mtime/大小，原图被替换后自然失效；S3 无法免费取得版本，靠短 TTL 与上传/变更时的 invalidate 兜底
+_THUMB_CACHE_MAX_BYTES = 64 * 1024 * 1024
+_THUMB_CACHE_TTL = 30.0
+_THUMB_CACHE: "OrderedDict[tuple, tuple[float, bytes]]" = OrderedDict()
+_THUMB_CACHE_LOCK = threading.Lock()
+_thumb_cache_bytes = 0
+
+
+def _thumb_cache_get(key: tuple) -> Optional[bytes]:
+    global _thumb_cache_bytes
+    with _THUMB_CACHE_LOCK:
+        hit = _THUMB_CACHE.get(key)
+        if hit is None:
+            return None
+        if hit[0] <= time.monotonic():
+            del _THUMB_CACHE[key]
+            _thumb_cache_bytes -= len(hit[1])
+            return None
+        _THUMB_CACHE.move_to_end(key)
+        return hit[1]
+
+
+def _thumb_cache_put(key: tuple, data: bytes) -> None:
+    global _thumb_cache_bytes
+    if len(data) > _THUMB_CACHE_MAX_BYTES:
+        return
+    with _THUMB_CACHE_LOCK:
+        old = _THUMB_CACHE.pop(key, None)
+        if old is not None:
+            _thumb_cache_bytes -= len(old[1])
+        _THUMB_CACHE[key] = (time.monotonic() + _THUMB_CACHE_TTL, data)
+        _thumb_cache_bytes += len(data)
+        while _thumb_cache_bytes > _THUMB_CACHE_MAX_BYTES:
+            _, evicted = _THUMB_CACHE.popitem(last=False)
+            _thumb_cache_bytes -= len(evicted[1])
+
+
+def _thumb_cache_drop(storage_id: int) -> None:
+    global _thumb_cache_bytes
+    with _THUMB_CACHE_LOCK:
+        for key in [k for k in _THUMB_CACHE if k[0] == storage_id]:
+            _thumb_cache_bytes -= len(_THUMB_CACHE.pop(key)[1])
+
+
+# 已确认存在于 S3 的缩略图 (storage_id, 相对路径)：命中后直接生成预览地址（本地签名，无网络往返），
+# 不再每次 HeadObject；文件变更或配置更新时随 invalidate 一并清理。
+# 按条目数限额的 LRU，并带 TTL：其他进程或存储侧直接删除的缩略图最多在 TTL 内被误判为存在
+_S3_THUMB_KNOWN_MAX = 10000
+_S3_THUMB_KNOWN_TTL = 300.0
+_S3_THUMB_KNOWN: "OrderedDict[tuple[int, str], float]" = OrderedDict()
+_S3_THUMB_KNOWN_LOCK = threading.Lock()
+
+
+def _s3_known_has(key: tuple[int, str]) -> bool:
+    with _S3_THUMB_KNOWN_LOCK:
+        expires = _S3_THUMB_KNOWN.get(key)
+        if expires is None:
+            return False
+        if expires <= time.monotonic():
+            del _S3_THUMB_KNOWN[key]
+            return False
+        _S3_THUMB_KNOWN.move_to_end(key)
+        return True
+
+
+def _s3_known_add(key: tuple[int, str]) -> None:
+    with _S3_THUMB_KNOWN_LOCK:
+        _S3_THUMB_KNOWN.pop(key, None)
+        _S3_THUMB_KNOWN[key] = time.monotonic() + _S3_THUMB_KNOWN_TTL
+        while len(_S3_THUMB_KNOWN) > _S3_THUMB_KNOWN_MAX:
+            _S3_THUMB_KNOWN.popitem(last=False)
+
+
+def _s3_known_drop(storage_id: int) -> None:
+    with _S3_THUMB_KNOWN_LOCK:
+        for key in [k for k in _S3_THUMB_KNOWN if k[0] == storage_id]:
+            del _S3_THUMB_KNOWN[key]
+
+
+# 生成中的缩略图（singleflight）：同一键并发未命中时只由首个请求生成，其余等待其结果
+_INFLIGHT: dict[tuple, Future] = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+
+def _inflight_acquire(key: tuple) -> tuple[Future, bool]:
+    """返回 (future, 是否由当前调用负责生成)。"""
+    with _INFLIGHT_LOCK:
+        fut = _INFLIGHT.get(key)
+        if fut is not None:
+            return fut, False
+        fut = _INFLIGHT[key] = Future()
+        return fut, True
+
+
+def _inflight_release(key: tuple) -> None:
+    with _INFLIGHT_LOCK:
+        _INFLIGHT.pop(key, None)
+
+
+# 存储配置与后端实例缓存：避免每次请求都 SELECT 配置并重建后端（S3 客户端冷启动代价高）。
+# 键包含数据域（组织/管理员/隔离开关），与 storage_config_crud.get 的可见性保持一致。
+_BACKEND_CACHE_TTL = 60.0
+_BACKEND_CACHE: dict[tuple, tuple[float, SimpleNamespace, object]] = {}
+_BACKEND_CACHE_LOCK = threading.Lock()
+
+
+def _get_cached_backend(db: Session, storage_id: int):
+    scope = get_scope()
+    key = (storage_id, scope.organization_id, bool(scope.is_admin), bool(scope.isolation_enabled))
+    now = time.monotonic()
+    with _BACKEND_CACHE_LOCK:
+        hit = _BACKEND_CACHE.get(key)
+    if hit is not None and hit[0] > now:
+        return hit[1], hit[2]
+
+    cfg = storage_config_crud.get(db, storage_id)
+    if cfg is None:
+        raise AppException("存储源不存在或已删除", HTTP_STATUS_NOT_FOUND)
+    backend = build_backend(
+        type=cfg.type,
+        region=cfg.region,
+        bucket_name=cfg.bucket_name,
+        path_prefix=cfg.path_prefix,
+        local_root_path=cfg.local_root_path,
+        access_key_id=cfg.access_key_id,
+        secret_access_key=cfg.secret_access_key,
+        endpoint_url=getattr(cfg, "endpoint_url", None),
+        custom_domain=getattr(cfg, "custom_domain", None),
+        use_https=getattr(cfg, "use_https", True),
+        acl_type=getattr(cfg, "acl_type", "private"),
+    )
+    # 只保留用到的字段快照，避免跨会话持有 ORM 实例
+    snapshot = SimpleNamespace(id=cfg.id, type=cfg.type, local_root_path=cfg.local_root_path)
+    with _BACKEND_CACHE_LOCK:
+        _BACKEND_CACHE[key] = (now + _BACKEND_CACHE_TTL, snapshot, backend)
+    return snapshot, backend
+
+
+_SPOOL_CHUNK = 64 * 1024
+
+_IMAGE_EXTS = frozenset({".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tiff", ".svg"})
+
+
+def _split_ext(base: str) -> Tuple[str, str]:
+    """把基名拆成 (stem, suffix)，语义同 Path.stem/Path.suffix，但不构造 Path 对象。"""
+    i = base.rfind(".")
+    if 0 < i < len(base) - 1:
+        return base[:i], base[i:]
+    return base, ""
+
 
 def _is_image_name(name: str) -> bool:
-    ext = Path(name or "").suffix.lower()
-    return ext in {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tiff", ".svg"}
+    base = (name or "").rsplit("/", 1)[-1]
+    return _split_ext(base)[1].lower() in _IMAGE_EXTS
 
 
 class ThumbnailService:
@@ -36,6 +213,8 @@ class ThumbnailService:
     DEFAULT_FMT = "webp"  # webp/jpeg/png
     DEFAULT_QUALITY = 75
     MAX_ORIG_BYTES = 20 * 1024 * 1024  # 20MB 安全上限
+    SPOOL_MAX_BYTES = 1024 * 1024  # S3 原图超过该大小时转存到磁盘临时文件
+    WEBP_METHOD = 4  # libwebp 压缩档位（0~6）：6 的 CPU 约为 4 的数倍，缩略图上体积差异可忽略
 
     def get_or_create(
         self,
@@ -64,53 +243,80 @@ class ThumbnailService:
         if not _is_image_name(rel):
             raise AppException("仅支持图片生成缩略图", HTTP_STATUS_BAD_REQUEST)
 
-        cfg = storage_config_crud.get(db, storage_id)
-        if cfg is None:
-            raise AppException("存储源不存在或已删除", HTTP_STATUS_NOT_FOUND)
-
-        backend = build_backend(
-            type=cfg.type,
-            region=cfg.region,
-            bucket_name=cfg.bucket_name,
-            path_prefix=cfg.path_prefix,
-            local_root_path=cfg.local_root_path,
-            access_key_id=cfg.access_key_id,
-            secret_access_key=cfg.secret_access_key,
-            endpoint_url=getattr(cfg, "endpoint_url", None),
-            custom_domain=getattr(cfg, "custom_domain", None),
-            use_https=getattr(cfg, "use_https", True),
-            acl_type=getattr(cfg, "acl_type", "private"),
-        )
+        cfg, backend = _get_cached_backend(db, storage_id)
 
         # 根据运行环境能力决定最终输出格式（例如 Pillow 未启用 webp 时退回 jpg）
         eff_fmt = self._effective_format(fmt_req)
 
+        # 本地原图的版本（mtime, 大小）：一次 stat 即可取得，用于校验进程内与磁盘上的缩略图是否过期
+        orig_version = None
+        if isinstance(backend, LocalBackend):
+            try:
+                st = (backend.root / rel.lstrip("/")).stat()
+            except OSError:
+                raise AppException("原始图片不存在", HTTP_STATUS_NOT_FOUND)
+            orig_version = (st.st_mtime_ns, st.st_size)
+
+        # 进程内缓存命中：直接返回字节，不触达存储
+        cache_key = (storage_id, rel, width, height, eff_fmt, quality, orig_version)
+        cached = _thumb_cache_get(cache_key)
+        if cached is not None:
+            return Response(content=cached, media_type=self._mime_for(eff_fmt))
+
         # 目标缩略图相对存储路径（基于最终输出格式计算文件名）
         thumb_dir, thumb_name = self._thumb_relpath(rel, width, height, eff_fmt, backend)
 
         # 命中缓存：直接返回
         if isinstance(backend, LocalBackend):
-            abs_thumb = Path(cfg.local_root_path).resolve() / thumb_dir.lstrip("/") / thumb_name
-            if abs_thumb.exists():
+            # LocalBackend.root 在构建时已 resolve，且后端按存储缓存复用，这里无需再逐级 stat
+            abs_thumb = backend.root / thumb_dir.lstrip("/") / thumb_name
+            try:
+                fresh = abs_thumb.stat().st_mtime_ns >= orig_version[0]
+            except OSError:
+                fresh = False
+            # 原图在缩略图生成之后被替换时重新生成
+            if fresh:
                 return FileResponse(str(abs_thumb), media_type=self._mime_for(fmt), filename=thumb_name)
         else:  # S3
+            thumb_rel = f"{thumb_dir}{thumb_name}"
+            # preview 只在本地拼直链或预签名；已知存在时直接返回，省去 HeadObject 往返
+            if _s3_known_has((storage_id, thumb_rel)):
+                return backend.preview(path=thumb_rel)
             try:
                 s3: S3Backend = backend  # type: ignore
-                key = s3._join_key(f"{thumb_dir}{thumb_name}")
+                key = s3._join_key(thumb_rel)
                 s3._client.head_object(Bucket=s3.bucket, Key=key)
+                _s3_known_add((storage_id, thumb_rel))
                 # 缓存命中：复用 S3Backend 预览（直链或预签名）
-                return backend.preview(path=f"{thumb_dir}{thumb_name}")
+                return backend.preview(path=thumb_rel)
             except Exception:
                 pass
 
-        # 缓存未命中：生成（不再自动回退原图，直接暴露真实错误，便于定位根因）
-        image_bytes = self._load_original_bytes(cfg, backend, rel)
-        thumb_bytes = self._make_thumbnail(image_bytes, width=width, height=height, fmt=eff_fmt, quality=quality)
+        # 缓存未命中：同一缩略图并发请求只生成一次，其余请求直接复用生成结果
+        fut, leader = _inflight_acquire(cache_key)
+        if not leader:
+            return Response(content=fut.result(), media_type=self._mime_for(eff_fmt))
+        try:
+            # 生成（不再自动回退原图，直接暴露真实错误，便于定位根因）
+            source = self._open_original(cfg, backend, rel)
+            try:
+                thumb_bytes = self._make_thumbnail(source, width=width, height=height, fmt=eff_fmt, quality=quality)
+            finally:
+                try:
+                    source.close()
+                except Exception:
+                    pass
+            _thumb_cache_put(cache_key, thumb_bytes)
+            fut.set_result(thumb_bytes)
+        except BaseException as exc:
+            fut.set_exception(exc)
+            raise
+        finally:
+            _inflight_release(cache_key)
 
         # 写入存储
         if isinstance(backend, LocalBackend):
-            root = Path(cfg.local_root_path).resolve()
-            dst_dir = (root / thumb_dir.lstrip("/")).resolve()
+            dst_dir = backend.root / thumb_dir.lstrip("/")
             dst_dir.mkdir(parents=True, exist_ok=True)
             abs_thumb = dst_dir / thumb_name
             with open(abs_thumb, "wb") as f:
@@ -119,101 +325,180 @@ class ThumbnailService:
         else:
             # 上传到 thumbnails 目录
             backend.upload(path=thumb_dir, files=[(thumb_name, thumb_bytes)])
+            _s3_known_add((storage_id, f"{thumb_dir}{thumb_name}"))
             return backend.preview(path=f"{thumb_dir}{thumb_name}")
 
+    def invalidate(self, storage_id: int) -> None:
+        """丢弃某存储源的进程内缓存（缩略图字节与配置/后端实例）。
+
+        文件上传/复制/重命名/移动/删除后调用，避免返回旧内容或旧路径的缩略图；存储配置更新/删除后调用，使新配置立即生效。
+        """
+        _thumb_cache_drop(storage_id)
+        _s3_known_drop(storage_id)
+        with _BACKEND_CACHE_LOCK:
+            for key in [k for k in _BACKEND_CACHE if k[0] == storage_id]:
+                _BACKEND_CACHE.pop(key, None)
+
     # --------------------- helpers ---------------------
     def _thumb_relpath(self, rel: str, w: int, h: Optional[int], fmt: str, backend) -> Tuple[str, str]:
         # rel: "/dir/a.jpg" -> dir="/dir", name="a", ext
-        parent = "/" + rel.strip("/").rsplit("/", 1)[0] if "/" in rel.strip("/") else "/"
-        base = rel.strip("/").rsplit("/", 1)[-1]
-        stem = Path(base).stem
+        stripped = rel.strip("/")
+        dir_rel, _, base = stripped.rpartition("/")
         suffix = f"__w{w}{'x'+str(h) if h else ''}.{fmt}"
-        name = stem + suffix
+        name = _split_ext(base)[0] + suffix
         if isinstance(backend, LocalBackend):
             # 本地：/.thumbnails/<parent-without-trailing-slash>/
-            dir_rel = parent.rstrip("/")
-            return f"/.thumbnails{dir_rel if dir_rel else ''}/", name
+            return f"/.thumbnails/{dir_rel}/" if dir_rel else "/.thumbnails/", name
         else:
             # S3：thumbnails/<parent-without-leading-slash>/
-            dir_rel = rel.strip("/").rsplit("/", 1)[0] if "/" in rel.strip("/") else ""
             return f"/thumbnails/{dir_rel}/" if dir_rel else "/thumbnails/", name
 
-    def _load_original_bytes(self, cfg, backend, rel: str) -> bytes:
+    def _open_original(self, cfg, backend, rel: str) -> IO[bytes]:
+        """打开原图的可回绕只读流（本地为文件句柄，S3 为落盘的临时文件），由调用方负责关闭。
+
+        S3 响应 Body 不可 seek，Pillow 会把它整体读入内存缓冲；这里先分块转存到 SpooledTemporaryFile，
+        小图留在内存，超过 SPOOL_MAX_BYTES 的原图落到磁盘，解码器按需读取。
+        """
         if isinstance(backend, LocalBackend):
-            abs_path = Path(cfg.local_root_path).resolve() / rel.lstrip("/")
+            abs_path = backend.root / rel.lstrip("/")
             if not abs_path.exists() or not abs_path.is_file():
                 raise AppException("原始图片不存在", HTTP_STATUS_NOT_FOUND)
             if abs_path.stat().st_size > self.MAX_ORIG_BYTES:
                 raise AppException("原始图片过大，无法生成缩略图", HTTP_STATUS_BAD_REQUEST)
-            with open(abs_path, "rb") as f:
-                return f.read()
+            return open(abs_path, "rb")
         else:
             s3: S3Backend = backend  # type: ignore
             key = s3._join_key(rel)
-            # 过大限制（用 HeadObject 先看长度）
+            # 单次带 Range 的 GET 代替 HeadObject + GetObject：最多取 MAX_ORIG_BYTES+1 字节，
+            # 再由 ContentRange 的总长度（或多取到的那 1 字节）判断是否超限
+            obj = s3._client.get_object(Bucket=s3.bucket, Key=key, Range=f"bytes=0-{self.MAX_ORIG_BYTES}")
+            total = None
+            content_range = str(obj.get("ContentRange") or "")
+            if "/" in content_range:
+                try:
+                    total = int(content_range.rsplit("/", 1)[1])
+                except ValueError:
+                    total = None
+            if total is None:
+                total = int(obj.get("ContentLength") or 0)
+            if total > self.MAX_ORIG_BYTES:
+                try:
+                    obj["Body"].close()
+                except Exception:
+                    pass
+                raise AppException("原始图片过大，无法生成缩略图", HTTP_STATUS_BAD_REQUEST)
+            spool = tempfile.SpooledTemporaryFile(max_size=self.SPOOL_MAX_BYTES)
+            body = obj["Body"]
             try:
-                head = s3._client.head_object(Bucket=s3.bucket, Key=key)
-                size = int(head.get("ContentLength") or 0)
-                if size > self.MAX_ORIG_BYTES:
-                    raise AppException("原始图片过大，无法生成缩略图", HTTP_STATUS_BAD_REQUEST)
-            except AppException:
+                shutil.copyfileobj(body, spool, _SPOOL_CHUNK)
+            except BaseException:
+                spool.close()
                 raise
-            except Exception:
-                pass
-            obj = s3._client.get_object(Bucket=s3.bucket, Key=key)
-            return obj["Body"].read()
+            finally:
+                try:
+                    body.close()
+                except Exception:
+                    pass
+            spool.seek(0)
+            return spool
 
-    def _make_thumbnail(self, data: bytes, *, width: int, height: Optional[int], fmt: str, quality: int) -> bytes:
-        try:
-            from PIL import Image, features
-        except ImportError as exc:
-            # 这里提供精确的环境信息，帮助用户定位“为什么导入失败”
-            details = (
-                f"Pillow 导入失败: {exc};\n"
-                f"python={sys.version};\n"
-                f"exe={sys.executable}; platform={platform.platform()}; machine={platform.machine()}\n"
-                f"sys.path[0:3]={sys.path[:3]}"
-            )
-            # 延伸：把完整堆栈写入日志（不暴露给客户端）
-            try:
-                from app.packages.system.core.logger import logger  # 延迟导入避免循环
-                logger.error("Thumbnail import error: %s\n%s", details, traceback.format_exc())
-            except Exception:
-                pass
-            raise AppException(
-                "缩略图依赖加载失败：当前运行环境无法导入 Pillow。"
-                "请确认服务使用的 Python 解释器与安装 Pillow 的环境一致（例如通过 uv run uvicorn 启动），"
-                "或重新安装 Pillow 以匹配当前平台/架构。",
-                HTTP_STATUS_BAD_REQUEST,
-            ) from exc
+    def _make_thumbnail(
+        self, data: Union[bytes, IO[bytes]], *, width: int, height: Optional[int], fmt: str, quality: int
+    ) -> bytes:
+        if _pyvips is not None:
+            # 无文件名的流（如 S3 原图的临时文件）：vips 需要完整缓冲区，且失败后 Pillow 还要复用同一份数据
+            if hasattr(data, "read") and not isinstance(getattr(data, "name", None), str):
+                data = data.read()
+            thumb = self._make_thumbnail_vips(data, width=width, height=height, fmt=fmt, quality=quality)
+            if thumb is not None:
+                return thumb
+        if not _PIL_AVAILABLE:
+            self._raise_pillow_import_error()
 
         # 安全解码，部分格式需要转换
-        img = Image.open(io.BytesIO(data))
+        img = Image.open(data if hasattr(data, "read") else io.BytesIO(data))
+        if img.format == "JPEG":
+            # JPEG 草稿模式：解码器直接按 1/2~1/8 DCT 缩放输出，保留 2 倍余量供后续高质量缩放
+            img.draft("RGB", (width * 2, (height or width) * 2))
         img = img.convert("RGB") if img.mode not in ("RGB", "RGBA") else img
 
         # 等比缩放到指定边界（cover/fit：这里采用最长边等比不超过 w/h）
         target = (width, height or width)
-        img.thumbnail(target, Image.LANCZOS)
+        # reducing_gap：先以 BOX 整数倍预缩小，再对小图做 LANCZOS，画质几乎无差异
+        img.thumbnail(target, Image.LANCZOS, reducing_gap=3.0)
 
         # 输出
         out = io.BytesIO()
         fmt_lc = fmt.lower()
         # 如果请求 webp 但运行环境未启用 webp，则回退到 JPEG
-        if fmt_lc == "webp" and hasattr(features, "check") and not features.check("webp"):
+        if fmt_lc == "webp" and not _HAS_WEBP:
             fmt_lc = "jpeg"
         try:
+            # 缩略图体积很小，省去 optimize 的额外 Huffman/zlib-9 编码轮次
             if fmt_lc == "png":
-                img.save(out, format="PNG", optimize=True)
+                img.save(out, format="PNG", compress_level=3)
             elif fmt_lc in ("jpg", "jpeg"):
-                img.save(out, format="JPEG", quality=quality, optimize=True)
+                img.save(out, format="JPEG", quality=quality, optimize=False, progressive=False)
             else:  # webp
-                img.save(out, format="WEBP", quality=quality, method=6)
+                img.save(out, format="WEBP", quality=quality, method=self.WEBP_METHOD)
         except Exception:
             # 最终兜底：若指定格式保存失败，尝试以 PNG 输出
             out = io.BytesIO()
-            img.save(out, format="PNG", optimize=True)
+            img.save(out, format="PNG", compress_level=3)
         return out.getvalue()
 
+    def _raise_pillow_import_error(self) -> None:
+        """重新导入 Pillow 以取得真实异常，并附带运行环境信息抛出。"""
+        try:
+            from PIL import Image  # noqa: F401
+            exc: Exception = ImportError("Pillow 在服务启动时导入失败")
+        except Exception as import_exc:
+            exc = import_exc
+        # 这里提供精确的环境信息，帮助用户定位“为什么导入失败”
+        details = (
+            f"Pillow 导入失败: {exc};\n"
+            f"python={sys.version};\n"
+            f"exe={sys.executable}; platform={platform.platform()}; machine={platform.machine()}\n"
+            f"sys.path[0:3]={sys.path[:3]}"
+        )
+        # 延伸：把完整堆栈写入日志（不暴露给客户端）
+        try:
+            from app.packages.system.core.logger import logger  # 延迟导入避免循环
+            logger.error("Thumbnail import error: %s\n%s", details, traceback.format_exc())
+        except Exception:
+            pass
+        raise AppException(
+            "缩略图依赖加载失败：当前运行环境无法导入 Pillow。"
+            "请确认服务使用的 Python 解释器与安装 Pillow 的环境一致（例如通过 uv run uvicorn 启动），"
+            "或重新安装 Pillow 以匹配当前平台/架构。",
+            HTTP_STATUS_BAD_REQUEST,
+        ) from exc
+
+    def _make_thumbnail_vips(
+        self, data: Union[bytes, IO[bytes]], *, width: int, height: Optional[int], fmt: str, quality: int
+    ) -> Optional[bytes]:
+        """使用 libvips 生成缩略图：解码阶段即按目标尺寸缩小（JPEG 走 DCT 缩放），不分配全尺寸位图。
+
+        pyvips 不可用或处理失败时返回 None，由调用方回退到 Pillow。
+        """
+        if _pyvips is None:
+            return None
+        fmt_lc = fmt.lower()
+        try:
+            # size="down"：与 Pillow thumbnail 一致，只缩小不放大
+            if hasattr(data, "read"):
+                # 本地文件：按文件名交给 libvips 自行读取，不经 Python 缓冲
+                img = _pyvips.Image.thumbnail(data.name, width, height=height or width, size="down")
+            else:
+                img = _pyvips.Image.thumbnail_buffer(data, width, height=height or width, size="down")
+            if fmt_lc == "png":
+                return img.write_to_buffer(".png[strip]")
+            if fmt_lc in ("jpg", "jpeg"):
+                return img.write_to_buffer(f".jpg[Q={quality},strip]")
+            return img.write_to_buffer(f".webp[Q={quality},effort={self.WEBP_METHOD},strip]")
+        except Exception:
+            return None
+
     def _mime_for(self, fmt: str) -> str:
         m = fmt.lower()
         if m == "png":
@@ -231,14 +516,8 @@ class ThumbnailService:
         req = (requested or self.DEFAULT_FMT).lower()
         if req != "webp":
             return req
-        try:
-            from PIL import features  # type: ignore
-            if hasattr(features, "check") and features.check("webp"):
-                return "webp"
-            return "jpeg"
-        except Exception:
-            # 无法检测能力时保守回退为 jpeg
-            return "jpeg"
+        # 无法检测能力（Pillow 不可用）时保守回退为 jpeg
+        return "webp" if _HAS_WEBP else "jpeg"
 
 
 thumbnail_service = ThumbnailService()
@@ -3,8 +3,14 @@
 from __future__ import annotations
 
 import io
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Iterable, Optional
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
+from typing import IO, Iterable, Iterator, Optional
 
 from fastapi import UploadFile
 from fastapi.responses import StreamingResponse
@@ -32,6 +38,76 @@ from app.packages.system.models.organization import Organization
 from app.packages.system.models.role import Role
 from app.packages.system.models.user import User
 
+try:  # 可选依赖：pyexcelerate 以批量数据接口写 xlsx，比 openpyxl 快数倍；需整表数据在内存中，仅用于固定的导入模版
+    from pyexcelerate import Workbook as _FastWorkbook  # type: ignore
+except ImportError:  # pragma: no cover - 取决于运行环境
+    _FastWorkbook = None
+
+_XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# 导出文件在内存中保留的上限，超过后落到临时文件；响应按块读取发送
+_EXPORT_SPOOL_BYTES = 4 * 1024 * 1024
+_EXPORT_CHUNK_BYTES = 64 * 1024
+_IMPORT_HEADERS = ("用户名", "密码", "用户昵称", "状态", "角色", "备注")
+_IMPORT_HEADER_WIDTH = len(_IMPORT_HEADERS)
+# 导入按批处理的行数：每批独立完成校验、哈希与写入提交
+_IMPORT_BATCH_SIZE = 500
+
+
+def _write_xlsx(title: str, headers: list, rows: Iterable[list], buffer: Optional[IO[bytes]] = None) -> IO[bytes]:
+    """把表头与数据行写成单工作表 xlsx，返回已回绕到开头的缓冲区（默认 BytesIO）。
+
+    使用 openpyxl 只写模式逐行流式写入，不为每个单元格保留 Cell 对象，rows 可以是生成器。
+    """
+    if buffer is None:
+        buffer = io.BytesIO()
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title)
+    sheet.append(headers)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+@lru_cache(maxsize=1)
+def _template_bytes() -> bytes:
+    """导入模版内容固定不变：进程内只生成一次，后续请求直接复用字节。"""
+    title = "用户导入模板"
+    rows = [
+        list(_IMPORT_HEADERS),
+        ["demo", "password123", "演示用户", UserStatusEnum.NORMAL.value, "1", "示例备注，可留空"],
+    ]
+    if _FastWorkbook is not None:
+        # 模版只有两行，整表放入内存无妨；导出仍走 _write_xlsx 的流式写入
+        buffer = io.BytesIO()
+        workbook = _FastWorkbook()
+        workbook.new_sheet(title, data=rows)
+        workbook.save(buffer)
+        return buffer.getvalue()
+    return _write_xlsx(title, rows[0], rows[1:]).getvalue()
+
+
+def _hash_passwords(passwords: list[str]) -> list[str]:
+    """并行计算 bcrypt 哈希；bcrypt 的 C 扩展在计算时释放 GIL，线程池即可线性扩展。"""
+    if len(passwords) <= 1:
+        return [get_password_hash(password) for password in passwords]
+    workers = min(len(passwords), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(get_password_hash, passwords))
+
+
+def _iter_chunks(fileobj: IO[bytes]) -> Iterator[bytes]:
+    """按块读取并在结束（或客户端断开）后关闭文件。"""
+    try:
+        while True:
+            chunk = fileobj.read(_EXPORT_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        fileobj.close()
+
 
 class UserService:
     """聚合用户相关的核心业务能力。"""
@@ -40,15 +116,22 @@ class UserService:
         UserStatusEnum.NORMAL.value: "正常",
         UserStatusEnum.DISABLED.value: "停用",
     }
-
-    _IMPORT_HEADERS = ("用户名", "密码", "用户昵称", "状态", "角色", "备注")
+    # 状态编码与（小写）中文标签统一映射到编码，类定义时一次性构建
+    _STATUS_TOKEN_MAP = {code: code for code in _STATUS_LABELS} | {
+        label.lower(): code for code, label in _STATUS_LABELS.items()
+    }
 
     # ------------------------------------------------------------------
     # 个人信息
     # ------------------------------------------------------------------
 
-    def build_user_profile(self, user: User) -> dict:
-        """整理用户所属组织、角色与权限，构造统一响应。"""
+    def build_user_profile(self, user: User, db: Optional[Session] = None) -> dict:
+        """整理用户所属组织、角色与权限，构造统一响应。
+
+        传入 `db` 时先按预加载选项重新读取用户，整棵角色/权限树一次取回，避免逐角色懒加载。
+        """
+        if db is not None:
+            user = user_crud.get_with_permissions(db, user.id) or user
         organization = None
         if user.organization is not None:
             organization = {
@@ -56,18 +139,18 @@ class UserService:
                 "org_name": user.organization.name,
             }
 
-        roles = [role.name for role in user.roles]
+        roles: list[str] = []
         permission_codes: set[str] = set()
+        add_code = permission_codes.add
         for role in user.roles:
-            permission_codes.update(
-                perm.name for perm in role.permissions if getattr(perm, "name", None)
-            )
-            permission_codes.update(
-                item.permission_code
-                for item in getattr(role, "access_controls", [])
-                if getattr(item, "permission_code", None)
-            )
-        permissions = sorted(code for code in permission_codes if code)
+            roles.append(role.name)
+            for perm in role.permissions:
+                if perm.name:
+                    add_code(perm.name)
+            for item in role.access_controls:
+                if item.permission_code:
+                    add_code(item.permission_code)
+        permissions = sorted(permission_codes)
 
         data = {
             "user_id": user.id,
@@ -133,9 +216,12 @@ class UserService:
         remark: Optional[str] = None,
         organization_id: Optional[int] = None,
     ) -> dict:
-        trimmed_username = (username or "").strip()
+        trimmed_username = username.strip() if username else ""
         if not trimmed_username:
             raise AppException("用户名不能为空", HTTP_STATUS_BAD_REQUEST)
+        # 明显不合规的密码在查询数据库与 bcrypt 计算之前拒绝
+        if not password or len(password) < 6:
+            raise AppException("密码长度不能少于 6 位", HTTP_STATUS_BAD_REQUEST)
 
         # 保留账户：不允许创建用户名为 admin 的用户
         if trimmed_username.lower() == DEFAULT_ADMIN_USERNAME:
@@ -200,9 +286,9 @@ class UserService:
         if roles is not None:
             user.roles = roles
 
-        db.add(user)
+        # user 已挂在会话中，无需 db.add；提交后属性过期，序列化首次访问时按需重新加载，
+        # 不再额外 refresh
         db.commit()
-        db.refresh(user)
 
         data = self._serialize_user_detail(user)
         return create_response("更新用户成功", data, HTTP_STATUS_OK)
@@ -223,16 +309,15 @@ class UserService:
         if user is None:
             raise AppException("用户不存在或已删除", HTTP_STATUS_NOT_FOUND)
 
-        trimmed = (new_password or "").strip()
+        trimmed = new_password.strip() if new_password else ""
         if len(trimmed) < 6:
             raise AppException("密码长度不能少于 6 位", HTTP_STATUS_BAD_REQUEST)
 
         user.hashed_password = get_password_hash(trimmed)
-        db.add(user)
         db.commit()
-        db.refresh(user)
 
-        payload = {"user_id": user.id}
+        # 直接使用入参 user_id，避免提交后访问过期属性触发重新加载
+        payload = {"user_id": user_id}
         return create_response("重置密码成功", payload, HTTP_STATUS_OK)
 
     # ------------------------------------------------------------------
@@ -249,85 +334,116 @@ class UserService:
         end_time: Optional[datetime] = None,
     ) -> StreamingResponse:
         normalized_statuses = self._normalize_statuses(statuses)
-        items, _ = user_crud.list_with_filters(
+        # 分块读取用户并逐行写入：不再一次性物化全部用户与整份文件
+        items = user_crud.iter_with_filters(
             db,
             username=username,
             statuses=normalized_statuses,
             start_time=start_time,
             end_time=end_time,
-            skip=0,
             limit=10_000,
         )
-
-        workbook = Workbook()
-        sheet = workbook.active
-        sheet.title = "用户列表"
-        sheet.append(["用户名称", "用户昵称", "状态", "角色", "创建时间", "备注"])
-
-        for item in items:
-            sheet.append(
-                [
-                    item.username,
-                    item.nickname or "",
-                    self._STATUS_LABELS.get(item.status, item.status),
-                    ", ".join(sorted(role.name for role in item.roles)),
-                    format_datetime(item.create_time) or "",
-                    item.remark or "",
-                ]
-            )
-
-        buffer = io.BytesIO()
-        workbook.save(buffer)
-        buffer.seek(0)
+        # 循环内用到的方法提前绑定为局部名，省去每行的属性/全局查找
+        status_label = self._STATUS_LABELS.get
+        fmt = format_datetime
+        join = ", ".join
+        rows = (
+            [
+                item.username,
+                item.nickname or "",
+                status_label(item.status, item.status),
+                join(sorted(role.name for role in item.roles)),
+                fmt(item.create_time) or "",
+                item.remark or "",
+            ]
+            for item in items
+        )
+        spool = tempfile.SpooledTemporaryFile(max_size=_EXPORT_SPOOL_BYTES)
+        try:
+            _write_xlsx("用户列表", ["用户名称", "用户昵称", "状态", "角色", "创建时间", "备注"], rows, spool)
+        except Exception:
+            spool.close()
+            raise
 
         timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
         filename = f"users-{timestamp}.xlsx"
         response = StreamingResponse(
-            buffer,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            _iter_chunks(spool),
+            media_type=_XLSX_MEDIA_TYPE,
         )
         response.headers["Content-Disposition"] = f"attachment; filename={filename}"
         return response
 
     def download_template(self) -> StreamingResponse:
-        workbook = Workbook()
-        sheet = workbook.active
-        sheet.title = "用户导入模板"
-        sheet.append(list(self._IMPORT_HEADERS))
-        sheet.append(["demo", "password123", "演示用户", UserStatusEnum.NORMAL.value, "1", "示例备注，可留空"])
-
-        buffer = io.BytesIO()
-        workbook.save(buffer)
-        buffer.seek(0)
         response = StreamingResponse(
-            buffer,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            io.BytesIO(_template_bytes()),
+            media_type=_XLSX_MEDIA_TYPE,
         )
         response.headers["Content-Disposition"] = "attachment; filename=user-template.xlsx"
         return response
 
     def import_users(self, db: Session, *, file: UploadFile) -> dict:
-        content = file.file.read()
-        if not content:
+        stream = file.file
+        stream.seek(0, os.SEEK_END)
+        if stream.tell() == 0:
             raise AppException("导入文件不能为空", HTTP_STATUS_BAD_REQUEST)
+        stream.seek(0)
 
-        workbook = load_workbook(io.BytesIO(content), data_only=True)
-        sheet = workbook.active
-        header_iter = sheet.iter_rows(min_row=1, max_row=1, values_only=True)
-        try:
-            first_header = next(header_iter)
-        except StopIteration as exc:  # pragma: no cover - 防御性判断
-            raise AppException("导入模版不匹配，请下载最新模版", HTTP_STATUS_BAD_REQUEST) from exc
-        header_row = [self._normalize_optional_text(cell) for cell in first_header]
-        if tuple(header_row[: len(self._IMPORT_HEADERS)]) != self._IMPORT_HEADERS:
-            raise AppException("导入模版不匹配，请下载最新模版", HTTP_STATUS_BAD_REQUEST)
-
-        role_lookup = self._prepare_role_lookup(db)
-        pending: list[dict] = []
         errors: list[dict[str, str]] = []
         seen_usernames: set[str] = set()
+        created_count = 0
+        total = 0
+
+        # 只读模式以流式方式解析工作表，不为每个单元格构建 Cell 对象；
+        # 数据行按批次校验、哈希与写入，内存占用只与批次大小相关
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+        try:
+            sheet = workbook.active
+            row_iter = sheet.iter_rows(min_row=1, values_only=True)
+            try:
+                first_header = next(row_iter)
+            except StopIteration as exc:  # pragma: no cover - 防御性判断
+                raise AppException("导入模版不匹配，请下载最新模版", HTTP_STATUS_BAD_REQUEST) from exc
+            # 模版未被改动时直接元组比较命中；仅不一致时再做逐格规范化比较
+            if tuple(first_header[:_IMPORT_HEADER_WIDTH]) != _IMPORT_HEADERS:
+                header_row = [self._normalize_optional_text(cell) for cell in first_header[:_IMPORT_HEADER_WIDTH]]
+                if tuple(header_row) != _IMPORT_HEADERS:
+                    raise AppException("导入模版不匹配，请下载最新模版", HTTP_STATUS_BAD_REQUEST)
+
+            # 只读模式依赖工作表的 <dimension> 补齐短行；缺少该元素时（如 write_only 生成的文件）
+            # 行尾空单元格会被直接省略，这里按模版列宽补 None，后续可按下标取值
+            padded_rows = (
+                cells + (None,) * (_IMPORT_HEADER_WIDTH - len(cells)) if len(cells) < _IMPORT_HEADER_WIDTH else cells
+                for cells in row_iter
+            )
+            numbered_rows = enumerate(padded_rows, start=2)
+            while batch := list(islice(numbered_rows, _IMPORT_BATCH_SIZE)):
+                created, pending_count = self._import_batch(db, batch, errors, seen_usernames)
+                created_count += created
+                total += pending_count
+        finally:
+            workbook.close()
+
+        errors.sort(key=itemgetter("row"))
+        payload = {"created": created_count, "failed": errors, "total": total}
+        return create_response("导入用户完成", payload, HTTP_STATUS_OK)
 
-        for row_index, cells in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
+    def _import_batch(
+        self,
+        db: Session,
+        batch: list[tuple[int, tuple]],
+        errors: list[dict[str, str]],
+        seen_usernames: set[str],
+    ) -> tuple[int, int]:
+        """校验并写入一批导入行，返回（创建数, 通过校验的行数）；错误追加到 errors。"""
+
+        # 先收集本批的角色标识，再一次性按标识查询角色，避免加载整张角色表
+        role_lookup = self._prepare_role_lookup(
+            db, (token for _, cells in batch for token in self._split_role_tokens(cells[4]))
+        )
+        pending: list[dict] = []
+
+        for row_index, cells in batch:
             username = self._normalize_optional_text(cells[0])
             password = self._normalize_optional_text(cells[1])
             nickname = self._normalize_optional_text(cells[2])
@@ -371,54 +487,48 @@ class UserService:
                 }
             )
 
-        if not pending:
-            payload = {"created": 0, "failed": errors, "total": 0}
-            return create_response("导入用户完成", payload, HTTP_STATUS_OK)
-
-        existing_map = {
-            user.username: user
-            for user in user_crud.list_by_usernames(db, (item["username"] for item in pending))
-        }
-
-        created_count = 0
+        to_create: list[dict] = []
         for item in pending:
             # 禁止通过导入创建系统管理员账号
             if (item["username"] or "").strip().lower() == DEFAULT_ADMIN_USERNAME:
                 errors.append({"row": item["row"], "message": "系统内置管理员用户名已保留，禁止创建"})
                 continue
-            if item["username"] in existing_map:
-                errors.append({"row": item["row"], "message": "用户名已存在"})
-                continue
+            to_create.append(item)
 
-            hashed_password = get_password_hash(item["password"])
-            user_crud.create_with_roles(
-                db,
-                username=item["username"],
-                hashed_password=hashed_password,
-                nickname=item["nickname"],
-                organization_id=None,
-                status=item["status"],
-                remark=item["remark"],
-                roles=item["roles"],
-            )
-            created_count += 1
+        hashed = _hash_passwords([item.pop("password") for item in to_create])
+        for item, hashed_password in zip(to_create, hashed):
+            item["hashed_password"] = hashed_password
 
-        payload = {"created": created_count, "failed": errors, "total": len(pending)}
-        return create_response("导入用户完成", payload, HTTP_STATUS_OK)
+        # 校验与哈希完成后本批一次性写入（用户 + 角色关联），单次提交；
+        # 用户名去重交给唯一约束，未被写入的即为已存在的用户名
+        created = user_crud.bulk_create_with_roles(db, to_create)
+        for item in to_create:
+            if item["username"] not in created:
+                errors.append({"row": item["row"], "message": "用户名已存在"})
+        return len(created), len(pending)
 
     # ------------------------------------------------------------------
     # 内部辅助方法
     # ------------------------------------------------------------------
 
     def _serialize_user_summary(self, user: User) -> dict:
+        # 角色 id/名称单次遍历收集，避免两次生成器迭代与重复属性查找
+        role_ids: list[int] = []
+        role_names: list[str] = []
+        for role in user.roles:
+            role_ids.append(role.id)
+            role_names.append(role.name)
+        role_ids.sort()
+        role_names.sort()
+        status = user.status
         return {
             "user_id": user.id,
             "username": user.username,
             "nickname": user.nickname,
-            "status": user.status,
-            "status_label": self._STATUS_LABELS.get(user.status, user.status),
-            "role_ids": sorted(role.id for role in user.roles),
-            "role_names": sorted(role.name for role in user.roles),
+            "status": status,
+            "status_label": self._STATUS_LABELS.get(status, status),
+            "role_ids": role_ids,
+            "role_names": role_names,
             "organization": self._serialize_organization(user.organization),
             "remark": user.remark,
             "create_time": format_datetime(user.create_time),
@@ -449,12 +559,10 @@ class UserService:
         token = (status or "").strip().lower()
         if not token:
             raise AppException("用户状态不能为空", HTTP_STATUS_BAD_REQUEST)
-        for code, label in self._STATUS_LABELS.items():
-            if token == code:
-                return code
-            if token == label.lower():
-                return code
-        raise AppException("未知的用户状态", HTTP_STATUS_BAD_REQUEST)
+        code = self._STATUS_TOKEN_MAP.get(token)
+        if code is None:
+            raise AppException("未知的用户状态", HTTP_STATUS_BAD_REQUEST)
+        return code
 
     @staticmethod
     def _normalize_optional_text(value: Optional[str]) -> Optional[str]:
@@ -466,20 +574,13 @@ class UserService:
     def _load_roles(self, db: Session, role_ids: Optional[Iterable[int]]) -> Optional[list[Role]]:
         if role_ids is None:
             return None
-        unique_order: list[int] = []
-        seen: set[int] = set()
-        for item in role_ids:
-            if item is None:
-                continue
-            if item in seen:
-                continue
-            seen.add(item)
-            unique_order.append(item)
+        # dict.fromkeys 保序去重
+        unique_order = [item for item in dict.fromkeys(role_ids) if item is not None]
         if not unique_order:
             return []
 
         roles = role_crud.list_by_ids(db, unique_order)
-        missing = set(unique_order) - {role.id for role in roles}
+        missing = set(unique_order).difference(role.id for role in roles)
         if missing:
             raise AppException(
                 f"部分角色不存在：{', '.join(str(item) for item in sorted(missing))}",
@@ -495,8 +596,8 @@ class UserService:
             raise AppException("组织机构不存在", HTTP_STATUS_NOT_FOUND)
         return organization
 
-    def _prepare_role_lookup(self, db: Session) -> dict[str, Role]:
-        roles = role_crud.get_multi(db, skip=0, limit=10_000)
+    def _prepare_role_lookup(self, db: Session, tokens: Iterable[str]) -> dict[str, Role]:
+        roles = role_crud.list_by_tokens(db, tokens)
         lookup: dict[str, Role] = {}
         for role in roles:
             lookup[str(role.id)] = role
@@ -510,19 +611,9 @@ class UserService:
         lookup: dict[str, Role],
         raw_tokens: Optional[object],
     ) -> list[Role]:
-        if raw_tokens is None or raw_tokens == "":
-            return []
-        if isinstance(raw_tokens, (list, tuple)):
-            tokens = raw_tokens
-        else:
-            tokens = str(raw_tokens).replace("，", ",").split(",")
-
         resolved: list[Role] = []
         seen: set[int] = set()
-        for token in tokens:
-            normalized = str(token).strip()
-            if not normalized:
-                continue
+        for normalized in self._split_role_tokens(raw_tokens):
             candidate = lookup.get(normalized.lower())
             if candidate is None and normalized.isdigit():
                 candidate = lookup.get(normalized)
@@ -534,5 +625,15 @@ class UserService:
             resolved.append(candidate)
         return resolved
 
+    @staticmethod
+    def _split_role_tokens(raw_tokens: Optional[object]) -> list[str]:
+        if raw_tokens is None or raw_tokens == "":
+            return []
+        if isinstance(raw_tokens, (list, tuple)):
+            tokens = raw_tokens
+        else:
+            tokens = str(raw_tokens).replace("，", ",").split(",")
+        return [normalized for normalized in (str(token).strip() for token in tokens) if normalized]
+
 
 user_service = UserService()
@@ -7,7 +7,12 @@ These helpers centralize the rules used across file_service/sync_service:
 
 from __future__ import annotations
 
+from functools import lru_cache
 
+
+# Pure functions of one hashable argument, called on every file/sync op with
+# heavily repeated keys ('/', project roots): cache to skip re-allocation.
+@lru_cache(maxsize=4096)
 def norm_abs_path(p: str | None) -> str:
     s = (p or "/").strip() or "/"
     if not s.startswith("/"):
@@ -16,6 +21,7 @@ def norm_abs_path(p: str | None) -> str:
     return s
 
 
+@lru_cache(maxsize=4096)
 def norm_dir_key(p: str | None) -> str:
     s = norm_abs_path(p)
     s = s.rstrip("/")
@@ -9,7 +9,7 @@ from typing import Callable
 from fastapi import APIRouter
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AppPackage:
     """描述一个业务包暴露给主应用的必要接口。"""
 
@@ -58,6 +58,8 @@ ALTER TABLE roles ADD COLUMN IF NOT EXISTS created_by INTEGER NOT NULL DEFAULT 1
 ALTER TABLE roles ADD COLUMN IF NOT EXISTS organization_id INTEGER NOT NULL DEFAULT 1;
 CREATE INDEX IF NOT EXISTS idx_roles_created_by ON roles(created_by);
 CREATE INDEX IF NOT EXISTS idx_roles_organization_id ON roles(organization_id);
+CREATE INDEX IF NOT EXISTS idx_roles_lower_name ON roles(LOWER(name));
+CREATE INDEX IF NOT EXISTS idx_roles_lower_role_key ON roles(LOWER(role_key));
 
 CREATE TABLE IF NOT EXISTS permissions (
     id SERIAL PRIMARY KEY,
@@ -346,6 +348,8 @@ CREATE INDEX IF NOT EXISTS idx_file_records_created_by ON file_records(created_b
 CREATE INDEX IF NOT EXISTS idx_file_records_organization_id ON file_records(organization_id);
 
 CREATE INDEX IF NOT EXISTS idx_file_records_storage_dir ON file_records(storage_id, directory);
+-- 子树前缀查询（directory LIKE '/a/%'）：text_pattern_ops 使 LIKE 前缀匹配可走索引范围扫描，不受库排序规则影响
+CREATE INDEX IF NOT EXISTS idx_file_records_storage_dir_prefix ON file_records(storage_id, directory text_pattern_ops);
 CREATE INDEX IF NOT EXISTS idx_file_records_purpose ON file_records(purpose);
 
 -- ---------------------------------------------------------------------------
@@ -392,6 +396,8 @@ END $$;
 
 -- 常用查询索引
 CREATE INDEX IF NOT EXISTS idx_fs_nodes_storage_path ON fs_nodes(storage_id, path);
+-- 子树前缀查询（path LIKE '/a/%'）：同上，供复制/移动/删除/同步清理的前缀过滤使用
+CREATE INDEX IF NOT EXISTS idx_fs_nodes_storage_path_prefix ON fs_nodes(storage_id, path text_pattern_ops);
 CREATE INDEX IF NOT EXISTS idx_fs_nodes_storage_name ON fs_nodes(storage_id, name);
 CREATE INDEX IF NOT EXISTS idx_fs_nodes_storage_time ON fs_nodes(storage_id, create_time);
 CREATE INDEX IF NOT EXISTS idx_fs_nodes_is_dir ON fs_nodes(is_dir);
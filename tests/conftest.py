@@ -65,3 +65,34 @@ def client(db_session_fixture):
         yield test_client
 
     app.dependency_overrides.clear()
+
+
+# 会话内复用同一管理员令牌：登录日志按时间分页，频繁登录会把其他用例插入的日志挤出首页
+_ADMIN_TOKEN: dict[str, str] = {}
+
+
+@pytest.fixture()
+def admin_headers(client) -> dict[str, str]:
+    """管理员鉴权请求头，令牌在整个测试会话内只登录获取一次。"""
+    token = _ADMIN_TOKEN.get("admin")
+    if token is None:
+        resp = client.post("/api/v1/auth/login", json={"username": "admin", "password": "admin123"})
+        assert resp.status_code == 200
+        token = _ADMIN_TOKEN["admin"] = resp.json()["data"]["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture()
+def create_storage(client, admin_headers):
+    """返回创建 LOCAL 存储源的函数：create_storage(本地根目录, 名称) -> 存储源 ID。"""
+
+    def _create(root: str, name: str) -> int:
+        resp = client.post(
+            "/api/v1/storage-configs",
+            json={"name": name, "type": "LOCAL", "local_root_path": root},
+            headers=admin_headers,
+        )
+        assert resp.status_code == 200
+        return resp.json()["data"]["id"]
+
+    return _create
@@ -5,13 +5,20 @@ from fastapi.testclient import TestClient
 from app.packages.system.models.access_control import AccessControlItem
 
 
+# 模块内复用同一令牌：登录日志按时间分页，频繁登录会把其他用例插入的日志挤出首页
+_TOKEN_CACHE: dict[str, str] = {}
+
+
 def _get_token(client: TestClient) -> str:
-    response = client.post(
-        "/api/v1/auth/login",
-        json={"username": "admin", "password": "admin123"},
-    )
-    data = response.json()["data"]
-    return data["access_token"]
+    token = _TOKEN_CACHE.get("admin")
+    if token is None:
+        response = client.post(
+            "/api/v1/auth/login",
+            json={"username": "admin", "password": "admin123"},
+        )
+        data = response.json()["data"]
+        token = _TOKEN_CACHE["admin"] = data["access_token"]
+    return token
 
 
 def test_access_control_crud_flow(client: TestClient):
@@ -291,3 +298,217 @@ def test_get_routers_accepts_localized_enabled_status(
 
     client.delete(f"/api/v1/access-controls/{child_id}", headers=headers)
     client.delete(f"/api/v1/access-controls/{root_id}", headers=headers)
+
+
+def test_list_tree_filter_keeps_every_matching_sibling(client: TestClient):
+    """按名称过滤时，同一父级下的多个命中子项都应保留（父级仅作为祖先出现）。"""
+    token = _get_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    root_resp = client.post(
+        "/api/v1/access-controls",
+        headers=headers,
+        json={"name": "过滤根菜单", "type": "menu", "display_status": "show", "enabled_status": "enabled"},
+    )
+    assert root_resp.status_code == 200
+    root_id = root_resp.json()["data"]["id"]
+    child_ids = []
+    for index in range(3):
+        child_resp = client.post(
+            "/api/v1/access-controls",
+            headers=headers,
+            json={
+                "parent_id": root_id,
+                "name": f"needle-{index}",
+                "type": "menu",
+                "display_status": "show",
+                "enabled_status": "enabled",
+                "sort_order": index,
+            },
+        )
+        assert child_resp.status_code == 200
+        child_ids.append(child_resp.json()["data"]["id"])
+
+    try:
+        resp = client.get("/api/v1/access-controls", headers=headers, params={"name": "NEEDLE"})
+        assert resp.status_code == 200
+        roots = [node for node in resp.json()["data"] if node["id"] == root_id]
+        assert len(roots) == 1
+        assert [child["id"] for child in roots[0]["children"]] == child_ids
+    finally:
+        for child_id in child_ids:
+            client.delete(f"/api/v1/access-controls/{child_id}", headers=headers)
+        client.delete(f"/api/v1/access-controls/{root_id}", headers=headers)
+
+
+def test_batch_create_checks_permission_codes_in_memory(client: TestClient):
+    """批量创建：全部通过时一次写入；同批次或与库中重复的权限字符整体拒绝。"""
+    token = _get_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    root_resp = client.post(
+        "/api/v1/access-controls",
+        headers=headers,
+        json={"name": "批量根菜单", "type": "menu", "display_status": "show", "enabled_status": "enabled"},
+    )
+    assert root_resp.status_code == 200
+    root_id = root_resp.json()["data"]["id"]
+
+    def button(code: str) -> dict:
+        return {"parent_id": root_id, "name": code, "type": "button", "permission_code": code, "enabled_status": "enabled"}
+
+    try:
+        resp = client.post(
+            "/api/v1/access-controls/batch",
+            headers=headers,
+            json={"items": [button("batch:add"), button("batch:edit")]},
+        )
+        assert resp.status_code == 200
+        assert resp.json()["data"] == {"created": 2}
+
+        for items in ([button("batch:add")], [button("batch:remove"), button("batch:remove")]):
+            resp = client.post("/api/v1/access-controls/batch", headers=headers, json={"items": items})
+            assert resp.status_code == 409
+
+        tree = client.get("/api/v1/access-controls", headers=headers).json()["data"]
+        root = next(node for node in tree if node["id"] == root_id)
+        assert [child["permission_code"] for child in root["children"]] == ["batch:add", "batch:edit"]
+    finally:
+        tree = client.get("/api/v1/access-controls", headers=headers).json()["data"]
+        root = next((node for node in tree if node["id"] == root_id), None)
+        for child in (root or {}).get("children", []):
+            client.delete(f"/api/v1/access-controls/{child['id']}", headers=headers)
+        client.delete(f"/api/v1/access-controls/{root_id}", headers=headers)
+
+
+def test_reorder_moves_nodes_and_rejects_cycles(client: TestClient):
+    """批量调整应一次写入新的上级与排序；移动到自身下级时整体拒绝。"""
+    token = _get_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def create_menu(name: str, parent_id=None) -> int:
+        body = {"name": name, "type": "menu", "display_status": "show", "enabled_status": "enabled"}
+        if parent_id is not None:
+            body["parent_id"] = parent_id
+        resp = client.post("/api/v1/access-controls", headers=headers, json=body)
+        assert resp.status_code == 200
+        return resp.json()["data"]["id"]
+
+    root_id = create_menu("排序根菜单")
+    first_id = create_menu("排序子菜单A", root_id)
+    second_id = create_menu("排序子菜单B", root_id)
+
+    try:
+        resp = client.put(
+            "/api/v1/access-controls/reorder",
+            headers=headers,
+            json={
+                "items": [
+                    {"id": second_id, "parent_id": root_id, "sort_order": 0},
+                    {"id": first_id, "parent_id": second_id, "sort_order": 0},
+                ]
+            },
+        )
+        assert resp.status_code == 200
+        assert resp.json()["data"] == {"updated": 2}
+
+        tree = client.get("/api/v1/access-controls", headers=headers).json()["data"]
+        root = next(node for node in tree if node["id"] == root_id)
+        assert [child["id"] for child in root["children"]] == [second_id]
+        assert [child["id"] for child in root["children"][0]["children"]] == [first_id]
+
+        resp = client.put(
+            "/api/v1/access-controls/reorder",
+            headers=headers,
+            json={"items": [{"id": second_id, "parent_id": first_id, "sort_order": 0}]},
+        )
+        assert resp.status_code == 400
+    finally:
+        for item_id in (first_id, second_id, root_id):
+            client.delete(f"/api/v1/access-controls/{item_id}", headers=headers)
+
+
+def test_bulk_create_copy_path_serializes_json_columns():
+    """PostgreSQL 的 COPY 路径应按列类型序列化取值：JSON 列写出合法 JSON 文本而非 Python repr。"""
+    import json
+    import re
+    from types import SimpleNamespace
+
+    from sqlalchemy.dialects.postgresql import psycopg2
+
+    from app.packages.system.crud.access_control import access_control_crud
+
+    captured: dict = {}
+
+    class _Cursor:
+        def copy_expert(self, sql, buf):
+            captured["sql"], captured["data"] = sql, buf.read()
+
+        def close(self):
+            pass
+
+    dialect = psycopg2.dialect()
+    db = SimpleNamespace(
+        get_bind=lambda: SimpleNamespace(dialect=dialect),
+        connection=lambda: SimpleNamespace(connection=SimpleNamespace(cursor=_Cursor)),
+    )
+    rows = [
+        {"name": f"copy-{i}", "type": "menu", "route_params": {"id": i, "tab": "a\tb"}, "organization_id": 1}
+        for i in range(3)
+    ]
+    assert access_control_crud._copy_rows(db, rows) is True
+
+    columns = [c.strip('"') for c in captured["sql"].split("(", 1)[1].split(")", 1)[0].split(", ")]
+    lines = captured["data"].rstrip("\n").split("\n")
+    assert len(lines) == 3
+    for i, line in enumerate(lines):
+        values = dict(zip(columns, line.split("\t")))
+        # COPY 文本格式中的转义在数据库端还原，这里按同样规则还原后再解析
+        raw = re.sub(r"\\(.)", lambda m: {"t": "\t", "n": "\n", "r": "\r"}.get(m.group(1), m.group(1)), values["route_params"])
+        assert json.loads(raw) == {"id": i, "tab": "a\tb"}
+
+
+def test_batch_create_at_copy_threshold_keeps_route_params(client: TestClient):
+    """达到 COPY_THRESHOLD 的批量创建（PostgreSQL 下走 COPY）应原样保存每一项的 route_params。"""
+    from app.packages.system.crud.access_control import access_control_crud
+
+    token = _get_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    root_resp = client.post(
+        "/api/v1/access-controls",
+        headers=headers,
+        json={"name": "批量路由参数", "type": "menu", "display_status": "show", "enabled_status": "enabled"},
+    )
+    assert root_resp.status_code == 200
+    root_id = root_resp.json()["data"]["id"]
+    count = access_control_crud.COPY_THRESHOLD
+    items = [
+        {
+            "parent_id": root_id,
+            "name": f"copy-menu-{i}",
+            "type": "menu",
+            "route_path": f"/copy-menu-{i}",
+            "route_params": {"index": i, "label": f"tab\t{i}"},
+            "sort_order": i,
+            "display_status": "show",
+            "enabled_status": "enabled",
+        }
+        for i in range(count)
+    ]
+
+    try:
+        resp = client.post("/api/v1/access-controls/batch", headers=headers, json={"items": items})
+        assert resp.status_code == 200
+        assert resp.json()["data"] == {"created": count}
+
+        tree = client.get("/api/v1/access-controls", headers=headers).json()["data"]
+        root = next(node for node in tree if node["id"] == root_id)
+        params = {child["name"]: child["route_params"] for child in root["children"]}
+        assert params == {f"copy-menu-{i}": {"index": i, "label": f"tab\t{i}"} for i in range(count)}
+    finally:
+        tree = client.get("/api/v1/access-controls", headers=headers).json()["data"]
+        root = next((node for node in tree if node["id"] == root_id), None)
+        for child in (root or {}).get("children", []):
+            client.delete(f"/api/v1/access-controls/{child['id']}", headers=headers)
+        client.delete(f"/api/v1/access-controls/{root_id}", headers=headers)
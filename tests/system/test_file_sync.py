@@ -0,0 +1,409 @@
+"""文件元数据同步集成测试（LOCAL 存储）。"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.packages.system.models.file_record import FileRecord
+from app.packages.system.models.fs_node import FsNode
+from app.packages.system.services import sync_service
+
+
+def _write(root: str, rel: str, content: bytes = b"x") -> None:
+    full = os.path.join(root, rel.lstrip("/"))
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "wb") as fh:
+        fh.write(content)
+
+
+def _live_node_paths(db, storage_id: int) -> set[str]:
+    db.expire_all()
+    rows = db.query(FsNode.path).filter(FsNode.storage_id == storage_id, FsNode.is_deleted.is_(False)).all()
+    return {r[0] for r in rows}
+
+
+def _live_file_paths(db, storage_id: int) -> set[str]:
+    db.expire_all()
+    rows = (
+        db.query(FileRecord.directory, FileRecord.alias_name)
+        .filter(FileRecord.storage_id == storage_id, FileRecord.is_deleted.is_(False))
+        .all()
+    )
+    return {f"{d}/{n}" for d, n in rows}
+
+
+@pytest.mark.parametrize("inline_limit", [500, 0], ids=["inline", "temp-table"])
+def test_sync_inserts_and_prunes_missing_entries(
+    client: TestClient, db_session_fixture, admin_headers, create_storage, monkeypatch, inline_limit
+):
+    """清理阶段无论走内联 NOT IN 还是临时表，都应软删磁盘上已不存在的条目。"""
+    monkeypatch.setattr(sync_service, "_NOTIN_INLINE_LIMIT", inline_limit)
+    headers = admin_headers
+    tmp_root = tempfile.mkdtemp(prefix="asm_files_sync_")
+    try:
+        storage_id = create_storage(tmp_root, f"sync-prune-{inline_limit}")
+        _write(tmp_root, "/docs/a.txt", b"aaa")
+        _write(tmp_root, "/docs/sub/b.txt", b"bb")
+        _write(tmp_root, "/c.txt")
+
+        resp = client.post("/api/v1/files/sync", params={"storageId": storage_id, "path": "/"}, headers=headers)
+        assert resp.status_code == 200
+        assert resp.json()["data"]["inserted"] == 3
+        assert _live_node_paths(db_session_fixture, storage_id) == {
+            "/docs", "/docs/sub", "/docs/a.txt", "/docs/sub/b.txt", "/c.txt",
+        }
+        assert _live_file_paths(db_session_fixture, storage_id) == {"/docs/a.txt", "/docs/sub/b.txt", "/c.txt"}
+
+        # 直接在磁盘上删除，重新同步后应软删对应记录
+        shutil.rmtree(os.path.join(tmp_root, "docs", "sub"))
+        os.remove(os.path.join(tmp_root, "c.txt"))
+        _write(tmp_root, "/docs/a.txt", b"changed")
+
+        resp = client.post("/api/v1/files/sync", params={"storageId": storage_id, "path": "/"}, headers=headers)
+        assert resp.status_code == 200
+        assert resp.json()["data"]["updated"] == 1
+        sizes = {
+            n.path: n.size_bytes
+            for n in db_session_fixture.query(FsNode).filter(FsNode.storage_id == storage_id, FsNode.is_dir.is_(False))
+        }
+        assert sizes["/docs/a.txt"] == len(b"changed")
+        record = (
+            db_session_fixture.query(FileRecord)
+            .filter(FileRecord.storage_id == storage_id, FileRecord.alias_name == "a.txt")
+            .one()
+        )
+        assert record.size_bytes == len(b"changed")
+        assert _live_node_paths(db_session_fixture, storage_id) == {"/docs", "/docs/a.txt"}
+        assert _live_file_paths(db_session_fixture, storage_id) == {"/docs/a.txt"}
+    finally:
+        shutil.rmtree(tmp_root, ignore_errors=True)
+
+
+def test_delete_removes_exact_and_subtree_records(
+    client: TestClient, db_session_fixture, admin_headers, create_storage
+):
+    """批量删除应同时清理精确命中的文件与目录子树下的全部记录。"""
+    headers = admin_headers
+    tmp_root = tempfile.mkdtemp(prefix="asm_files_sync_del_")
+    try:
+        storage_id = create_storage(tmp_root, "sync-delete")
+        _write(tmp_root, "/keep.txt")
+        _write(tmp_root, "/drop.txt")
+        _write(tmp_root, "/dir/a.txt")
+        _write(tmp_root, "/dir/sub/b.txt")
+        _write(tmp_root, "/dir2/c.txt")
+        resp = client.post("/api/v1/files/sync", params={"storageId": storage_id, "path": "/"}, headers=headers)
+        assert resp.status_code == 200
+
+        resp = client.request(
+            "DELETE",
+            "/api/v1/files",
+            params={"storageId": storage_id},
+            json={"paths": ["/drop.txt", "/dir"]},
+            headers=headers,
+        )
+        assert resp.status_code == 200
+        assert _live_node_paths(db_session_fixture, storage_id) == {"/keep.txt", "/dir2", "/dir2/c.txt"}
+        assert _live_file_paths(db_session_fixture, storage_id) == {"/keep.txt", "/dir2/c.txt"}
+    finally:
+        shutil.rmtree(tmp_root, ignore_errors=True)
+
+
+def test_move_updates_every_source_path(client: TestClient, db_session_fixture, admin_headers, create_storage):
+    """一次移动多个源路径时，每个源的记录都应迁移到目标目录。"""
+    headers = admin_headers
+    tmp_root = tempfile.mkdtemp(prefix="asm_files_sync_mv_")
+    try:
+        storage_id = create_storage(tmp_root, "sync-move")
+        _write(tmp_root, "/a.txt")
+        _write(tmp_root, "/b.txt")
+        _write(tmp_root, "/dir/c.txt")
+        _write(tmp_root, "/dest/.keep")
+        resp = client.post("/api/v1/files/sync", params={"storageId": storage_id, "path": "/"}, headers=headers)
+        assert resp.status_code == 200
+
+        resp = client.post(
+            "/api/v1/files/move",
+            params={"storageId": storage_id},
+            json={"sourcePaths": ["/a.txt", "/b.txt", "/dir"], "destinationPath": "/dest"},
+            headers=headers,
+        )
+        assert resp.status_code == 200
+        assert _live_node_paths(db_session_fixture, storage_id) == {
+            "/dest", "/dest/.keep", "/dest/a.txt", "/dest/b.txt", "/dest/dir", "/dest/dir/c.txt",
+        }
+        assert _live_file_paths(db_session_fixture, storage_id) == {
+            "/dest/.keep", "/dest/a.txt", "/dest/b.txt", "/dest/dir/c.txt",
+        }
+    finally:
+        shutil.rmtree(tmp_root, ignore_errors=True)
+
+
+def test_sync_subdirectory_keeps_its_own_node(client: TestClient, db_session_fixture, admin_headers, create_storage):
+    """对子目录执行同步时，清理阶段不应把同步根目录本身软删。"""
+    headers = admin_headers
+    tmp_root = tempfile.mkdtemp(prefix="asm_files_sync_sub_")
+    try:
+        storage_id = create_storage(tmp_root, "sync-subdir")
+        _write(tmp_root, "/docs/a.txt")
+        resp = client.post("/api/v1/files/sync", params={"storageId": storage_id, "path": "/"}, headers=headers)
+        assert resp.status_code == 200
+
+        resp = client.post("/api/v1/files/sync", params={"storageId": storage_id, "path": "/docs"}, headers=headers)
+        assert resp.status_code == 200
+        assert _live_node_paths(db_session_fixture, storage_id) == {"/docs", "/docs/a.txt"}
+
+        shutil.rmtree(os.path.join(tmp_root, "docs"))
+        resp = client.post("/api/v1/files/sync", params={"storageId": storage_id, "path": "/docs"}, headers=headers)
+        assert resp.status_code == 200
+        assert _live_node_paths(db_session_fixture, storage_id) == set()
+    finally:
+        shutil.rmtree(tmp_root, ignore_errors=True)
+
+
+def test_rename_directory_rewrites_subtree(client: TestClient, db_session_fixture, admin_headers, create_storage):
+    """目录重命名应整体替换子树前缀，且不重复创建目标父目录节点。"""
+    headers = admin_headers
+    tmp_root = tempfile.mkdtemp(prefix="asm_files_sync_rn_")
+    try:
+        storage_id = create_storage(tmp_root, "sync-rename")
+        _write(tmp_root, "/top/docs/a.txt")
+        _write(tmp_root, "/top/docs/sub/b.txt")
+        resp = client.post("/api/v1/files/sync", params={"storageId": storage_id, "path": "/"}, headers=headers)
+        assert resp.status_code == 200
+
+        resp = client.patch(
+            "/api/v1/files",
+            params={"storageId": storage_id},
+            json={"oldPath": "/top/docs", "newPath": "/top/papers"},
+            headers=headers,
+        )
+        assert resp.status_code == 200
+        assert _live_node_paths(db_session_fixture, storage_id) == {
+            "/top", "/top/papers", "/top/papers/a.txt", "/top/papers/sub", "/top/papers/sub/b.txt",
+        }
+        assert _live_file_paths(db_session_fixture, storage_id) == {"/top/papers/a.txt", "/top/papers/sub/b.txt"}
+    finally:
+        shutil.rmtree(tmp_root, ignore_errors=True)
+
+
+def test_copy_processes_every_source_path(client: TestClient, db_session_fixture, admin_headers, create_storage):
+    """一次复制多个源路径（文件与目录混合）时，每个源都应在目标目录生成记录。"""
+    headers = admin_headers
+    tmp_root = tempfile.mkdtemp(prefix="asm_files_sync_cp_")
+    try:
+        storage_id = create_storage(tmp_root, "sync-copy")
+        _write(tmp_root, "/a.txt")
+        _write(tmp_root, "/dir/c.txt")
+        _write(tmp_root, "/dir/sub/d.txt")
+        _write(tmp_root, "/b.txt")
+        _write(tmp_root, "/dest/.keep")
+        resp = client.post("/api/v1/files/sync", params={"storageId": storage_id, "path": "/"}, headers=headers)
+        assert resp.status_code == 200
+
+        resp = client.post(
+            "/api/v1/files/copy",
+            params={"storageId": storage_id},
+            json={"sourcePaths": ["/a.txt", "/dir", "/b.txt"], "destinationPath": "/dest"},
+            headers=headers,
+        )
+        assert resp.status_code == 200
+        assert _live_node_paths(db_session_fixture, storage_id) >= {
+            "/dest/a.txt", "/dest/b.txt", "/dest/dir", "/dest/dir/c.txt", "/dest/dir/sub", "/dest/dir/sub/d.txt",
+        }
+        assert _live_file_paths(db_session_fixture, storage_id) == {
+            "/a.txt", "/b.txt", "/dir/c.txt", "/dir/sub/d.txt",
+            "/dest/.keep", "/dest/a.txt", "/dest/b.txt", "/dest/dir/c.txt", "/dest/dir/sub/d.txt",
+        }
+    finally:
+        shutil.rmtree(tmp_root, ignore_errors=True)
+
+
+def test_delete_falls_back_to_soft_delete_when_hard_delete_fails(
+    client: TestClient, db_session_fixture, admin_headers, create_storage, monkeypatch
+):
+    """硬删语句失败时应回滚到保存点并改为软删，而不是吞掉错误、留下未删除的记录。"""
+    from sqlalchemy import text
+
+    class _FailingDelete:
+        def __init__(self, model):
+            pass
+
+        def where(self, *conds):
+            return self
+
+        def execution_options(self, **opts):
+            return text("DELETE FROM missing_table_for_fallback")
+
+    headers = admin_headers
+    tmp_root = tempfile.mkdtemp(prefix="asm_files_sync_soft_")
+    try:
+        storage_id = create_storage(tmp_root, "sync-soft-delete")
+        _write(tmp_root, "/keep.txt")
+        _write(tmp_root, "/drop.txt")
+        resp = client.post("/api/v1/files/sync", params={"storageId": storage_id, "path": "/"}, headers=headers)
+        assert resp.status_code == 200
+
+        monkeypatch.setattr(sync_service, "delete", _FailingDelete)
+        result = sync_service.sync_delete_records(db_session_fixture, storage_id=storage_id, paths=["/drop.txt"])
+        assert result == {"filesDeleted": 1, "nodesDeleted": 1}
+        assert _live_node_paths(db_session_fixture, storage_id) == {"/keep.txt"}
+        assert _live_file_paths(db_session_fixture, storage_id) == {"/keep.txt"}
+    finally:
+        shutil.rmtree(tmp_root, ignore_errors=True)
+
+
+def test_sync_failed_bulk_update_chunk_only_skips_its_rows(
+    client: TestClient, db_session_fixture, admin_headers, create_storage, monkeypatch
+):
+    """file_records 的批量更新失败时只扣除该分块的统计，fs_nodes 的更新仍应提交。"""
+    from sqlalchemy.exc import SQLAlchemyError
+    from sqlalchemy.orm import Session
+
+    headers = admin_headers
+    tmp_root = tempfile.mkdtemp(prefix="asm_files_sync_bulk_")
+    try:
+        storage_id = create_storage(tmp_root, "sync-bulk-fail")
+        _write(tmp_root, "/a.txt", b"a")
+        resp = client.post("/api/v1/files/sync", params={"storageId": storage_id, "path": "/"}, headers=headers)
+        assert resp.status_code == 200
+
+        original = Session.bulk_update_mappings
+
+        def _fail_file_records(self, mapper, mappings):
+            if mapper is FileRecord:
+                raise SQLAlchemyError("simulated failure")
+            return original(self, mapper, mappings)
+
+        monkeypatch.setattr(Session, "bulk_update_mappings", _fail_file_records)
+        _write(tmp_root, "/a.txt", b"changed")
+        resp = client.post("/api/v1/files/sync", params={"storageId": storage_id, "path": "/"}, headers=headers)
+        assert resp.status_code == 200
+        data = resp.json()["data"]
+        assert (data["updated"], data["skipped"]) == (0, 1)
+        node = db_session_fixture.query(FsNode).filter(FsNode.storage_id == storage_id, FsNode.path == "/a.txt").one()
+        assert node.size_bytes == len(b"changed")
+    finally:
+        shutil.rmtree(tmp_root, ignore_errors=True)
+
+
+@pytest.mark.parametrize("in_db", [True, False], ids=["insert-select", "fallback"])
+def test_copy_revives_soft_deleted_destination_with_source_metadata(
+    client: TestClient, db_session_fixture, admin_headers, create_storage, monkeypatch, in_db
+):
+    """目标路径只有软删行时，复制应按源行回填 is_dir/size 等再恢复，而不是沿用旧值。"""
+    if not in_db:
+        monkeypatch.setattr(sync_service, "_copy_subtree_sql", lambda db, **kw: (0, 0))
+    headers = admin_headers
+    tmp_root = tempfile.mkdtemp(prefix="asm_files_sync_revive_")
+    try:
+        storage_id = create_storage(tmp_root, f"sync-copy-revive-{in_db}")
+        _write(tmp_root, "/src/x.txt", b"hello")
+        _write(tmp_root, "/dest/.keep")
+        resp = client.post("/api/v1/files/sync", params={"storageId": storage_id, "path": "/"}, headers=headers)
+        assert resp.status_code == 200
+        # 目标处残留一条旧的软删目录行
+        db_session_fixture.add(
+            FsNode(storage_id=storage_id, path="/dest/src/x.txt", name="x.txt", is_dir=True, size_bytes=0, is_deleted=True)
+        )
+        db_session_fixture.commit()
+
+        resp = client.post(
+            "/api/v1/files/copy",
+            params={"storageId": storage_id},
+            json={"sourcePaths": ["/src"], "destinationPath": "/dest"},
+            headers=headers,
+        )
+        assert resp.status_code == 200
+        db_session_fixture.expire_all()
+        node = (
+            db_session_fixture.query(FsNode)
+            .filter(FsNode.storage_id == storage_id, FsNode.path == "/dest/src/x.txt")
+            .one()
+        )
+        assert (node.is_deleted, node.is_dir, node.size_bytes) == (False, False, 5)
+    finally:
+        shutil.rmtree(tmp_root, ignore_errors=True)
+
+
+def test_copy_failed_file_write_does_not_block_other_sources(
+    client: TestClient, db_session_fixture, admin_headers, create_storage, monkeypatch
+):
+    """单个文件的元数据写入失败只回滚它自己的保存点，其余源仍应复制并提交。"""
+    from sqlalchemy.exc import SQLAlchemyError
+
+    from app.packages.system.crud.file_record import file_record_crud
+
+    headers = admin_headers
+    tmp_root = tempfile.mkdtemp(prefix="asm_files_sync_cp_fail_")
+    try:
+        storage_id = create_storage(tmp_root, "sync-copy-partial")
+        _write(tmp_root, "/a.txt")
+        _write(tmp_root, "/b.txt")
+        _write(tmp_root, "/dest/.keep")
+        resp = client.post("/api/v1/files/sync", params={"storageId": storage_id, "path": "/"}, headers=headers)
+        assert resp.status_code == 200
+
+        original = type(file_record_crud).create
+
+        def _fail_a(self, db, obj_in, **kwargs):
+            if obj_in.get("alias_name") == "a.txt":
+                raise SQLAlchemyError("simulated failure")
+            return original(self, db, obj_in, **kwargs)
+
+        monkeypatch.setattr(type(file_record_crud), "create", _fail_a)
+        resp = client.post(
+            "/api/v1/files/copy",
+            params={"storageId": storage_id},
+            json={"sourcePaths": ["/a.txt", "/b.txt"], "destinationPath": "/dest"},
+            headers=headers,
+        )
+        assert resp.status_code == 200
+        files = _live_file_paths(db_session_fixture, storage_id)
+        assert "/dest/b.txt" in files and "/dest/a.txt" not in files
+    finally:
+        shutil.rmtree(tmp_root, ignore_errors=True)
+
+
+def test_copy_skips_soft_deleted_source_rows(client: TestClient, db_session_fixture, admin_headers, create_storage):
+    """源子树只有软删行时，回退路径不应把这些记录复制成目标侧的存活行。"""
+    headers = admin_headers
+    tmp_root = tempfile.mkdtemp(prefix="asm_files_sync_cp_deleted_")
+    try:
+        storage_id = create_storage(tmp_root, "sync-copy-deleted-src")
+        _write(tmp_root, "/src/x.txt")
+        _write(tmp_root, "/dest/.keep")
+        resp = client.post("/api/v1/files/sync", params={"storageId": storage_id, "path": "/"}, headers=headers)
+        assert resp.status_code == 200
+        # 仅存在于数据库且已软删的源记录（磁盘上没有 ghost.txt）
+        db_session_fixture.add(
+            FsNode(storage_id=storage_id, path="/src/ghost.txt", name="ghost.txt", is_dir=False, size_bytes=1, is_deleted=True)
+        )
+        db_session_fixture.add(
+            FileRecord(
+                storage_id=storage_id, directory="/src", original_name="ghost.txt", alias_name="ghost.txt",
+                purpose="general", size_bytes=1, is_deleted=True,
+            )
+        )
+        db_session_fixture.query(FsNode).filter(
+            FsNode.storage_id == storage_id, FsNode.path.in_(["/src", "/src/x.txt"])
+        ).update({FsNode.is_deleted: True}, synchronize_session=False)
+        db_session_fixture.query(FileRecord).filter(
+            FileRecord.storage_id == storage_id, FileRecord.directory == "/src"
+        ).update({FileRecord.is_deleted: True}, synchronize_session=False)
+        db_session_fixture.commit()
+
+        resp = client.post(
+            "/api/v1/files/copy",
+            params={"storageId": storage_id},
+            json={"sourcePaths": ["/src/"], "destinationPath": "/dest"},
+            headers=headers,
+        )
+        assert resp.status_code == 200
+        assert "/dest/src/ghost.txt" not in _live_node_paths(db_session_fixture, storage_id)
+        assert "/dest/src/ghost.txt" not in _live_file_paths(db_session_fixture, storage_id)
+    finally:
+        shutil.rmtree(tmp_root, ignore_errors=True)
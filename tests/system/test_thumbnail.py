@@ -0,0 +1,114 @@
+"""缩略图服务集成测试（LOCAL 存储）。"""
+
+import io
+import os
+import shutil
+import tempfile
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+
+def test_thumbnail_reflects_replaced_or_deleted_original(client: TestClient, admin_headers, create_storage):
+    """重复请求可复用缓存，但原图被替换或删除后，响应必须反映最新状态而不是返回旧缩略图。"""
+    headers = admin_headers
+    tmp_root = tempfile.mkdtemp(prefix="asm_thumb_")
+    try:
+        storage_id = create_storage(tmp_root, "thumb-cache")
+        original = os.path.join(tmp_root, "a.jpg")
+        Image.new("RGB", (800, 600), (10, 20, 30)).save(original, format="JPEG")
+        params = {"storageId": storage_id, "path": "/a.jpg", "w": 64}
+
+        resp = client.get("/api/v1/files/thumbnail", params=params, headers=headers)
+        assert resp.status_code == 200
+        assert Image.open(io.BytesIO(resp.content)).size == (64, 48)
+        again = client.get("/api/v1/files/thumbnail", params=params, headers=headers)
+        assert again.status_code == 200
+        assert again.content == resp.content
+
+        # 直接在存储上替换原图（不经上传接口），缩略图应按新图重新生成
+        Image.new("RGB", (600, 800), (200, 20, 30)).save(original, format="JPEG")
+        st = os.stat(original)
+        os.utime(original, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        replaced = client.get("/api/v1/files/thumbnail", params=params, headers=headers)
+        assert replaced.status_code == 200
+        assert Image.open(io.BytesIO(replaced.content)).size == (48, 64)
+
+        # 原图删除后不再返回缓存的缩略图
+        os.remove(original)
+        gone = client.get("/api/v1/files/thumbnail", params=params, headers=headers)
+        assert gone.status_code == 404
+    finally:
+        shutil.rmtree(tmp_root, ignore_errors=True)
+
+
+def test_thumbnail_upload_invalidates_process_cache(client: TestClient, admin_headers, create_storage):
+    """上传文件后应丢弃该存储源的进程内缩略图缓存（S3 无法廉价校验原图版本，依赖这里失效）。"""
+    from app.packages.system.services import thumbnail_service as thumbnail_module
+
+    headers = admin_headers
+    tmp_root = tempfile.mkdtemp(prefix="asm_thumb_up_")
+    try:
+        storage_id = create_storage(tmp_root, "thumb-upload")
+        Image.new("RGB", (320, 160), (1, 2, 3)).save(os.path.join(tmp_root, "b.png"), format="PNG")
+        resp = client.get("/api/v1/files/thumbnail", params={"storageId": storage_id, "path": "/b.png", "w": 32}, headers=headers)
+        assert resp.status_code == 200
+
+        def _cached_keys() -> list:
+            return [k for k in thumbnail_module._THUMB_CACHE if k[0] == storage_id]
+
+        assert _cached_keys()
+        resp = client.post(
+            "/api/v1/files",
+            params={"storageId": storage_id, "path": "/"},
+            files=[("files", ("c.txt", b"c", "text/plain"))],
+            headers=headers,
+        )
+        assert resp.status_code == 200
+        assert _cached_keys() == []
+    finally:
+        shutil.rmtree(tmp_root, ignore_errors=True)
+
+
+def test_s3_known_thumbnails_are_bounded_and_expire(monkeypatch):
+    """已知存在的 S3 缩略图集合按 LRU 限额淘汰，过期条目不再视为存在。"""
+    from app.packages.system.services import thumbnail_service as thumbnail_module
+
+    monkeypatch.setattr(thumbnail_module, "_S3_THUMB_KNOWN", type(thumbnail_module._S3_THUMB_KNOWN)())
+    monkeypatch.setattr(thumbnail_module, "_S3_THUMB_KNOWN_MAX", 2)
+    for name in ("a", "b", "c"):
+        thumbnail_module._s3_known_add((1, name))
+    assert not thumbnail_module._s3_known_has((1, "a"))
+    assert thumbnail_module._s3_known_has((1, "c"))
+
+    monkeypatch.setattr(thumbnail_module, "_S3_THUMB_KNOWN_TTL", -1.0)
+    thumbnail_module._s3_known_add((1, "d"))
+    assert not thumbnail_module._s3_known_has((1, "d"))
+
+
+def test_s3_original_is_spooled_to_temporary_file(monkeypatch):
+    """S3 原图先转存到可回绕的临时文件（超过阈值落盘），响应 Body 随即关闭，再交给解码器。"""
+    from types import SimpleNamespace
+
+    from app.packages.system.services.thumbnail_service import thumbnail_service
+
+    raw = io.BytesIO()
+    Image.new("RGB", (400, 200), (9, 8, 7)).save(raw, format="PNG")
+    body = io.BytesIO(raw.getvalue())
+    backend = SimpleNamespace(
+        bucket="bucket",
+        _join_key=lambda rel: rel.lstrip("/"),
+        _client=SimpleNamespace(
+            get_object=lambda **kw: {"Body": body, "ContentLength": len(raw.getvalue())},
+        ),
+    )
+    monkeypatch.setattr(type(thumbnail_service), "SPOOL_MAX_BYTES", 16)
+
+    source = thumbnail_service._open_original(None, backend, "/a.png")
+    try:
+        assert body.closed
+        assert source._rolled  # 超过阈值已落到磁盘临时文件
+        thumb = thumbnail_service._make_thumbnail(source, width=40, height=None, fmt="png", quality=75)
+        assert Image.open(io.BytesIO(thumb)).size == (40, 20)
+    finally:
+        source.close()
@@ -4,10 +4,13 @@ import io
 import uuid
 
 from fastapi.testclient import TestClient
-from openpyxl import Workbook
+from openpyxl import Workbook, load_workbook
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
+from app.packages.system.crud.users import user_crud
 from app.packages.system.models.role import Role
+from app.packages.system.services.user_service import user_service
 
 
 def _get_token(client: TestClient) -> str:
@@ -130,6 +133,10 @@ def test_export_and_template_download(client: TestClient):
     assert export_response.status_code == 200
     content_disposition = export_response.headers.get("content-disposition")
     assert content_disposition is not None and "attachment" in content_disposition
+    exported = load_workbook(io.BytesIO(export_response.content), read_only=True)
+    exported_rows = list(exported.active.iter_rows(values_only=True))
+    assert exported_rows[0][0] == "用户名称"
+    assert any(row[0] == "admin" for row in exported_rows[1:])
 
     template_response = client.get("/api/v1/users/template", headers=headers)
     assert template_response.status_code == 200
@@ -181,3 +188,84 @@ def test_import_users(client: TestClient, db_session_fixture: Session):
     user_items = list_response.json()["data"]["items"]
     if user_items:
         client.delete(f"/api/v1/users/{user_items[0]['user_id']}", headers=headers)
+
+
+def test_import_users_reports_existing_username(client: TestClient, db_session_fixture: Session):
+    """导入已存在的用户名时应跳过该行并返回“用户名已存在”。"""
+
+    headers = _auth_headers(client)
+    imported_username = f"import_dup_{uuid.uuid4().hex[:8]}"
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["用户名", "密码", "用户昵称", "状态", "角色", "备注"])
+    sheet.append([imported_username, "import123", "导入用户", "normal", None, None])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+
+    files = {"file": ("users.xlsx", buffer.getvalue(), "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+    first = client.post("/api/v1/users/import", files=files, headers=headers)
+    assert first.json()["data"]["created"] == 1
+
+    second = client.post("/api/v1/users/import", files=files, headers=headers)
+    assert second.status_code == 200
+    payload = second.json()["data"]
+    assert payload["created"] == 0
+    assert payload["failed"] == [{"row": 2, "message": "用户名已存在"}]
+
+    list_response = client.get("/api/v1/users", params={"username": imported_username}, headers=headers)
+    user_items = list_response.json()["data"]["items"]
+    if user_items:
+        client.delete(f"/api/v1/users/{user_items[0]['user_id']}", headers=headers)
+
+
+def test_list_users_serializes_without_lazy_loads(db_session_fixture: Session):
+    """列表查询应预加载角色与组织，序列化阶段不再发出任何 SQL。"""
+
+    items, _ = user_crud.list_with_filters(db_session_fixture, limit=50)
+    assert items
+
+    statements: list[str] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db_session_fixture.get_bind()
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        payload = [user_service._serialize_user_summary(item) for item in items]
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
+    assert statements == []
+    assert any(item["username"] == "admin" for item in payload)
+
+
+def test_import_users_accepts_short_rows_from_write_only_workbook(client: TestClient, db_session_fixture: Session):
+    """write_only 生成的工作表没有 <dimension>，短行与空行不会被补齐，导入应按空值校验而非报 500。"""
+
+    headers = _auth_headers(client)
+    imported_username = f"import_short_{uuid.uuid4().hex[:8]}"
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(["用户名", "密码", "用户昵称", "状态", "角色", "备注"])
+    sheet.append([imported_username, "import123"])
+    sheet.append([])
+    sheet.append([f"{imported_username}_x"])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+
+    files = {"file": ("users.xlsx", buffer.getvalue(), "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+    response = client.post("/api/v1/users/import", files=files, headers=headers)
+    assert response.status_code == 200
+    payload = response.json()["data"]
+    assert payload["created"] == 1
+    assert payload["failed"] == [
+        {"row": 3, "message": "用户名不能为空"},
+        {"row": 4, "message": "密码不能为空"},
+    ]
+
+    list_response = client.get("/api/v1/users", params={"username": imported_username}, headers=headers)
+    for item in list_response.json()["data"]["items"]:
+        client.delete(f"/api/v1/users/{item['user_id']}", headers=headers)